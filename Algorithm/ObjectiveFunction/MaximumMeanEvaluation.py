@@ -1,7 +1,5 @@
 import numpy as np
-from Algorithm.ObjectiveFunctionCore import ObjectiveFunction
-from Core.Data.VectorData import VectorData
-from Core.DistanceFunction.MinkowskiDistance import MinkowskiDistance
+from Algorithm.ObjectiveFunctionCore import ObjectiveFunction, chebyshev_pair_blocks
 
 
 class MaximumMeanEvaluation(ObjectiveFunction):
@@ -17,37 +15,22 @@ class MaximumMeanEvaluation(ObjectiveFunction):
         :param variance_weight: 方差权重参数
         """
         super().__init__()
-        self.Chebyshev_distance = MinkowskiDistance(float('inf'))
     
-    def evaluate(self, evaluation_set, distance_function, pivot_set):
+    def evaluate_projection(self, projection: np.ndarray):
         """
-        评估函数，计算在支撑点空间中点对距离的方差
+        计算支撑点空间中所有点对切比雪夫距离之和除以评价点数量（分块向量化计算）
         
-        :param evaluation_set: 用于评价的点集合
-        :param distance_function: 距离函数
-        :param pivot_set: 当前的支撑点集合
-        :return: 加权方差值
+        :param projection: 评价点集合在支撑点空间中的投影 (m, k)
+        :return: 评价值
         """
-        if not pivot_set:
-            return 0
-        
-        # 投影到支撑点空间
-        projected_points = [
-            [distance_function.compute(x, pivot) for pivot in pivot_set] for x in evaluation_set
-        ]
-
-        # 计算所有点对之间的距离
-        distances = 0
-        n = len(projected_points)
-        for i in range(n):
-            for j in range(i + 1, n):  # 只计算 j > i 的点对
-                chebyshev_distance = self.Chebyshev_distance.compute(
-                    VectorData(np.array(projected_points[i])),
-                    VectorData(np.array(projected_points[j]))
-                )
-                distances += chebyshev_distance
+        total = 0.0
+        for pair_distances in chebyshev_pair_blocks(projection):
+            total += float(pair_distances.sum())
+        return total / len(projection)
 
-        return distances / n
+    def evaluate_pairs(self, pair_distances: np.ndarray, m: int):
+        """计算所有点对切比雪夫距离之和除以评价点数量"""
+        return float(pair_distances.sum()) / m
 
 
 # 为了向后兼容，保留原来的函数
@@ -1,8 +1,6 @@
 import numpy as np
 
-from Core.Data.VectorData import VectorData
-from Core.DistanceFunction.MinkowskiDistance import MinkowskiDistance
-from Algorithm.ObjectiveFunctionCore import ObjectiveFunction
+from Algorithm.ObjectiveFunctionCore import ObjectiveFunction, chebyshev_pair_blocks
 
 class RadiusSensitiveEvaluation(ObjectiveFunction):
     """
@@ -18,39 +16,23 @@ class RadiusSensitiveEvaluation(ObjectiveFunction):
         """
         super().__init__(radius_threshold=radius_threshold)
         self.radius_threshold = radius_threshold
-        self.Chebyshev_distance = MinkowskiDistance(float('inf'))
     
-    def evaluate(self, evaluation_set, distance_function, pivot_set):
+    def evaluate_projection(self, projection: np.ndarray):
         """
-        评估函数，计算在支撑点空间中距离小于radius_threshold的点对数量
+        计算在支撑点空间中切比雪夫距离大于等于 radius_threshold 的点对数量（分块向量化计算）
         
-        :param evaluation_set: 用于评价的点集合
-        :param distance_function: 距离函数
-        :param pivot_set: 当前的支撑点集合
-        :return: 距离小于radius_threshold的点对数量
+        :param projection: 评价点集合在支撑点空间中的投影 (m, k)
+        :return: 满足条件的点对数量
         """
-        if not pivot_set:
-            return 0
-
-        # 投影到支撑点空间
-        projected_points = [
-            [distance_function.compute(x, pivot) for pivot in pivot_set] for x in evaluation_set
-        ]
-
-        # 计算满足切比雪夫距离大于等于 r 的点对数量
         count = 0
-        n = len(projected_points)
-        for i in range(n):
-            for j in range(i + 1, n):  # 只计算 j > i 的点对
-                chebyshev_distance = self.Chebyshev_distance.compute(
-                    VectorData(np.array(projected_points[i])),
-                    VectorData(np.array(projected_points[j]))
-                )
-                if chebyshev_distance >= self.radius_threshold:
-                    count += 1
-
+        for pair_distances in chebyshev_pair_blocks(projection):
+            count += int(np.count_nonzero(pair_distances >= self.radius_threshold))
         return count
 
+    def evaluate_pairs(self, pair_distances: np.ndarray, m: int):
+        """计算切比雪夫距离大于等于 radius_threshold 的点对数量"""
+        return int(np.count_nonzero(pair_distances >= self.radius_threshold))
+
 
 # 为了向后兼容，保留原来的函数
 def radius_sensitive_evaluation(evaluation_set, distance_function, pivot_set, radius_threshold=0.01):
@@ -1,5 +1,10 @@
 from abc import ABC, abstractmethod
 
+import numpy as np
+
+# 分块计算点对切比雪夫距离时，每块距离矩阵的元素个数上限
+PAIR_BLOCK_ELEMENTS = 1 << 22
+
 class ObjectiveFunction(ABC):
     """
     目标函数基类
@@ -14,20 +19,72 @@ class ObjectiveFunction(ABC):
         """
         self.params = kwargs
     
-    @abstractmethod
-    def evaluate(self, evaluation_set, distance_function, pivot_set):
+    def evaluate(self, evaluation_set, distance_function, pivot_set, projection=None):
         """
         评估函数，计算给定支撑点集合的评价值
         
         :param evaluation_set: 用于评价的点集合
         :param distance_function: 距离函数
         :param pivot_set: 当前的支撑点集合
+        :param projection: 评价点集合在支撑点空间中的投影 (m, k)，已由调用方算出时传入以避免重复计算
         :return: 评价值（通常是数值，越大越好）
         """
+        if len(pivot_set) == 0:
+            return 0
+        if projection is None:
+            projection = project(evaluation_set, distance_function, pivot_set)
+        return self.evaluate_projection(np.asarray(projection, dtype=float))
+
+    @abstractmethod
+    def evaluate_projection(self, projection: np.ndarray):
+        """
+        根据支撑点空间中的投影计算评价值
+        
+        :param projection: 形状为 (m, k) 的数组，第 i 行为第 i 个评价点到各支撑点的距离
+        :return: 评价值
+        """
+        pass
+    
+    @abstractmethod
+    def evaluate_pairs(self, pair_distances: np.ndarray, m: int):
+        """
+        根据所有点对 (i < j) 在支撑点空间中的切比雪夫距离计算评价值
+        
+        :param pair_distances: 一维数组，长度为 m * (m - 1) / 2
+        :param m: 评价点数量
+        :return: 评价值
+        """
         pass
     
-    def __call__(self, evaluation_set, distance_function, pivot_set):
+    def __call__(self, evaluation_set, distance_function, pivot_set, projection=None):
         """
         使对象可调用，直接调用evaluate方法
         """
-        return self.evaluate(evaluation_set, distance_function, pivot_set)
+        return self.evaluate(evaluation_set, distance_function, pivot_set, projection)
+
+
+def project(evaluation_set, distance_function, pivot_set) -> np.ndarray:
+    """
+    把评价点集合投影到支撑点空间
+    :return: 形状为 (m, k) 的数组，projection[i, j] = d(evaluation_set[i], pivot_set[j])
+    """
+    return distance_function.compute_matrix(evaluation_set, pivot_set)
+
+
+def chebyshev_pair_blocks(projection: np.ndarray, block_elements: int = PAIR_BLOCK_ELEMENTS):
+    """
+    分块计算投影空间中所有点对 (i < j) 的切比雪夫距离
+    每块取若干行 i 与其后的所有行 j，按支撑点维逐列取最大值，内存不超过 block_elements 个元素
+    :param projection: 形状为 (m, k) 的投影
+    :return: 生成器，每次给出一块点对距离组成的一维数组
+    """
+    m, k = projection.shape
+    rows = max(1, block_elements // max(m, 1))
+    for i0 in range(0, m - 1, rows):
+        i1 = min(i0 + rows, m - 1)
+        block = np.zeros((i1 - i0, m - i0))
+        for c in range(k):
+            column = projection[:, c]
+            np.maximum(block, np.abs(column[i0:i1, None] - column[None, i0:]), out=block)
+        upper = np.arange(i0, m)[None, :] > np.arange(i0, i1)[:, None]
+        yield block[upper]
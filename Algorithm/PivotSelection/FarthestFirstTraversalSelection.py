@@ -1,6 +1,7 @@
 import random
 import numpy as np
-from Algorithm.SelectorCore import PivotSelector
+from Algorithm.SelectorCore import PivotSelector, complement_indices
+from Core.Data.VectorDataset import subset
 
 class FarthestFirstTraversalSelector(PivotSelector):
     def __init__(self, distance_function):
@@ -19,36 +20,29 @@ class FarthestFirstTraversalSelector(PivotSelector):
         if k >= len(data):
             if index:
                 return list(range(len(data))), []
-            return list(data), []
+            return subset(data, range(len(data))), subset(data, [])
 
         # 随机选择第一个支撑点的索引
         first_idx = random.randint(0, len(data) - 1)
         pivots_indices = [first_idx]
-        pivots = [data[first_idx]]
+        selected = np.zeros(len(data), dtype=bool)
+        selected[first_idx] = True
+
+        # 每个数据点到当前所有支撑点的最小距离，每加入一个支撑点只需批量计算一列距离进行更新
+        min_distances = np.full(len(data), np.inf)
 
         # 迭代选择剩余的支撑点
         for _ in range(1, k):
-            # 存储每个数据点到当前所有支撑点的最小距离
-            min_distances = []
-            remaining_indices = [i for i in range(len(data)) if i not in pivots_indices]
-
-            for idx in remaining_indices:
-                # 对每个点计算到所有支撑点的最小距离
-                min_distance = min(
-                    self.distance_function.compute(data[idx], data[pivot_idx])
-                    for pivot_idx in pivots_indices
-                )
-                min_distances.append(min_distance)
-
-            # 选择最小距离最大的点作为下一个支撑点
-            if min_distances:
-                max_min_dist_idx = np.argmax(min_distances)
-                selected_idx = remaining_indices[max_min_dist_idx]
-                pivots_indices.append(selected_idx)
-                pivots.append(data[selected_idx])
+            remaining = np.flatnonzero(~selected)
+            new_distances = self.distance_function.compute_many(data[pivots_indices[-1]], subset(data, remaining))
+            min_distances[remaining] = np.minimum(min_distances[remaining], new_distances)
+
+            # 选择最小距离最大的点作为下一个支撑点（距离相同时取下标最小者）
+            selected_idx = int(remaining[np.argmax(min_distances[remaining])])
+            pivots_indices.append(selected_idx)
+            selected[selected_idx] = True
 
+        rest_indices = complement_indices(len(data), pivots_indices)
         if index:
-            remaining_indices = [i for i in range(len(data)) if i not in pivots_indices]
-            return pivots_indices, remaining_indices
-        remaining_data = [data[i] for i in range(len(data)) if i not in pivots_indices]
-        return pivots, remaining_data
+            return pivots_indices, rest_indices
+        return subset(data, pivots_indices), subset(data, rest_indices)
@@ -1,9 +1,18 @@
-from Algorithm.SelectorCore import PivotSelector
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from Algorithm.SelectorCore import PivotSelector, complement_indices
+from Core.Data.VectorDataset import subset
+from Utils.sharedMemory import share_array, release_array, attach_arrays
 from .RandSelection import RandomPivotSelector
 from .FarthestFirstTraversalSelection import FarthestFirstTraversalSelector
 from .MaxVarianceSelection import MaxVariancePivotSelector
 from Algorithm.ObjectiveFunction.ObjectiveFunctionFactory import ObjectiveFunctionFactory
 
+# 并行评估的最小工作量（候选点数 × 点对数），低于该值时进程间通信的开销大于收益，顺序评估
+PARALLEL_MIN_WORK = 1 << 22
+
 
 class IncrementalSamplingPivotSelector(PivotSelector):
     def __init__(self, distance_function, config=None):
@@ -14,11 +23,13 @@ class IncrementalSamplingPivotSelector(PivotSelector):
         :param config: 配置字典，包含所有参数
         """
         self.distance_function = distance_function
+        self.workers = 1
         
         if config:
             # 从配置中读取参数
             self.candidate_size = config.get("candidate_size", 10)
             self.evaluation_size = config.get("evaluation_size", 100)
+            self.workers = max(1, int(config.get("workers", 1)))  # 评估候选点的进程数，1 表示顺序评估
             objective_function_name = config.get("objective_function", "Radius-sensitive")
             candidate_selector_name = config.get("candidate_selector", "Farthest First Traversal")
             evaluation_selector_name = config.get("evaluation_selector", "Random")
@@ -124,7 +135,7 @@ class IncrementalSamplingPivotSelector(PivotSelector):
         :return: (pivots, remaining_data): 选择的支撑点列表及剩余数据
         """
         if pivots_num >= len(data):
-            return list(data), []
+            return subset(data, range(len(data))), subset(data, [])
 
         # 初始化候选集合 - 使用用户选择的候选选择器（返回索引）
         candidate_num = min(self.candidate_size, len(data))
@@ -133,45 +144,95 @@ class IncrementalSamplingPivotSelector(PivotSelector):
         evaluation_num = min(self.evaluation_size, len(data))
         evaluation_set, _ = self.evaluation_selector.select(data, evaluation_num)
 
+        # 一次性计算候选点到评估点的距离矩阵 (candidate_num, evaluation_num)
+        candidate_distances = self.distance_function.compute_matrix(subset(data, candidate_set), evaluation_set)
+
+        # 评估点对 (i < j) 在已选支撑点空间中的切比雪夫距离，随支撑点的加入逐步取最大值
+        pair_i, pair_j = np.triu_indices(len(evaluation_set), 1)
+        pair_linf = np.zeros(len(pair_i))
+
         # 初始化支撑点集合
         pivots_indices = []
-
-        # 迭代选择支撑点
-        for _ in range(pivots_num):
-            best_value = -1  # 初始化最佳值为0
-            best_index = None  # 初始化最佳点索引
-
-            # 遍历候选集合，评估每个候选点
-            for candidate_idx in candidate_set:
-                # 如果候选点已被选中过，则跳过
-                if candidate_idx in pivots_indices:
-                    continue
-
-                # 假设当前候选点加入支撑点集合
-                current_pivot_indices = pivots_indices + [candidate_idx]
-                current_pivot_set = [data[i] for i in current_pivot_indices]
-
-                # 计算候选点的评价值
-                value = self.objective_function(
-                    evaluation_set, 
-                    self.distance_function, 
-                    current_pivot_set
-                )
-
-                # 更新最佳点
-                if value > best_value:
-                    best_value = value
-                    best_index = candidate_idx
-
-            # 将最佳点加入支撑点集合
-            if best_index is not None:
-                pivots_indices.append(best_index)
+        chosen = np.zeros(len(candidate_set), dtype=bool)
+
+        # 候选点足够多时，把候选距离矩阵与点对距离放入共享内存，由进程池并行评估
+        # 进程池只在本次选择中使用，选择结束时关闭，工作进程连接的共享内存随之释放
+        shared = None
+        pool = None
+        if self.workers > 1 and len(candidate_set) * len(pair_i) >= PARALLEL_MIN_WORK:
+            shared = [share_array(candidate_distances), share_array(pair_linf)]
+
+        try:
+            if shared is not None:
+                pool = ProcessPoolExecutor(max_workers=self.workers)
+            # 迭代选择支撑点
+            for _ in range(pivots_num):
+                positions = np.flatnonzero(~chosen)
+                if len(positions) == 0:
+                    break
+
+                # 评估每个候选点
+                if shared is None:
+                    values = _candidate_values(self.objective_function, candidate_distances, pair_linf,
+                                               pair_i, pair_j, positions)
+                else:
+                    shared[1][1][...] = pair_linf
+                    values = self._parallel_candidate_values(pool, shared, positions)
+
+                # 选择评价值最大的候选点（评价值相同时取候选集合中靠前者）
+                best_position = int(positions[int(np.argmax(values))])
+                column = candidate_distances[best_position]
+
+                # 将最佳点加入支撑点集合，并更新点对距离
+                pivots_indices.append(candidate_set[best_position])
+                chosen[best_position] = True
+                pair_linf = np.maximum(pair_linf, np.abs(column[pair_i] - column[pair_j]))
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True, cancel_futures=True)
+            if shared is not None:
+                # 先释放数组视图再关闭共享内存
+                shms = [shm for shm, _, _ in shared]
+                shared = None
+                for shm in shms:
+                    release_array(shm)
 
         if len(pivots_indices) != pivots_num:
             print(data)
             raise ValueError(f"在{node_name}中，IncrementalSamplingSelection设定半径过大，未选择足够支撑点，数据量为{len(data)}，所需支撑点数量为{pivots_num}，实际选择数量为{len(pivots_indices)}，候选集大小为{len(candidate_set)}")
         # 构造剩余数据
-        remaining_indices = [i for i in range(len(data)) if i not in pivots_indices]
-        pivots = [data[i] for i in pivots_indices]
-        remaining_data = [data[i] for i in remaining_indices]
-        return pivots, remaining_data
+        return subset(data, pivots_indices), subset(data, complement_indices(len(data), pivots_indices))
+
+    def _parallel_candidate_values(self, pool, shared, positions) -> np.ndarray:
+        """
+        把候选点按顺序切分给进程池评估，结果按原顺序拼接，与顺序评估完全一致
+        :param pool: 本次选择使用的进程池
+        :param shared: [(SharedMemory, 数组视图, 描述)]，依次为候选距离矩阵与当前点对距离
+        :param positions: 待评估候选点在候选集合中的位置
+        """
+        specs = [spec for _, _, spec in shared]
+        chunks = [chunk for chunk in np.array_split(positions, self.workers) if len(chunk) > 0]
+        futures = [pool.submit(_candidate_values_worker, self.objective_function, specs, chunk)
+                   for chunk in chunks]
+        return np.concatenate([future.result() for future in futures])
+
+
+def _candidate_values(objective_function, candidate_distances, pair_linf, pair_i, pair_j, positions) -> np.ndarray:
+    """
+    计算候选点加入支撑点集合后的评价值
+    点对在新支撑点空间中的切比雪夫距离为已选支撑点下的距离与候选点一维距离差的较大者
+    :return: 与 positions 对应的评价值数组
+    """
+    m = candidate_distances.shape[1]
+    values = np.empty(len(positions))
+    for n, position in enumerate(positions):
+        column = candidate_distances[position]
+        values[n] = objective_function.evaluate_pairs(np.maximum(pair_linf, np.abs(column[pair_i] - column[pair_j])), m)
+    return values
+
+
+def _candidate_values_worker(objective_function, specs, positions) -> np.ndarray:
+    """进程池中的评估任务：连接共享内存后调用 _candidate_values"""
+    candidate_distances, pair_linf = attach_arrays(*specs)
+    pair_i, pair_j = np.triu_indices(candidate_distances.shape[1], 1)
+    return _candidate_values(objective_function, candidate_distances, pair_linf, pair_i, pair_j, positions)
@@ -1,10 +1,11 @@
-from Algorithm.SelectorCore import PivotSelector
+from Algorithm.SelectorCore import PivotSelector, complement_indices
+from Core.Data.VectorDataset import subset
 
 
 class ManualPivotSelector(PivotSelector):
     def select(self, data: list, k: int, node_name: str = "") -> tuple[list, list]:
         if k >= len(data):
-            return list(data), None
+            return subset(data, range(len(data))), None
         if node_name:
             print(f"\n=== 为节点 '{node_name}' 选择支撑点 ===")
         else:
@@ -24,8 +25,6 @@ class ManualPivotSelector(PivotSelector):
                 if any(i < 0 or i >= len(data) for i in indices):
                     print("存在超出数据范围的索引，请重新输入。")
                     continue
-                pivots = [data[i] for i in indices]
-                remaining = [data[i] for i in range(len(data)) if i not in indices]
-                return pivots, remaining
+                return subset(data, indices), subset(data, complement_indices(len(data), indices))
             except Exception as e:
                 print(f"输入错误：{e}，请重新输入。")
@@ -1,6 +1,7 @@
 import numpy as np
 import random
-from Algorithm.SelectorCore import PivotSelector
+from Algorithm.SelectorCore import PivotSelector, complement_indices
+from Core.Data.VectorDataset import subset
 
 
 class MaxVariancePivotSelector(PivotSelector):
@@ -17,42 +18,61 @@ class MaxVariancePivotSelector(PivotSelector):
         :param index: 是否返回索引
         :return: (pivots, remaining): 选择的支撑点列表和剩余数据点列表，或索引
         """
-        if k >= len(data):
-            if index:
-                return list(range(len(data))), []
-            return list(data), []
+        pivot_indices, rest_indices, _ = self._select_indices(data, k, full_columns=False)
+        if index:
+            return pivot_indices, rest_indices
+        return subset(data, pivot_indices), subset(data, rest_indices)
+
+    def select_with_distances(self, data, k: int, node_name: str = "") -> tuple:
+        """
+        选择支撑点，并返回选择过程中累积的距离列（补齐最后一个支撑点的一列）
+        :return: (pivots, remaining_data, distances)，distances 形状为 (len(pivots), len(remaining_data))
+        """
+        if k < 1:
+            return super().select_with_distances(data, k, node_name)
+        pivot_indices, rest_indices, columns = self._select_indices(data, k, full_columns=True)
+        distances = np.ascontiguousarray(columns[rest_indices].T)
+        return subset(data, pivot_indices), subset(data, rest_indices), distances
+
+    def _select_indices(self, data, k: int, full_columns: bool) -> tuple:
+        """
+        最大方差选择的主过程
+        columns 为 (n, k) 的距离矩阵，第 j 列为各数据点到第 j 个支撑点的距离，每轮只计算最新支撑点的一列；
+        各点到已选支撑点距离的方差用 Welford 方法随列的加入增量更新
+        :param full_columns: 是否为最后一个支撑点也计算一列距离
+        :return: (支撑点下标, 剩余数据下标, columns)
+        """
+        n = len(data)
+        if k >= n:
+            return list(range(n)), [], np.empty((n, n))
+
         # 随机选择第一个支撑点的索引
-        pivot_indices = [random.randint(0, len(data)-1)]
-        pivots = [data[pivot_indices[0]]]
+        pivot_indices = [random.randint(0, n - 1)]
+        selected = np.zeros(n, dtype=bool)
+        selected[pivot_indices[0]] = True
+
+        columns = np.zeros((n, k))
+        mean = np.zeros(n)
+        m2 = np.zeros(n)
 
         # 迭代选择剩余的支撑点
-        for _ in range(1, k):
-            # 收集未选择的数据点及其索引
-            candidates = []
-            candidate_indices = []
-            for i, x in enumerate(data):
-                if i not in pivot_indices:
-                    candidates.append(x)
-                    candidate_indices.append(i)
-
-            # 计算每个候选点到当前支撑点集合的距离
-            distances = []
-            for x in candidates:
-                dist_to_pivots = [self.distance_function.compute(x, pivot) for pivot in pivots]
-                distances.append(dist_to_pivots)
-
-            # 计算方差并选择最大方差的点
-            distances_np = np.array(distances)
-            variances = distances_np.var(axis=1)
-            max_var_idx = np.argmax(variances)
-
-            # 添加选中的点及其索引
-            selected_idx = candidate_indices[max_var_idx]
+        for j in range(k if full_columns else k - 1):
+            # 计算未选择的数据点到最新支撑点的距离，并更新均值与平方差和
+            candidates = np.flatnonzero(~selected)
+            column = self.distance_function.compute_many(data[pivot_indices[j]], subset(data, candidates))
+            columns[candidates, j] = column
+            delta = column - mean[candidates]
+            mean[candidates] += delta / (j + 1)
+            m2[candidates] += delta * (column - mean[candidates])
+
+            if j == k - 1:
+                break
+
+            # 选择方差最大的点（方差相同时取下标最小者）
+            variances = m2[candidates] / (j + 1)
+            selected_idx = int(candidates[np.argmax(variances)])
             pivot_indices.append(selected_idx)
-            pivots.append(data[selected_idx])
+            selected[selected_idx] = True
 
-        if index:
-            remaining_indices = [i for i in range(len(data)) if i not in pivot_indices]
-            return pivot_indices, remaining_indices
-        remaining = [x for i, x in enumerate(data) if i not in pivot_indices]
-        return pivots, remaining
\ No newline at end of file
+        rest_indices = complement_indices(n, pivot_indices)
+        return pivot_indices, rest_indices, columns
@@ -1,5 +1,6 @@
 import random
-from Algorithm.SelectorCore import PivotSelector
+from Algorithm.SelectorCore import PivotSelector, complement_indices
+from Core.Data.VectorDataset import subset
 
 
 class RandomPivotSelector(PivotSelector):
@@ -11,12 +12,10 @@ class RandomPivotSelector(PivotSelector):
         if k >= len(data):
             if index:
                 return list(range(len(data))), []
-            return list(data), []
+            return subset(data, range(len(data))), subset(data, [])
         # 随机选择k个支撑点（可能包含重复）
         pivot_indices = random.sample(range(len(data)), k)
-        pivots = [data[i] for i in pivot_indices]
+        rest_indices = complement_indices(len(data), pivot_indices)
         if index:
-            remaining_indices = [i for i in range(len(data)) if i not in pivot_indices]
-            return pivot_indices, remaining_indices
-        remaining = [x for i, x in enumerate(data) if i not in pivot_indices]
-        return pivots, remaining
+            return pivot_indices, rest_indices
+        return subset(data, pivot_indices), subset(data, rest_indices)
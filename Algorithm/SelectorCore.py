@@ -1,9 +1,32 @@
+import numpy as np
+
+
 class PivotSelector:
     def select(self, data: list, k: int, node_name: str = "") -> tuple[list, list]:
         """
         从 data 中选择 k 个支撑点并返回 (pivots, remaining_data)
-        :param data: 数据列表
+        :param data: 数据列表或 VectorDataset
         :param k: 需要选择的支撑点数量
         :param node_name: 当前节点名字（可选）
         """
         raise NotImplementedError
+
+    def select_with_distances(self, data, k: int, node_name: str = "") -> tuple:
+        """
+        选择支撑点，若选择过程中已经算出了支撑点到剩余数据的距离，则一并返回，避免调用方重复计算
+        :return: (pivots, remaining_data, distances)，distances 形状为 (len(pivots), len(remaining_data))，
+                 选择器没有计算这些距离时为 None
+        """
+        pivots, remaining_data = self.select(data, k, node_name)
+        return pivots, remaining_data, None
+
+
+def complement_indices(n: int, selected) -> list:
+    """
+    用布尔掩码求出 0..n-1 中未被选中的下标（保持升序）
+    :param n: 数据量
+    :param selected: 已选中的下标
+    """
+    mask = np.ones(n, dtype=bool)
+    mask[list(selected)] = False
+    return np.flatnonzero(mask).tolist()
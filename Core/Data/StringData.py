@@ -1,15 +1,35 @@
+import numpy as np
+
 from Core.MetricSpaceCore import MetricSpaceData
 
 
 class StringData(MetricSpaceData):
-    def __init__(self, value: str):
+    def __init__(self, value: str, id: int = None):
         if not isinstance(value, str):
             raise TypeError("StringData only support str type data")
         self.value = value
+        self.id = id  # 在所属数据集中的编号（可选）
+        self._codes = None  # 编码结果缓存：(编码表, uint8 编码数组)
 
     def get(self):
         return self.value
 
+    def encode(self, lookup: np.ndarray) -> np.ndarray:
+        """
+        按编码表把字符串编码为 uint8 数组，结果缓存在对象上，同一编码表只编码一次
+        :param lookup: 长度为 256 的 uint8 数组，lookup[字节] 为该字符的编码
+        :return: 形状为 (len(value),) 的 uint8 数组
+        """
+        if self._codes is not None and self._codes[0] is lookup:
+            return self._codes[1]
+        try:
+            raw = np.frombuffer(self.value.encode("latin-1"), dtype=np.uint8)
+        except UnicodeEncodeError:
+            raise ValueError(f"StringData {self.value!r} contains characters outside latin-1") from None
+        codes = lookup[raw]
+        self._codes = (lookup, codes)
+        return codes
+
     def __len__(self):
         return len(self.value)
 
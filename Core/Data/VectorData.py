@@ -3,10 +3,11 @@ from Core.MetricSpaceCore import MetricSpaceData
 
 
 class VectorData(MetricSpaceData):
-    def __init__(self, vector: np.ndarray):
+    def __init__(self, vector: np.ndarray, id: int = None):
         if not isinstance(vector, np.ndarray):
             raise TypeError("VectorData only supports numpy.ndarray")
         self.vector = vector
+        self.id = id  # 在所属数据集中的编号（可选）
 
     def get(self):
         return self.vector
@@ -0,0 +1,99 @@
+from collections.abc import Sequence
+
+import numpy as np
+from Core.Data.VectorData import VectorData
+
+
+class VectorDataset(Sequence):
+    """
+    基于一块连续二维 ndarray 的向量数据集
+    每一行是一个向量，ids[i] 为第 i 行在原始数据集中的整数编号。
+    按整数下标访问时返回共享内存的 VectorData 视图，按切片或下标数组访问时返回新的 VectorDataset，
+    因此可以直接替换原来的 VectorData 列表使用。
+    """
+
+    def __init__(self, vectors: np.ndarray, ids: np.ndarray = None):
+        """
+        :param vectors: 形状为 (n, dim) 的数组
+        :param ids: 每个向量的整数编号，默认为 0..n-1
+        """
+        vectors = np.asarray(vectors)
+        if vectors.ndim != 2:
+            raise ValueError(f"VectorDataset only supports 2-D array, got shape {vectors.shape}")
+        if vectors.dtype != np.float32 and vectors.dtype != np.float64:
+            vectors = vectors.astype(np.float64)
+        self.vectors = np.ascontiguousarray(vectors)
+
+        if ids is None:
+            ids = np.arange(len(vectors), dtype=np.int64)
+        else:
+            ids = np.asarray(ids, dtype=np.int64)
+            if ids.shape != (len(vectors),):
+                raise ValueError(f"Number of ids ({ids.size}) does not match number of vectors ({len(vectors)})")
+        self.ids = ids
+
+    @classmethod
+    def from_list(cls, data):
+        """由 VectorData 列表构造数据集，保留其中已有的编号"""
+        if len(data) == 0:
+            return cls(np.empty((0, 0)))
+        ids = [obj.id for obj in data]
+        if any(i is None for i in ids):
+            ids = None
+        return cls(np.stack([obj.get() for obj in data]), ids)
+
+    def get(self):
+        """返回底层 (n, dim) 数组"""
+        return self.vectors
+
+    def get_ids(self):
+        return self.ids
+
+    @property
+    def dim(self):
+        return self.vectors.shape[1]
+
+    def take(self, indices):
+        """按位置下标（数组、切片或布尔掩码）取子数据集"""
+        if not isinstance(indices, slice):
+            indices = np.asarray(indices)
+            if indices.dtype != bool:
+                indices = indices.astype(np.int64, copy=False)
+        return VectorDataset(self.vectors[indices], self.ids[indices])
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            return VectorData(self.vectors[key], int(self.ids[key]))
+        return self.take(key)
+
+    def __iter__(self):
+        for i in range(len(self.vectors)):
+            yield VectorData(self.vectors[i], int(self.ids[i]))
+
+    def __repr__(self):
+        return f'VectorDataset(n={len(self)}, dim={self.vectors.shape[1]}, dtype={self.vectors.dtype})'
+
+
+def subset(data, indices):
+    """
+    按位置下标从数据集中取子集
+    VectorDataset 返回共享 ids 的 VectorDataset，其余序列返回列表
+    :param data: VectorDataset 或对象列表
+    :param indices: 位置下标序列
+    """
+    if isinstance(data, VectorDataset):
+        return data.take(np.asarray(indices, dtype=np.int64))
+    return [data[i] for i in indices]
+
+
+def get_ids(data) -> np.ndarray:
+    """
+    取数据集中每个对象的整数编号
+    VectorDataset 直接返回 ids，对象列表读取每个对象的 id 属性，没有编号的对象记为 -1
+    """
+    if isinstance(data, VectorDataset):
+        return data.get_ids()
+    return np.array([-1 if getattr(obj, "id", None) is None else obj.id for obj in data], dtype=np.int64)
@@ -0,0 +1,62 @@
+import numpy as np
+
+from Core.MetricSpaceCore import DistanceFunction, MetricSpaceData
+
+
+class CountingDistance(DistanceFunction):
+    """
+    统计距离计算次数的距离函数包装器
+    所有计算委托给被包装的距离函数，count 累计计算过的距离个数（一对多、矩阵计算按元素个数累计）
+    """
+
+    def __init__(self, distance_function: DistanceFunction):
+        self.distance_function = distance_function
+        self.count = 0
+
+    def reset(self) -> int:
+        """清零计数，返回清零前的值"""
+        count, self.count = self.count, 0
+        return count
+
+    def clear(self):
+        """清零全部统计，例如工作进程中单独统计前清掉从主进程继承的值"""
+        self.count = 0
+
+    def snapshot(self) -> dict:
+        """当前统计的可序列化副本，用于把工作进程中的统计合并回主进程"""
+        return {"count": self.count}
+
+    def merge(self, snapshot: dict):
+        """累加 snapshot 给出的统计"""
+        self.count += snapshot["count"]
+
+    def compute(self, x: MetricSpaceData, y: MetricSpaceData) -> float:
+        self.count += 1
+        return self.distance_function.compute(x, y)
+
+    def compute_bounded(self, x: MetricSpaceData, y: MetricSpaceData, limit: float) -> float:
+        self.count += 1
+        return self.distance_function.compute_bounded(x, y, limit)
+
+    def compute_many(self, query: MetricSpaceData, objects) -> np.ndarray:
+        self.count += len(objects)
+        return self.distance_function.compute_many(query, objects)
+
+    def compute_many_bounded(self, query: MetricSpaceData, objects, limit: float) -> np.ndarray:
+        self.count += len(objects)
+        return self.distance_function.compute_many_bounded(query, objects, limit)
+
+    def compute_pairs(self, A, B) -> np.ndarray:
+        self.count += len(A)
+        return self.distance_function.compute_pairs(A, B)
+
+    def compute_pairs_bounded(self, A, B, limit: float) -> np.ndarray:
+        self.count += len(A)
+        return self.distance_function.compute_pairs_bounded(A, B, limit)
+
+    def compute_matrix(self, A, B) -> np.ndarray:
+        self.count += len(A) * len(B)
+        return self.distance_function.compute_matrix(A, B)
+
+    def __repr__(self):
+        return f'CountingDistance({self.distance_function!r}, count={self.count})'
@@ -1,5 +1,6 @@
 import numpy as np
 from Core.MetricSpaceCore import MetricSpaceData, DistanceFunction
+from Core.Data.VectorDataset import VectorDataset
 
 
 class MinkowskiDistance(DistanceFunction):
@@ -17,3 +18,46 @@ class MinkowskiDistance(DistanceFunction):
             return np.max(np.abs(v1 - v2))
         else:
             return np.sum(np.abs(v1 - v2) ** self.t) ** (1 / self.t)
+
+    def compute_many(self, query: MetricSpaceData, objects) -> np.ndarray:
+        """将 objects 堆叠为二维数组后一次性计算 query 到所有对象的距离"""
+        if len(objects) == 0:
+            return np.empty(0, dtype=float)
+        return self._norm(np.abs(_stack_vectors(objects) - query.get()))
+
+    def compute_pairs(self, A, B) -> np.ndarray:
+        """两组向量逐行相减后一次性计算"""
+        if len(A) == 0:
+            return np.empty(0, dtype=float)
+        return self._norm(np.abs(_stack_vectors(A) - _stack_vectors(B)))
+
+    def compute_matrix(self, A, B) -> np.ndarray:
+        if len(A) == 0 or len(B) == 0:
+            return np.empty((len(A), len(B)), dtype=float)
+        vectors_a = _stack_vectors(A)
+        vectors_b = _stack_vectors(B)
+        # 沿较短的一边逐行计算，避免 (|A|, |B|, dim) 的三维中间数组占用过多内存；
+        # 批量查询时 A 为大量查询、B 为少量支撑点，按列计算只需 |B| 次循环
+        if len(vectors_a) > len(vectors_b):
+            return self.compute_matrix(vectors_b, vectors_a).T.copy()
+        matrix = np.empty((len(A), len(B)), dtype=float)
+        for i, a in enumerate(vectors_a):
+            matrix[i] = self._norm(np.abs(vectors_b - a))
+        return matrix
+
+    def _norm(self, diff: np.ndarray) -> np.ndarray:
+        """对 (n, dim) 的差的绝对值逐行求 t 范数"""
+        if self.t == float('inf'):
+            return np.max(diff, axis=1).astype(float)
+        elif self.t == 1:
+            return np.sum(diff, axis=1).astype(float)
+        else:
+            return (np.sum(diff ** self.t, axis=1) ** (1 / self.t)).astype(float)
+
+def _stack_vectors(objects) -> np.ndarray:
+    """将 VectorData 集合堆叠为 (n, dim) 数组，已经是数组时直接返回"""
+    if isinstance(objects, VectorDataset):
+        return objects.get()
+    if isinstance(objects, np.ndarray):
+        return objects
+    return np.stack([obj.get() for obj in objects])
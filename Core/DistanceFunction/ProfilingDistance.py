@@ -0,0 +1,166 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import numpy as np
+
+from Core.MetricSpaceCore import DistanceFunction, MetricSpaceData
+from Core.DistanceFunction.CountingDistance import CountingDistance
+
+# 距离计算的调用位置：支撑点选择、索引构建（划分与叶子距离表）、查询中的剪枝计算、叶子中候选对象的验证、其他
+DISTANCE_SITES = ("selector", "builder", "search", "verification", "other")
+
+# 当前线程（上下文）所处的调用位置
+_current_site = ContextVar("distance_site", default="other")
+
+# 处于开启状态的 ProfilingDistance 个数，为 0 时 distance_site 不做任何事；修改时持有 _active_lock
+_active_profilers = 0
+_active_lock = threading.RLock()
+
+
+def _add_active(delta: int):
+    global _active_profilers
+    with _active_lock:
+        _active_profilers += delta
+
+
+@contextmanager
+def distance_site(site: str):
+    """把 with 块中的距离计算归到 site 调用位置，没有开启的 ProfilingDistance 时不做任何事"""
+    if not _active_profilers:
+        yield
+        return
+    token = _current_site.set(site)
+    try:
+        yield
+    finally:
+        _current_site.reset(token)
+
+
+class ProfilingDistance(CountingDistance):
+    """
+    按调用位置统计距离计算次数与累计耗时的距离函数包装器
+    调用位置由 distance_site 标记（见 DISTANCE_SITES），未标记的计算归入 "other"；
+    count 与 CountingDistance 相同，始终累计；关闭时不计时、不区分调用位置，只比 CountingDistance 多一次加锁。
+    各线程的调用位置相互独立，count 与各调用位置的统计都在锁内累加；工作进程中的统计通过 snapshot / merge 合并回主进程
+    """
+
+    def __init__(self, distance_function: DistanceFunction, enabled: bool = True):
+        super().__init__(distance_function)
+        self.enabled = False
+        self.counts = dict.fromkeys(DISTANCE_SITES, 0)
+        self.times = dict.fromkeys(DISTANCE_SITES, 0.0)
+        self._lock = threading.Lock()
+        if enabled:
+            self.enable()
+
+    def enable(self):
+        """开始按调用位置统计"""
+        with _active_lock:
+            if not self.enabled:
+                self.enabled = True
+                _add_active(1)
+
+    def disable(self):
+        """停止按调用位置统计，已有统计保留"""
+        with _active_lock:
+            if self.enabled:
+                self.enabled = False
+                _add_active(-1)
+
+    def clear(self):
+        with self._lock:
+            self.count = 0
+            self.counts = dict.fromkeys(DISTANCE_SITES, 0)
+            self.times = dict.fromkeys(DISTANCE_SITES, 0.0)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"count": self.count, "counts": dict(self.counts), "times": dict(self.times)}
+
+    def merge(self, snapshot: dict):
+        with self._lock:
+            self.count += snapshot["count"]
+            for site, count in snapshot.get("counts", {}).items():
+                self.counts[site] = self.counts.get(site, 0) + count
+            for site, seconds in snapshot.get("times", {}).items():
+                self.times[site] = self.times.get(site, 0.0) + seconds
+
+    def profile(self) -> dict:
+        """
+        :return: {调用位置: {"count": 距离计算次数, "time": 累计耗时（秒）}}，只包含有计算的调用位置
+        """
+        with self._lock:
+            return {site: {"count": count, "time": self.times.get(site, 0.0)}
+                    for site, count in self.counts.items() if count > 0}
+
+    def profile_fields(self) -> dict:
+        """
+        按调用位置展开的统计字段，便于写入结构化统计结果
+        :return: {"distance_<调用位置>_count": 次数, "distance_<调用位置>_time": 累计耗时（秒）}，包含 DISTANCE_SITES 中的全部位置
+        """
+        profile = self.profile()
+        fields = {}
+        for site in DISTANCE_SITES:
+            entry = profile.get(site, {"count": 0, "time": 0.0})
+            fields[f"distance_{site}_count"] = entry["count"]
+            fields[f"distance_{site}_time"] = entry["time"]
+        return fields
+
+    def _call(self, n: int, method, *args):
+        if not self.enabled:
+            result = method(*args)
+            with self._lock:
+                self.count += n
+            return result
+        start = time.perf_counter()
+        result = method(*args)
+        seconds = time.perf_counter() - start
+        site = _current_site.get()
+        with self._lock:
+            self.count += n
+            self.counts[site] = self.counts.get(site, 0) + n
+            self.times[site] = self.times.get(site, 0.0) + seconds
+        return result
+
+    def compute(self, x: MetricSpaceData, y: MetricSpaceData) -> float:
+        return self._call(1, self.distance_function.compute, x, y)
+
+    def compute_bounded(self, x: MetricSpaceData, y: MetricSpaceData, limit: float) -> float:
+        return self._call(1, self.distance_function.compute_bounded, x, y, limit)
+
+    def compute_many(self, query: MetricSpaceData, objects) -> np.ndarray:
+        return self._call(len(objects), self.distance_function.compute_many, query, objects)
+
+    def compute_many_bounded(self, query: MetricSpaceData, objects, limit: float) -> np.ndarray:
+        return self._call(len(objects), self.distance_function.compute_many_bounded, query, objects, limit)
+
+    def compute_pairs(self, A, B) -> np.ndarray:
+        return self._call(len(A), self.distance_function.compute_pairs, A, B)
+
+    def compute_pairs_bounded(self, A, B, limit: float) -> np.ndarray:
+        return self._call(len(A), self.distance_function.compute_pairs_bounded, A, B, limit)
+
+    def compute_matrix(self, A, B) -> np.ndarray:
+        return self._call(len(A) * len(B), self.distance_function.compute_matrix, A, B)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        # 反序列化得到的副本（例如 spawn 方式的工作进程中）同样处于开启状态，被回收时由 __del__ 扣除
+        if self.enabled:
+            _add_active(1)
+
+    def __del__(self):
+        # 开启状态的实例（包括反序列化得到的副本）被回收后不再计入开启个数
+        if getattr(self, "enabled", False):
+            self.disable()
+
+    def __repr__(self):
+        return f'ProfilingDistance({self.distance_function!r}, count={self.count}, enabled={self.enabled})'
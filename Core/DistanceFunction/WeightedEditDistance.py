@@ -1,10 +1,17 @@
+import numpy as np
+
 from Core.MetricSpaceCore import DistanceFunction
 from Core.Data.StringData import StringData
 
+# 编码表中未出现在打分矩阵里的字符的编码
+UNKNOWN_CODE = 255
+
 
 class WeightedEditDistance(DistanceFunction):
     """
     加权编辑距离，根据输入打分矩阵 + gap penalty 表进行动态规划计算
+    打分矩阵在初始化时编译为稠密的 NumPy 代价矩阵，字符串编码为 uint8 数组（缓存在 StringData 上），
+    动态规划按反对角线向量化：同一条反对角线上的单元格只依赖前两条反对角线，可以整体计算。
     """
 
     def __init__(self, score_matrix: dict):
@@ -15,38 +22,116 @@ class WeightedEditDistance(DistanceFunction):
         if 'gap' not in score_matrix or any('gap' not in row for row in score_matrix.values()):
             raise ValueError("score_matrix must include 'gap' row and column for insert/delete operation")
 
+        # 字母表：出现在打分矩阵行或列中的所有单字符符号，gap 的编码排在最后
+        symbols = sorted({a for a in score_matrix if a != 'gap'} |
+                         {b for row in score_matrix.values() for b in row if b != 'gap'})
+        if any(len(a) != 1 or ord(a) > 255 for a in symbols) or len(symbols) >= UNKNOWN_CODE:
+            raise ValueError("score_matrix symbols must be single latin-1 characters")
+        self.symbols = symbols
+        self.gap_code = len(symbols)
+        codes = {a: i for i, a in enumerate(symbols)}
+        codes['gap'] = self.gap_code
+
+        self.lookup = np.full(256, UNKNOWN_CODE, dtype=np.uint8)
+        for a, i in codes.items():
+            if a != 'gap':
+                self.lookup[ord(a)] = i
+
+        # 稠密代价矩阵，打分矩阵中缺失的组合记为 NaN，计算时用到则报错
+        self.cost = np.full((len(codes), len(codes)), np.nan)
+        for a, row in score_matrix.items():
+            for b, v in row.items():
+                self.cost[codes[a], codes[b]] = v
+
+        # 带上限计算依赖代价非负（动态规划值沿路径单调不减）以及最小插入/删除代价（决定对角带宽度）
+        defined = self.cost[~np.isnan(self.cost)]
+        self._nonnegative = bool((defined >= 0).all())
+        gap_costs = np.concatenate([self.cost[:-1, -1], self.cost[-1, :-1]])
+        gap_costs = gap_costs[~np.isnan(gap_costs)]
+        self._min_gap = float(gap_costs.min()) if len(gap_costs) > 0 else 0.0
+
     def compute(self, x: StringData, y: StringData) -> float:
         if not isinstance(x, StringData) or not isinstance(y, StringData):
             raise TypeError("WeightedEditDistance only support StringData type input")
+        return self._diagonal_dp(self._encode(x), self._encode(y))
+
+    def compute_bounded(self, x: StringData, y: StringData, limit: float) -> float:
+        """
+        带上限的加权编辑距离
+        偏离主对角线 d 格的单元格代价至少为 d * 最小插入/删除代价，因此只需计算宽度为 limit / 最小代价 的对角带（Ukkonen）；
+        任何路径都会经过相邻两条反对角线之一，两者带内最小值都超过 limit 时提前结束，返回该最小值；
+        limit 为无穷大（例如 kNN 查询结果不足 k 个时）时与 compute 相同
+        """
+        if not isinstance(x, StringData) or not isinstance(y, StringData):
+            raise TypeError("WeightedEditDistance only support StringData type input")
+        a, b = self._encode(x), self._encode(y)
+        if not self._nonnegative or not np.isfinite(limit):
+            return self._diagonal_dp(a, b)
+
+        m, n = len(a), len(b)
+        band = int(limit // self._min_gap) if self._min_gap > 0 else max(m, n)
+        if abs(m - n) > band:
+            return float(abs(m - n) * self._min_gap)
+        return self._diagonal_dp(a, b, limit, band)
+
+    def _encode(self, x: StringData) -> np.ndarray:
+        codes = x.encode(self.lookup)
+        if len(codes) > 0 and codes.max() == UNKNOWN_CODE:
+            bad = x.get()[int(np.argmax(codes == UNKNOWN_CODE))]
+            raise ValueError(f"score_matrix don't have symbol {bad}!")
+        return codes
+
+    def _diagonal_dp(self, a: np.ndarray, b: np.ndarray, limit: float = np.inf, band: int = None) -> float:
+        """
+        反对角线向量化的动态规划
+        反对角线 s 上的单元格 (i, s - i) 以行号 i 为下标保存在长度 m + 1 的数组中，带外单元格为无穷大
+        :param a: 第一个字符串的编码（行）
+        :param b: 第二个字符串的编码（列）
+        :param limit: 距离上限，相邻两条反对角线的最小值都超过 limit 时提前结束
+        :param band: 对角带宽度，只计算 |i - j| <= band 的单元格；None 表示计算全部单元格
+        :return: 加权编辑距离（提前结束时为大于 limit 的值）
+        """
+        m, n = len(a), len(b)
+        cost, gap = self.cost, self.gap_code
+        delete = cost[a, gap]                  # 删除 a[i-1] 的代价
+        insert_rev = cost[gap, b][::-1]        # 插入 b[j-1] 的代价（逆序，便于按行号切片）
+        b_rev = b[::-1]
+        first_col = np.concatenate([[0.0], np.cumsum(delete)])           # D[i][0]
+        first_row = np.concatenate([[0.0], np.cumsum(cost[gap, b])])     # D[0][j]
+        if band is None:
+            band = m + n
+
+        prev2 = np.full(m + 1, np.inf)
+        prev1 = np.full(m + 1, np.inf)
+        prev1[0] = 0.0
+        prev_min = 0.0
+        for s in range(1, m + n + 1):
+            curr = np.full(m + 1, np.inf)
+            lo = max(0, s - n, (s - band + 1) // 2)
+            hi = min(m, s, (s + band) // 2)
+            # 内部单元格 1 <= i <= s - 1
+            i0, i1 = max(lo, 1), min(hi, s - 1)
+            if i0 <= i1:
+                k0, k1 = n - s + i0, n - s + i1 + 1  # 对应 b_rev / insert_rev 中 j - 1 的位置
+                match = prev2[i0 - 1:i1] + cost[a[i0 - 1:i1], b_rev[k0:k1]]
+                np.minimum(match, prev1[i0 - 1:i1] + delete[i0 - 1:i1], out=match)
+                np.minimum(match, prev1[i0:i1 + 1] + insert_rev[k0:k1], out=match)
+                curr[i0:i1 + 1] = match
+            # 边界单元格 (0, s) 与 (s, 0)
+            if lo == 0:
+                curr[0] = first_row[s]
+            if hi == s:
+                curr[s] = first_col[s]
+
+            curr_min = curr[lo:hi + 1].min() if lo <= hi else np.inf
+            if min(prev_min, curr_min) > limit:
+                return float(min(prev_min, curr_min))
+            prev2, prev1, prev_min = prev1, curr, curr_min
 
-        s1, s2 = x.get(), y.get()
-        m, n = len(s1), len(s2)
-        dp = [[0] * (n + 1) for _ in range(m + 1)]
-
-        # 初始化：第一列 (j=0)，表示将 s1[:i] 与空串匹配
-        for i in range(1, m + 1):
-            dp[i][0] = dp[i - 1][0] + self._score(s1[i - 1], 'gap')
-
-        # 初始化：第一行 (i=0)，表示将 s2[:j] 与空串匹配
-        for j in range(1, n + 1):
-            dp[0][j] = dp[0][j - 1] + self._score('gap', s2[j - 1])
-
-        # 动态规划主过程
-        for i in range(1, m + 1):
-            for j in range(1, n + 1):
-                match = dp[i - 1][j - 1] + self._score(s1[i - 1], s2[j - 1])  # 替换
-                delete = dp[i - 1][j] + self._score(s1[i - 1], 'gap')        # 删除 s1[i-1]
-                insert = dp[i][j - 1] + self._score('gap', s2[j - 1])        # 插入 s2[j-1]
-                dp[i][j] = min(match, delete, insert)
-
-        return float(dp[m][n])
-
-    def _score(self, a: str, b: str) -> float:
-        """安全获取 a→b 的得分"""
-        if a in self.score_matrix and b in self.score_matrix[a]:
-            return self.score_matrix[a][b]
-        else:
-            raise ValueError(f"score_matrix don't have symbol {a} or {b}!")
+        result = prev1[m] if m + n > 0 else 0.0
+        if np.isnan(result):
+            raise ValueError("score_matrix don't have some symbol pair used by the input strings!")
+        return float(result)
 
 
 # 用法示例
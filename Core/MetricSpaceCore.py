@@ -43,3 +43,58 @@ class DistanceFunction(ABC):
         """计算两个度量空间数据之间的距离"""
         pass
 
+    def compute_bounded(self, x: MetricSpaceData, y: MetricSpaceData, limit: float) -> float:
+        """
+        带上限的距离计算，用于只需判断 d(x, y) <= limit 的场合（例如范围查询的验证）
+        真实距离不超过 limit 时返回真实距离；否则返回某个大于 limit 的值，计算可以提前结束
+        默认直接调用 compute，子类可提供更快的实现
+        """
+        return self.compute(x, y)
+
+    def compute_many_bounded(self, query: MetricSpaceData, objects, limit: float) -> np.ndarray:
+        """
+        compute_bounded 的一对多版本
+        :return: 形状为 (len(objects),) 的数组，大于 limit 的元素只保证真实距离大于 limit
+        """
+        if type(self).compute_bounded is DistanceFunction.compute_bounded:
+            return self.compute_many(query, objects)
+        return np.array([self.compute_bounded(query, obj, limit) for obj in objects], dtype=float)
+
+    def compute_many(self, query: MetricSpaceData, objects) -> np.ndarray:
+        """
+        计算一个对象到一组对象的距离（一对多）
+        默认逐对调用 compute，子类可提供向量化实现
+        :param query: 查询对象
+        :param objects: 对象集合
+        :return: 形状为 (len(objects),) 的距离数组
+        """
+        return np.array([self.compute(query, obj) for obj in objects], dtype=float)
+
+    def compute_pairs(self, A, B) -> np.ndarray:
+        """
+        逐对计算两组等长对象的距离 d(A[i], B[i])，用于批量查询中按 (查询, 对象) 对进行的验证
+        默认逐对调用 compute，子类可提供向量化实现
+        :return: 形状为 (len(A),) 的距离数组
+        """
+        return np.array([self.compute(a, b) for a, b in zip(A, B)], dtype=float)
+
+    def compute_pairs_bounded(self, A, B, limit: float) -> np.ndarray:
+        """
+        compute_bounded 的逐对版本
+        :return: 形状为 (len(A),) 的数组，大于 limit 的元素只保证真实距离大于 limit
+        """
+        if type(self).compute_bounded is DistanceFunction.compute_bounded:
+            return self.compute_pairs(A, B)
+        return np.array([self.compute_bounded(a, b, limit) for a, b in zip(A, B)], dtype=float)
+
+    def compute_matrix(self, A, B) -> np.ndarray:
+        """
+        计算两组对象之间的距离矩阵
+        :param A: 对象集合（行）
+        :param B: 对象集合（列）
+        :return: 形状为 (len(A), len(B)) 的距离矩阵
+        """
+        matrix = np.empty((len(A), len(B)), dtype=float)
+        for i, a in enumerate(A):
+            matrix[i] = self.compute_many(a, B)
+        return matrix
@@ -1,5 +1,10 @@
+import numpy as np
+
 from Core.MetricSpaceCore import MetricSpaceData, DistanceFunction
-from Index.Search.PivotTableRangeSearch import PTRangeSearch
+from Core.Data.VectorDataset import get_ids, subset
+from Index.Search.PivotTableRangeSearch import pt_range_scan, pt_batch_scan
+from Index.Search.RangeResult import RangeResult, BatchRangeResult
+from Index.Search.KnnSearch import best_first_knn
 from Index.Structure.PivotTable import PivotTable
 
 
@@ -10,36 +15,93 @@ def GHTRangeSearch(node, query_point: MetricSpaceData, distance_function: Distan
     :param query_point: 查询点对象
     :param radius: 查询半径
     :param distance_function: 距离函数对象
-    :return: (命中对象列表, 距离计算次数)
+    :return: (命中对象编号数组, 对应距离数组（包含规则命中、未计算距离的对象为 NaN）, 距离计算次数)
     """
-    distance_count = 0
+    results = RangeResult()
+    if node is not None:
+        _ght_range(node, query_point, distance_function, radius, results)
+    return results.result()
+
 
+def _ght_range(node, query_point, distance_function, radius, results: RangeResult):
+    """GH 树范围查询的递归过程，命中对象与距离计算次数加入 results"""
     # 如果当前节点是叶子节点
     if isinstance(node, PivotTable):
-        return PTRangeSearch(node, query_point, distance_function, radius)
-
-    # 初始化结果列表
-    result = []
+        pt_range_scan(node, query_point, distance_function, radius, results)
+        return
 
     # 计算 d(q, c1), d(q, c2)
-    d_q_c1 = distance_function.compute(query_point, node.c1)
-    d_q_c2 = distance_function.compute(query_point, node.c2)
-    distance_count += 2
-
-    if d_q_c1 <= radius:
-        result.append(node.c1)
-    if d_q_c2 <= radius:
-        result.append(node.c2)
+    distances = distance_function.compute_many(query_point, [node.c1, node.c2])
+    d_q_c1, d_q_c2 = distances
+    results.distance_count += 2
+    pivot_hit = distances <= radius
+    results.add(get_ids([node.c1, node.c2])[pivot_hit], distances[pivot_hit])
 
     # 剪枝判断 + 递归
     if d_q_c1 - d_q_c2 <= 2 * radius and node.left:
-        left_result, left_count = GHTRangeSearch(node.left, query_point, distance_function, radius)
-        result.extend(left_result)
-        distance_count += left_count
+        _ght_range(node.left, query_point, distance_function, radius, results)
 
     if d_q_c2 - d_q_c1 <= 2 * radius and node.right:
-        right_result, right_count = GHTRangeSearch(node.right, query_point, distance_function, radius)
-        result.extend(right_result)
-        distance_count += right_count
+        _ght_range(node.right, query_point, distance_function, radius, results)
+
+
+def GHTBatchRangeSearch(node, queries, distance_function: DistanceFunction, radius):
+    """
+    GH 树的批量范围查询算法
+    所有查询一起自顶向下遍历：每个节点对活动查询一次性计算 (活动查询数, 2) 的距离块，再按超平面条件把活动查询分给左右子树；
+    每个查询的结果与距离计算次数和单独调用 GHTRangeSearch 相同
+    :param node: 根节点（GHTInternalNode 或 PivotTable）
+    :param queries: 查询点集合（VectorDataset 或对象列表），共 Q 个
+    :param distance_function: 距离函数对象
+    :param radius: 查询半径
+    :return: (每个查询的命中编号数组列表, 每个查询的距离数组列表, 形状为 (Q,) 的距离计算次数数组)
+    """
+    results = BatchRangeResult(len(queries))
+    if node is not None:
+        _ght_batch(node, queries, np.arange(len(queries)), distance_function, radius, results)
+    return results.result()
+
+
+def _ght_batch(node, queries, active, distance_function, radius, results: BatchRangeResult):
+    """GH 树批量范围查询的递归过程，active 为需要访问当前节点的查询下标"""
+    if len(active) == 0:
+        return
+    if isinstance(node, PivotTable):
+        pt_batch_scan(node, queries, active, distance_function, radius, results)
+        return
+
+    # 活动查询到 c1, c2 的距离块 (活动查询数, 2)
+    distances = distance_function.compute_matrix(subset(queries, active), [node.c1, node.c2])
+    results.distance_counts[active] += 2
+    rows, cols = np.nonzero(distances <= radius)
+    results.add(active[rows], get_ids([node.c1, node.c2])[cols], distances[rows, cols])
+
+    d_q_c1, d_q_c2 = distances[:, 0], distances[:, 1]
+    if node.left:
+        _ght_batch(node.left, queries, active[d_q_c1 - d_q_c2 <= 2 * radius], distance_function, radius, results)
+    if node.right:
+        _ght_batch(node.right, queries, active[d_q_c2 - d_q_c1 <= 2 * radius], distance_function, radius, results)
+
+
+def GHTKnnSearch(node, query_point: MetricSpaceData, distance_function: DistanceFunction, k: int):
+    """
+    GH 树的 kNN 查询算法，按子树距离下界进行最优优先遍历
+    :param node: 根节点（GHTInternalNode 或 PivotTable）
+    :param query_point: 查询点对象
+    :param distance_function: 距离函数对象
+    :param k: 最近邻个数
+    :return: (按距离升序的最近邻编号数组, 对应距离数组, 距离计算次数)
+    """
+    return best_first_knn(node, query_point, distance_function, k, _ght_expand)
+
 
-    return result, distance_count
+def _ght_expand(node, query_point, distance_function, candidates):
+    """超平面划分：左子树中的点离 c1 更近，其下界为 (d(q, c1) - d(q, c2)) / 2，右子树对称"""
+    d_q_c1, d_q_c2 = distance_function.compute_many(query_point, [node.c1, node.c2])
+    candidates.add(node.c1, d_q_c1)
+    candidates.add(node.c2, d_q_c2)
+    children = [
+        (node.left, max((d_q_c1 - d_q_c2) / 2, 0.0)),
+        (node.right, max((d_q_c2 - d_q_c1) / 2, 0.0)),
+    ]
+    return 2, children
@@ -0,0 +1,131 @@
+import heapq
+import itertools
+
+import numpy as np
+
+from Core.MetricSpaceCore import DistanceFunction, MetricSpaceData
+from Core.Data.VectorDataset import get_ids
+from Core.DistanceFunction.ProfilingDistance import distance_site
+from Index.Structure.PivotTable import PivotTable
+
+
+class KnnCandidates:
+    """
+    kNN 查询的当前结果集合（大小为 k 的最大堆）
+    radius 为当前第 k 近的距离，结果不足 k 个时为无穷大，随结果的加入不断缩小
+    """
+
+    def __init__(self, k: int):
+        if k <= 0:
+            raise ValueError(f"k must be positive, got {k}")
+        self.k = k
+        self._heap = []  # 元素为 (-distance, 序号, 对象)，序号用于打破距离相同时的比较
+        self._counter = itertools.count()
+
+    @property
+    def radius(self) -> float:
+        if len(self._heap) < self.k:
+            return float("inf")
+        return -self._heap[0][0]
+
+    def add(self, obj, distance: float):
+        """尝试把一个对象加入结果集合"""
+        distance = float(distance)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, (-distance, next(self._counter), obj))
+        elif distance < -self._heap[0][0]:
+            heapq.heapreplace(self._heap, (-distance, next(self._counter), obj))
+
+    def sorted_results(self) -> list:
+        """按距离升序返回 [(对象, 距离), ...]"""
+        return [(obj, -neg) for neg, _, obj in sorted(self._heap, key=lambda x: (-x[0], x[1]))]
+
+    def results(self):
+        """按距离升序返回 (对象编号数组, 距离数组)"""
+        pairs = self.sorted_results()
+        return get_ids([obj for obj, _ in pairs]), np.array([dist for _, dist in pairs], dtype=np.float64)
+
+
+def pt_knn_scan(pivot_table: PivotTable, query_point: MetricSpaceData, distance_function: DistanceFunction,
+                candidates: KnnCandidates) -> int:
+    """
+    在一个 Pivot Table 中执行 kNN 查询，结果加入 candidates
+    数据对象按三角不等式下界从小到大依次验证，下界超过当前第 k 近距离时停止
+    :return: 距离计算次数
+    """
+    pivots = pivot_table.get_pivots()
+    pivot_distance = distance_function.compute_many(query_point, pivots)
+    distance_count = len(pivots)
+    for pivot, dist in zip(pivots, pivot_distance):
+        candidates.add(pivot, dist)
+
+    data_points = pivot_table.get_data()
+    if len(data_points) == 0:
+        return distance_count
+
+    if len(pivots) > 0:
+        lower = np.abs(pivot_distance[:, None] - pivot_table.get_all_distance()).max(axis=0)
+    else:
+        lower = np.zeros(len(data_points))
+
+    with distance_site("verification"):
+        for j in np.argsort(lower, kind="stable"):
+            if lower[j] > candidates.radius:
+                break
+            point = data_points[int(j)]
+            # 超过当前第 k 近距离的对象不会进入结果，可使用带上限的距离计算
+            candidates.add(point, distance_function.compute_bounded(query_point, point, candidates.radius))
+            distance_count += 1
+
+    return distance_count
+
+
+def best_first_knn(root, query_point: MetricSpaceData, distance_function: DistanceFunction, k: int, expand_node):
+    """
+    基于优先队列的最优优先 kNN 查询框架
+    队列按节点的距离下界排序，弹出的节点下界超过当前第 k 近距离时结束查询
+    :param root: 索引根节点（内部节点或 PivotTable）
+    :param expand_node: expand_node(node, query_point, distance_function, candidates) -> (距离计算次数, [(子节点, 子节点下界), ...])
+                        负责计算查询点到内部节点支撑点的距离、把支撑点加入 candidates 并给出子节点下界
+    :return: (按距离升序的最近邻编号数组, 对应距离数组, 距离计算次数)
+    """
+    candidates = KnnCandidates(k)
+    distance_count = 0
+    counter = itertools.count()
+    queue = [(0.0, next(counter), root)] if root is not None else []
+
+    while queue:
+        lower_bound, _, node = heapq.heappop(queue)
+        if lower_bound > candidates.radius:
+            break
+
+        if isinstance(node, PivotTable):
+            distance_count += pt_knn_scan(node, query_point, distance_function, candidates)
+            continue
+
+        count, children = expand_node(node, query_point, distance_function, candidates)
+        distance_count += count
+        for child, child_bound in children:
+            if child is None:
+                continue
+            child_bound = max(lower_bound, float(child_bound))
+            if child_bound <= candidates.radius:
+                heapq.heappush(queue, (child_bound, next(counter), child))
+
+    ids, distances = candidates.results()
+    return ids, distances, distance_count
+
+
+def PTKnnSearch(pivot_table: PivotTable, query_point: MetricSpaceData, distance_function: DistanceFunction, k: int):
+    """
+    Pivot Table 的 kNN 查询算法
+    :param pivot_table: PivotTable 实例
+    :param query_point: 查询点
+    :param distance_function: 距离函数
+    :param k: 最近邻个数
+    :return: (按距离升序的最近邻编号数组, 对应距离数组, 距离计算次数)
+    """
+    candidates = KnnCandidates(k)
+    distance_count = pt_knn_scan(pivot_table, query_point, distance_function, candidates)
+    ids, distances = candidates.results()
+    return ids, distances, distance_count
@@ -1,7 +1,12 @@
+import numpy as np
+
 from Core.MetricSpaceCore import MetricSpaceData, DistanceFunction
-from Index.Structure.LinearPartitionTree import LPTInternalNode, compute_projection
+from Index.Structure.LinearPartitionTree import LPTInternalNode
 from Index.Structure.PivotTable import PivotTable
-from Index.Search.PivotTableRangeSearch import PTRangeSearch
+from Core.Data.VectorDataset import get_ids, subset
+from Index.Search.PivotTableRangeSearch import pt_range_scan, pt_batch_scan
+from Index.Search.RangeResult import RangeResult, BatchRangeResult
+from Index.Search.KnnSearch import best_first_knn
 
 
 def LPTRangeSearch(node, query_point: MetricSpaceData, distance_function: DistanceFunction, radius, matrix_A):
@@ -12,71 +17,119 @@ def LPTRangeSearch(node, query_point: MetricSpaceData, distance_function: Distan
     :param radius: 查询半径
     :param distance_function: 距离函数对象
     :param matrix_A: k x n 法向量矩阵
-    :return: (命中对象列表, 距离计算次数)
+    :return: (命中对象编号数组, 对应距离数组（包含规则命中、未计算距离的对象为 NaN）, 距离计算次数)
     """
-    distance_count = 0
+    results = RangeResult()
+    if node is not None:
+        matrix_A = np.asarray(matrix_A, dtype=float)
+        _lpt_range(node, query_point, distance_function, radius, matrix_A, np.abs(matrix_A).sum(axis=1), results)
+    return results.result()
+
 
+def _lpt_range(node, query_point, distance_function, radius, matrix_A, l1_norms, results: RangeResult):
+    """LPT 范围查询的递归过程，命中对象与距离计算次数加入 results"""
     # 如果当前节点是叶子节点
     if isinstance(node, PivotTable):
-        return PTRangeSearch(node, query_point, distance_function, radius)
-
-    # 初始化结果列表
-    result = []
-    query_to_pivot_dists = []
-
-    for p in node.pivots:
-        d = distance_function.compute(query_point, p)
-        distance_count += 1
-        query_to_pivot_dists.append(d)
-        if d <= radius:
-            result.append(p)
-
-    # 预计算查询点在所有 k 个法向量上的投影值
-    q_projections = []
-    safety_margins = []  # 存储每个法向量对应的 sum(|a_i|) * r
-
-    for row_idx, vector in enumerate(matrix_A):
-        # 计算 q 的投影
-        val = compute_projection(query_point, vector, node.pivots, distance_function)
-        q_projections.append(val)
-
-        # 计算 L1 范数系数 (Lipschitz Constant)
-        l1_norm = sum(abs(c) for c in vector)
-        safety_margins.append(l1_norm * radius)
-
-        q_projections = []
-        safety_margins = []
-
-        for row_idx, vector in enumerate(matrix_A):
-            # 利用缓存的距离计算投影：Val_q = sum( vector[j] * dist(q, p_j) )
-            # zip() 巧妙地将法向量系数与刚计算好的距离配对相乘
-            val = sum(coeff * d for coeff, d in zip(vector, query_to_pivot_dists))
-            q_projections.append(val)
-
-            # 计算该法向量对应的 L1 范数剪枝系数
-            l1_norm = sum(abs(c) for c in vector)
-            safety_margins.append(l1_norm * radius)
-
-        for i, child in enumerate(node.children):
-            if not child:
-                continue
-
-            is_pruned = False
-            # 必须满足所有 k 个维度的限制，只要有一个维度不满足相交，即可剪枝
-            for row_idx in range(len(matrix_A)):
-                q_val = q_projections[row_idx]
-                margin = safety_margins[row_idx]
-
-                if ((q_val + margin < node.lower_bound[row_idx][i]) or
-                        (q_val - margin > node.upper_bound[row_idx][i])):
-                    is_pruned = True
-                    break  # 只要有一个维度剪枝成功，就跳出法向量循环
-
-            if not is_pruned:
-                # 递归搜索子节点，并累加命中结果和距离计算次数
-                child_results, child_dist_count = LPTRangeSearch(child, query_point, distance_function, radius,
-                                                                 matrix_A)
-                result.extend(child_results)
-                distance_count += child_dist_count
-
-        return result, distance_count
+        pt_range_scan(node, query_point, distance_function, radius, results)
+        return
+
+    query_to_pivot_dists = distance_function.compute_many(query_point, node.pivots)
+    results.distance_count += len(node.pivots)
+    pivot_hit = query_to_pivot_dists <= radius
+    results.add(get_ids(node.pivots)[pivot_hit], query_to_pivot_dists[pivot_hit])
+
+    # 利用已算出的支撑点距离一次性计算查询点在所有 k 个法向量上的投影：Val_q = A @ d(q, p)
+    q_projections = matrix_A @ query_to_pivot_dists
+    # 投影关于对象是 L1 范数为 sum(|a_i|) 的 Lipschitz 函数，半径 r 的查询球投影后的范围为 ±sum(|a_i|) * r
+    safety_margins = l1_norms * radius
+
+    # 对所有子节点同时判断：只要有一个法向量方向上投影区间不相交，即可剪枝
+    lower_bound = np.asarray(node.lower_bound, dtype=float)
+    upper_bound = np.asarray(node.upper_bound, dtype=float)
+    pruned = (((q_projections + safety_margins)[:, None] < lower_bound) |
+              ((q_projections - safety_margins)[:, None] > upper_bound)).any(axis=0)
+
+    for i in np.flatnonzero(~pruned):
+        child = node.children[i]
+        if child is None:
+            continue
+        # 递归搜索子节点
+        _lpt_range(child, query_point, distance_function, radius, matrix_A, l1_norms, results)
+
+
+def LPTBatchRangeSearch(node, queries, distance_function: DistanceFunction, radius, matrix_A):
+    """
+    (n, k) 完全线性划分树的批量范围查询算法
+    所有查询一起自顶向下遍历：每个节点对活动查询一次性计算 (活动查询数, 支撑点数) 的距离块及其在各法向量上的投影，
+    再得到 (活动查询数, 子节点数) 的剪枝掩码；每个查询的结果与距离计算次数和单独调用 LPTRangeSearch 相同
+    :param node: 根节点（LPTInternalNode 或 PivotTable）
+    :param queries: 查询点集合（VectorDataset 或对象列表），共 Q 个
+    :param distance_function: 距离函数对象
+    :param radius: 查询半径
+    :param matrix_A: k x n 法向量矩阵
+    :return: (每个查询的命中编号数组列表, 每个查询的距离数组列表, 形状为 (Q,) 的距离计算次数数组)
+    """
+    results = BatchRangeResult(len(queries))
+    if node is not None:
+        matrix_A = np.asarray(matrix_A, dtype=float)
+        _lpt_batch(node, queries, np.arange(len(queries)), distance_function, radius, matrix_A,
+                   np.abs(matrix_A).sum(axis=1), results)
+    return results.result()
+
+
+def _lpt_batch(node, queries, active, distance_function, radius, matrix_A, l1_norms, results: BatchRangeResult):
+    """LPT 批量范围查询的递归过程，active 为需要访问当前节点的查询下标"""
+    if len(active) == 0:
+        return
+    if isinstance(node, PivotTable):
+        pt_batch_scan(node, queries, active, distance_function, radius, results)
+        return
+
+    # 活动查询到所有支撑点的距离块 (活动查询数, 支撑点数)
+    query_to_pivot_dists = distance_function.compute_matrix(subset(queries, active), node.pivots)
+    results.distance_counts[active] += len(node.pivots)
+    rows, cols = np.nonzero(query_to_pivot_dists <= radius)
+    results.add(active[rows], get_ids(node.pivots)[cols], query_to_pivot_dists[rows, cols])
+
+    # 投影 (活动查询数, 法向量数)，剪枝掩码 (活动查询数, 子节点数)
+    q_projections = query_to_pivot_dists @ matrix_A.T
+    safety_margins = l1_norms * radius
+    lower_bound = np.asarray(node.lower_bound, dtype=float)
+    upper_bound = np.asarray(node.upper_bound, dtype=float)
+    pruned = (((q_projections + safety_margins)[:, :, None] < lower_bound[None]) |
+              ((q_projections - safety_margins)[:, :, None] > upper_bound[None])).any(axis=1)
+
+    for i, child in enumerate(node.children):
+        if child is None:
+            continue
+        _lpt_batch(child, queries, active[~pruned[:, i]], distance_function, radius, matrix_A, l1_norms, results)
+
+
+def LPTKnnSearch(node, query_point: MetricSpaceData, distance_function: DistanceFunction, k: int, matrix_A):
+    """
+    (n, k) 完全线性划分树的 kNN 查询算法，按子树距离下界进行最优优先遍历
+    :param node: 根节点（LPTInternalNode 或 PivotTable）
+    :param query_point: 查询点对象
+    :param distance_function: 距离函数对象
+    :param k: 最近邻个数
+    :param matrix_A: k x n 法向量矩阵
+    :return: (按距离升序的最近邻编号数组, 对应距离数组, 距离计算次数)
+    """
+    matrix_A = np.asarray(matrix_A, dtype=float)
+    l1_norms = np.abs(matrix_A).sum(axis=1)
+
+    def expand(node, query_point, distance_function, candidates):
+        # 投影 sum(a_i * d(o, p_i)) 关于 o 是 L1 范数为 sum(|a_i|) 的 Lipschitz 函数，
+        # 因此 d(q, o) >= |proj(q) - proj(o)| / sum(|a_i|)
+        query_to_pivot_dists = distance_function.compute_many(query_point, node.pivots)
+        for pivot, d in zip(node.pivots, query_to_pivot_dists):
+            candidates.add(pivot, d)
+
+        q_projections = (matrix_A @ query_to_pivot_dists)[:, None]
+        gaps = np.maximum(np.asarray(node.lower_bound) - q_projections, q_projections - np.asarray(node.upper_bound))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scaled = np.where(l1_norms[:, None] > 0, gaps / l1_norms[:, None], 0.0)
+        child_bounds = np.maximum(scaled.max(axis=0), 0.0)
+        return len(node.pivots), list(zip(node.children, child_bounds))
+
+    return best_first_knn(node, query_point, distance_function, k, expand)
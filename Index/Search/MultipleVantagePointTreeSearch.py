@@ -1,7 +1,13 @@
+import numpy as np
+
 from Core.MetricSpaceCore import MetricSpaceData, DistanceFunction
+from Core.Data.VectorDataset import get_ids, subset
 from Index.Structure.MultipleVantagePoinTree import MVPTInternalNode
 from Index.Structure.PivotTable import PivotTable
-from Index.Search.PivotTableRangeSearch import PTRangeSearch
+from Index.Structure.SubtreeLayout import subtree_ids
+from Index.Search.PivotTableRangeSearch import pt_range_scan, pt_batch_scan
+from Index.Search.RangeResult import RangeResult, BatchRangeResult
+from Index.Search.KnnSearch import best_first_knn
 
 
 def MVPTRangeSearch(node, query_point: MetricSpaceData, distance_function: DistanceFunction, radius):
@@ -11,25 +17,26 @@ def MVPTRangeSearch(node, query_point: MetricSpaceData, distance_function: Dista
     :param query_point: 查询点对象
     :param radius: 查询半径
     :param distance_function: 距离函数对象
-    :return: (命中对象列表, 距离计算次数)
+    :return: (命中对象编号数组, 对应距离数组（包含规则命中、未计算距离的对象为 NaN）, 距离计算次数)
     """
-    distance_count = 0
+    results = RangeResult()
+    if node is not None:
+        _mvpt_range(node, query_point, distance_function, radius, results)
+    return results.result()
+
 
+def _mvpt_range(node, query_point, distance_function, radius, results: RangeResult):
+    """MVPT 范围查询的递归过程，命中对象与距离计算次数加入 results"""
     # 如果当前节点是叶子节点
     if isinstance(node, PivotTable):
-        return PTRangeSearch(node, query_point, distance_function, radius)
+        pt_range_scan(node, query_point, distance_function, radius, results)
+        return
 
-    # 初始化结果列表
-    result = []
-    distance_VPs_q = []
-    
-    # 计算查询点到所有支撑点的距离
-    for pivot in node.pivots:
-        distance_vp_q = distance_function.compute(pivot, query_point)
-        distance_VPs_q.append(distance_vp_q)
-        distance_count += 1
-        if distance_vp_q <= radius:
-            result.append(pivot)
+    # 一次性计算查询点到所有支撑点的距离
+    distance_VPs_q = distance_function.compute_many(query_point, node.pivots)
+    results.distance_count += len(node.pivots)
+    pivot_hit = distance_VPs_q <= radius
+    results.add(get_ids(node.pivots)[pivot_hit], distance_VPs_q[pivot_hit])
 
     # 处理每个子节点
     for i, child in enumerate(node.children):
@@ -38,10 +45,9 @@ def MVPTRangeSearch(node, query_point: MetricSpaceData, distance_function: Dista
 
         done = False
         for j, pivot in enumerate(node.pivots):
-            # 包含规则：如果查询球完全包含子节点
+            # 包含规则：如果查询球完全包含子节点，整棵子树的编号直接取布局中的一段
             if distance_VPs_q[j] + node.upper_bound[j][i] <= radius:
-                child_result = MVPTGetAllData(child)
-                result.extend(child_result)
+                results.add_all(subtree_ids(child))
                 done = True
                 break
 
@@ -53,19 +59,68 @@ def MVPTRangeSearch(node, query_point: MetricSpaceData, distance_function: Dista
 
         # 如果无法排除，则递归搜索
         if not done:
-            child_result, child_count = MVPTRangeSearch(child, query_point, distance_function, radius)
-            result.extend(child_result)
-            distance_count += child_count
+            _mvpt_range(child, query_point, distance_function, radius, results)
+
+
+def MVPTBatchRangeSearch(node, queries, distance_function: DistanceFunction, radius):
+    """
+    MVPT（多优势点树）的批量范围查询算法
+    所有查询一起自顶向下遍历：每个节点对活动查询一次性计算 (活动查询数, 支撑点数) 的距离块，
+    再逐子树给出每个查询的包含 / 排除掩码；每个查询的结果与距离计算次数和单独调用 MVPTRangeSearch 相同
+    :param node: 根节点（MVPTInternalNode 或 PivotTable）
+    :param queries: 查询点集合（VectorDataset 或对象列表），共 Q 个
+    :param distance_function: 距离函数对象
+    :param radius: 查询半径
+    :return: (每个查询的命中编号数组列表, 每个查询的距离数组列表, 形状为 (Q,) 的距离计算次数数组)
+    """
+    results = BatchRangeResult(len(queries))
+    if node is not None:
+        _mvpt_batch(node, queries, np.arange(len(queries)), distance_function, radius, results)
+    return results.result()
+
+
+def _mvpt_batch(node, queries, active, distance_function, radius, results: BatchRangeResult):
+    """MVPT 批量范围查询的递归过程，active 为需要访问当前节点的查询下标"""
+    if len(active) == 0:
+        return
+    if isinstance(node, PivotTable):
+        pt_batch_scan(node, queries, active, distance_function, radius, results)
+        return
+
+    # 活动查询到所有支撑点的距离块 (活动查询数, 支撑点数)
+    distance_VPs_q = distance_function.compute_matrix(subset(queries, active), node.pivots)
+    results.distance_counts[active] += len(node.pivots)
+    rows, cols = np.nonzero(distance_VPs_q <= radius)
+    results.add(active[rows], get_ids(node.pivots)[cols], distance_VPs_q[rows, cols])
 
-    return result, distance_count
+    lower_bound = np.asarray(node.lower_bound, dtype=float)
+    upper_bound = np.asarray(node.upper_bound, dtype=float)
+    for i, child in enumerate(node.children):
+        if not child:
+            continue
+        # 与单个查询相同：按支撑点顺序，第一个能判定包含或排除的支撑点决定该子树的处理方式
+        include = distance_VPs_q + upper_bound[:, i] <= radius
+        exclude = ((distance_VPs_q + radius < lower_bound[:, i]) |
+                   (distance_VPs_q - radius > upper_bound[:, i]))
+        decided = include | exclude
+        first = decided.argmax(axis=1)
+        any_decided = decided.any(axis=1)
+        included = any_decided & include[np.arange(len(active)), first]
+
+        results.add_all(active[included], subtree_ids(child))
+        _mvpt_batch(child, queries, active[~any_decided], distance_function, radius, results)
 
 
 def MVPTGetAllData(node):
     """
     获取MVPT节点下的所有数据（包括支撑点）
+    已建立扁平化布局（见 SubtreeLayout）的树直接返回布局中的一段切片，否则递归收集
     :param node: 节点（MVPTInternalNode 或 PivotTable）
     :return: 数据列表
     """
+    if getattr(node, "layout", None) is not None:
+        return node.layout.objects_of(node)
+
     if isinstance(node, PivotTable):
         # 获取PivotTable中的所有数据，包括支撑点
         result = list(node.get_pivots())  # 添加支撑点
@@ -82,4 +137,28 @@ def MVPTGetAllData(node):
         if child:
             result.extend(MVPTGetAllData(child))
     
-    return result
\ No newline at end of file
+    return result
+
+
+def MVPTKnnSearch(node, query_point: MetricSpaceData, distance_function: DistanceFunction, k: int):
+    """
+    MVPT（多优势点树）的 kNN 查询算法，按子树距离下界进行最优优先遍历
+    :param node: 根节点（MVPTInternalNode 或 PivotTable）
+    :param query_point: 查询点对象
+    :param distance_function: 距离函数对象
+    :param k: 最近邻个数
+    :return: (按距离升序的最近邻编号数组, 对应距离数组, 距离计算次数)
+    """
+    return best_first_knn(node, query_point, distance_function, k, _mvpt_expand)
+
+
+def _mvpt_expand(node, query_point, distance_function, candidates):
+    """子树下界为各支撑点上 max(lower - d, d - upper, 0) 的最大值"""
+    distance_VPs_q = distance_function.compute_many(query_point, node.pivots)
+    for pivot, distance_vp_q in zip(node.pivots, distance_VPs_q):
+        candidates.add(pivot, distance_vp_q)
+
+    dq = distance_VPs_q[:, None]
+    gaps = np.maximum(np.asarray(node.lower_bound) - dq, dq - np.asarray(node.upper_bound))
+    child_bounds = np.maximum(gaps.max(axis=0), 0.0)
+    return len(node.pivots), list(zip(node.children, child_bounds))
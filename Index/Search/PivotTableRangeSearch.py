@@ -1,5 +1,13 @@
+import numpy as np
+
 from Index.Structure.PivotTable import PivotTable
+from Index.Search.RangeResult import RangeResult, BatchRangeResult
 from Core.MetricSpaceCore import DistanceFunction, MetricSpaceData
+from Core.Data.VectorDataset import subset
+from Core.DistanceFunction.ProfilingDistance import distance_site
+
+# 批量查询时叶子中 (查询数, 数据数) 上下界矩阵的元素个数上限，超过时按查询分块处理
+BATCH_BLOCK_ELEMENTS = 1 << 20
 
 
 def PTRangeSearch(pivot_table: PivotTable, query_point: MetricSpaceData, distance_function: DistanceFunction, radius):
@@ -9,45 +17,118 @@ def PTRangeSearch(pivot_table: PivotTable, query_point: MetricSpaceData, distanc
     :param distance_function: 距离函数，用于计算支撑点与查询点的距离
     :param query_point: 查询点
     :param radius: 查询半径
-    :return: (命中对象列表, 距离计算次数)
+    :return: (命中对象编号数组, 对应距离数组（包含规则命中、未计算距离的对象为 NaN）, 距离计算次数)
     """
-    result = []  # 初始化结果集
-    pivot_distance = []  # 支撑点与查询点的距离
-    distance_count = 0
+    results = RangeResult()
+    pt_range_scan(pivot_table, query_point, distance_function, radius, results)
+    return results.result()
 
-    # Step 1: 计算每个支撑点与查询点的距离，并判断是否是查询结果
-    for pivot in pivot_table.get_pivots():
-        dist = distance_function.compute(pivot, query_point)  # 计算距离
-        distance_count += 1
-        pivot_distance.append(dist)
-        if dist <= radius:  # 检查是否满足范围条件
-            result.append(pivot)
 
-    # Step 2: 处理每个数据对象
+def PTBatchRangeSearch(pivot_table: PivotTable, queries, distance_function: DistanceFunction, radius):
+    """
+    Pivot Table 的批量范围查询算法
+    :param pivot_table: PivotTable 实例
+    :param queries: 查询点集合（VectorDataset 或对象列表），共 Q 个
+    :param distance_function: 距离函数
+    :param radius: 查询半径
+    :return: (每个查询的命中编号数组列表, 每个查询的距离数组列表, 形状为 (Q,) 的距离计算次数数组)
+    """
+    results = BatchRangeResult(len(queries))
+    pt_batch_scan(pivot_table, queries, np.arange(len(queries)), distance_function, radius, results)
+    return results.result()
+
+
+def pt_range_scan(pivot_table: PivotTable, query_point: MetricSpaceData, distance_function: DistanceFunction, radius,
+                  results: RangeResult):
+    """
+    在一个 Pivot Table 中执行范围查询，命中对象与距离计算次数加入 results
+    """
+    # Step 1: 一次性计算所有支撑点与查询点的距离，并判断是否是查询结果
+    pivots = pivot_table.get_pivots()
+    pivot_distance = distance_function.compute_many(query_point, pivots)
+    results.distance_count += len(pivots)
+    pivot_hit = pivot_distance <= radius
+    results.add(pivot_table.pivot_ids[pivot_hit], pivot_distance[pivot_hit])
+
+    # Step 2: 对所有数据对象一次性计算三角不等式给出的距离上下界
     data_points = pivot_table.get_data()
-    if data_points:  # 非空才处理
-        for j, point in enumerate(data_points):
-            done = False  # 标记当前数据对象是否被处理
-
-            for i in range(len(pivot_table.get_pivots())):
-                dist_pq = pivot_distance[i]
-                dist_pd = pivot_table.get_distance(i, j)
-                # 包含规则
-                if dist_pq + dist_pd <= radius:
-                    result.append(point)
-                    done = True
-                    break
-
-                # 排除规则
-                if abs(dist_pq - dist_pd) > radius:
-                    done = True
-                    break
-
-            # 如果无法排除或直接判定，则进行直接距离计算
-            if not done:
-                if distance_function.compute(point, query_point) <= radius:
-                    result.append(point)
-                distance_count += 1
-
-    return result, distance_count
+    if len(data_points) == 0:
+        return
+
+    table = pivot_table.get_all_distance()  # (k, n)
+    if len(pivots) > 0:
+        lower = np.abs(pivot_distance[:, None] - table).max(axis=0)
+        upper = (pivot_distance[:, None] + table).min(axis=0)
+    else:
+        lower = np.zeros(len(data_points))
+        upper = np.full(len(data_points), np.inf)
+
+    # 包含规则：上界不超过半径；排除规则：下界超过半径，由包含规则直接判定的对象不计算距离（记为 NaN）
+    hit = upper <= radius
+    undecided = np.flatnonzero(~hit & (lower <= radius))
+    distances = np.full(len(data_points), np.nan)
+
+    # 无法排除或直接判定的数据对象，批量进行直接距离计算（只需判断是否不超过半径，可使用带上限的计算）
+    if len(undecided) > 0:
+        with distance_site("verification"):
+            distances[undecided] = distance_function.compute_many_bounded(query_point, subset(data_points, undecided),
+                                                                          radius)
+        results.distance_count += len(undecided)
+        hit[undecided] = distances[undecided] <= radius
+
+    results.add(pivot_table.get_data_ids()[hit], distances[hit])
+
+
+def pt_batch_scan(pivot_table: PivotTable, queries, active: np.ndarray, distance_function: DistanceFunction, radius,
+                  results: BatchRangeResult):
+    """
+    在一个 Pivot Table 中同时执行多个范围查询，与对每个查询分别调用 pt_range_scan 的结果和距离计算次数相同
+    :param queries: 全部查询点
+    :param active: 需要在该叶子中查询的查询下标
+    """
+    if len(active) == 0:
+        return
+    pivots = pivot_table.get_pivots()
+    data_points = pivot_table.get_data()
+    step = max(1, BATCH_BLOCK_ELEMENTS // max(len(data_points), 1))
+    for start in range(0, len(active), step):
+        block = active[start:start + step]
+        block_queries = subset(queries, block)
+
+        # Step 1: 查询到支撑点的距离块 (查询数, 支撑点数)
+        pivot_distance = distance_function.compute_matrix(block_queries, pivots)
+        results.distance_counts[block] += len(pivots)
+        rows, cols = np.nonzero(pivot_distance <= radius)
+        results.add(block[rows], pivot_table.pivot_ids[cols], pivot_distance[rows, cols])
+
+        if len(data_points) == 0:
+            continue
+
+        # Step 2: 每个查询到每个数据对象的三角不等式上下界 (查询数, 数据数)
+        table = pivot_table.get_all_distance()
+        if len(pivots) > 0:
+            # 逐个支撑点累计，避免 (查询数, 支撑点数, 数据数) 的三维中间数组
+            lower = np.abs(pivot_distance[:, 0, None] - table[0])
+            upper = pivot_distance[:, 0, None] + table[0]
+            for j in range(1, len(pivots)):
+                np.maximum(lower, np.abs(pivot_distance[:, j, None] - table[j]), out=lower)
+                np.minimum(upper, pivot_distance[:, j, None] + table[j], out=upper)
+        else:
+            lower = np.zeros((len(block), len(data_points)))
+            upper = np.full((len(block), len(data_points)), np.inf)
+
+        hit = upper <= radius
+        rows, cols = np.nonzero(~hit & (lower <= radius))
+        distances = np.full(hit.shape, np.nan)
+
+        # 无法排除或直接判定的 (查询, 对象) 对，逐对批量验证
+        if len(rows) > 0:
+            with distance_site("verification"):
+                verified = distance_function.compute_pairs_bounded(subset(block_queries, rows),
+                                                                   subset(data_points, cols), radius)
+            distances[rows, cols] = verified
+            results.distance_counts[block] += np.bincount(rows, minlength=len(block))
+            hit[rows, cols] = verified <= radius
 
+        rows, cols = np.nonzero(hit)
+        results.add(block[rows], pivot_table.get_data_ids()[cols], distances[rows, cols])
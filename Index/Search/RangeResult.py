@@ -0,0 +1,78 @@
+import numpy as np
+
+
+class RangeResult:
+    """
+    范围查询的结果收集器
+    命中对象以 (编号数组, 距离数组) 的块追加，查询结束时一次性拼接；
+    由包含规则整体加入、从未计算过距离的对象，距离记为 NaN
+    """
+
+    def __init__(self):
+        self._ids = []
+        self._distances = []
+        self.distance_count = 0
+
+    def add(self, ids, distances):
+        """加入一组已算出距离的命中对象"""
+        if len(ids) > 0:
+            self._ids.append(np.asarray(ids, dtype=np.int64))
+            self._distances.append(np.asarray(distances, dtype=np.float64))
+
+    def add_all(self, ids):
+        """加入一组未计算距离的命中对象（例如包含规则命中的整棵子树）"""
+        if len(ids) > 0:
+            self._ids.append(np.asarray(ids, dtype=np.int64))
+            self._distances.append(np.full(len(ids), np.nan))
+
+    def result(self):
+        """
+        :return: (命中对象编号数组, 对应距离数组, 距离计算次数)
+        """
+        if not self._ids:
+            return np.empty(0, dtype=np.int64), np.empty(0), self.distance_count
+        return np.concatenate(self._ids), np.concatenate(self._distances), self.distance_count
+
+
+class BatchRangeResult:
+    """
+    批量范围查询的结果收集器
+    命中以 (查询下标数组, 编号数组, 距离数组) 的块追加，查询结束时按查询下标稳定排序后一次性切分，
+    因此每个查询的命中顺序与单独查询时相同；distance_counts[i] 为第 i 个查询的距离计算次数
+    """
+
+    def __init__(self, num_queries: int):
+        self.num_queries = num_queries
+        self._queries = []
+        self._ids = []
+        self._distances = []
+        self.distance_counts = np.zeros(num_queries, dtype=np.int64)
+
+    def add(self, queries, ids, distances):
+        """加入一组已算出距离的命中，queries[i] 命中 ids[i]"""
+        if len(ids) > 0:
+            self._queries.append(np.asarray(queries, dtype=np.int64))
+            self._ids.append(np.asarray(ids, dtype=np.int64))
+            self._distances.append(np.asarray(distances, dtype=np.float64))
+
+    def add_all(self, queries, ids):
+        """queries 中的每个查询都命中 ids 中的全部对象，且均未计算距离（例如包含规则命中的整棵子树）"""
+        if len(queries) > 0 and len(ids) > 0:
+            self._queries.append(np.repeat(np.asarray(queries, dtype=np.int64), len(ids)))
+            self._ids.append(np.tile(np.asarray(ids, dtype=np.int64), len(queries)))
+            self._distances.append(np.full(len(queries) * len(ids), np.nan))
+
+    def result(self):
+        """
+        :return: (每个查询的命中编号数组列表, 每个查询的距离数组列表, 每个查询的距离计算次数数组)
+        """
+        if not self._ids:
+            ids = [np.empty(0, dtype=np.int64) for _ in range(self.num_queries)]
+            distances = [np.empty(0) for _ in range(self.num_queries)]
+            return ids, distances, self.distance_counts
+        queries = np.concatenate(self._queries)
+        order = np.argsort(queries, kind="stable")
+        bounds = np.cumsum(np.bincount(queries, minlength=self.num_queries))[:-1]
+        ids = np.split(np.concatenate(self._ids)[order], bounds)
+        distances = np.split(np.concatenate(self._distances)[order], bounds)
+        return ids, distances, self.distance_counts
@@ -1,7 +1,13 @@
+import numpy as np
+
 from Core.MetricSpaceCore import MetricSpaceData, DistanceFunction
+from Core.Data.VectorDataset import get_ids, subset
 from Index.Structure.VantagePointTree import VPTInternalNode
 from Index.Structure.PivotTable import PivotTable
-from Index.Search.PivotTableRangeSearch import PTRangeSearch
+from Index.Structure.SubtreeLayout import subtree_ids
+from Index.Search.PivotTableRangeSearch import pt_range_scan, pt_batch_scan
+from Index.Search.RangeResult import RangeResult, BatchRangeResult
+from Index.Search.KnnSearch import best_first_knn
 
 
 def VPTRangeSearch(node, query_point: MetricSpaceData, distance_function: DistanceFunction, radius):
@@ -11,51 +17,97 @@ def VPTRangeSearch(node, query_point: MetricSpaceData, distance_function: Distan
     :param query_point: 查询点对象
     :param radius: 查询半径
     :param distance_function: 距离函数对象
-    :return: (命中对象列表, 距离计算次数)
+    :return: (命中对象编号数组, 对应距离数组（包含规则命中、未计算距离的对象为 NaN）, 距离计算次数)
     """
-    distance_count = 0
+    results = RangeResult()
+    if node is not None:
+        _vpt_range(node, query_point, distance_function, radius, results)
+    return results.result()
+
 
+def _vpt_range(node, query_point, distance_function, radius, results: RangeResult):
+    """VPT 范围查询的递归过程，命中对象与距离计算次数加入 results"""
     # 如果当前节点是叶子节点
     if isinstance(node, PivotTable):
-        return PTRangeSearch(node, query_point, distance_function, radius)
+        pt_range_scan(node, query_point, distance_function, radius, results)
+        return
 
-    # 初始化结果列表
-    result = []
     distance_VP_q = distance_function.compute(node.pivot, query_point)
-    distance_count += 1
+    results.distance_count += 1
 
     # 支撑点是查询结果
     if distance_VP_q <= radius:
-        result.append(node.pivot)
+        results.add(get_ids([node.pivot]), [distance_VP_q])
 
-    # 球内数据全部是查询结果
+    # 球内数据全部是查询结果，整棵子树的编号直接取布局中的一段
     if distance_VP_q + node.splitRadius <= radius:
         if node.left:
-            result.extend(VPTGetAllData(node.left))
+            results.add_all(subtree_ids(node.left))
 
     # 球内侧不能排除
     elif distance_VP_q <= node.splitRadius + radius:
         if node.left:
-            left_result, left_count = VPTRangeSearch(node.left, query_point, distance_function, radius)
-            result.extend(left_result)
-            distance_count += left_count
+            _vpt_range(node.left, query_point, distance_function, radius, results)
 
     # 球外侧不能排除
     if distance_VP_q + radius > node.splitRadius:
         if node.right:
-            right_result, right_count = VPTRangeSearch(node.right, query_point, distance_function, radius)
-            result.extend(right_result)
-            distance_count += right_count
+            _vpt_range(node.right, query_point, distance_function, radius, results)
+
+
+def VPTBatchRangeSearch(node, queries, distance_function: DistanceFunction, radius):
+    """
+    VPT（优势点树）的批量范围查询算法
+    所有查询一起自顶向下遍历：每个节点只对仍需访问该节点的查询（活动查询）计算一次到支撑点的距离块，
+    再按剪枝条件把活动查询分给各子树；每个查询的结果与距离计算次数和单独调用 VPTRangeSearch 相同
+    :param node: 根节点（VPTInternalNode 或 PivotTable）
+    :param queries: 查询点集合（VectorDataset 或对象列表），共 Q 个
+    :param distance_function: 距离函数对象
+    :param radius: 查询半径
+    :return: (每个查询的命中编号数组列表, 每个查询的距离数组列表, 形状为 (Q,) 的距离计算次数数组)
+    """
+    results = BatchRangeResult(len(queries))
+    if node is not None:
+        _vpt_batch(node, queries, np.arange(len(queries)), distance_function, radius, results)
+    return results.result()
 
-    return result, distance_count
+
+def _vpt_batch(node, queries, active, distance_function, radius, results: BatchRangeResult):
+    """VPT 批量范围查询的递归过程，active 为需要访问当前节点的查询下标"""
+    if len(active) == 0:
+        return
+    if isinstance(node, PivotTable):
+        pt_batch_scan(node, queries, active, distance_function, radius, results)
+        return
+
+    # 活动查询到优势点的距离块 (活动查询数, 1)
+    distance_VP_q = distance_function.compute_matrix(subset(queries, active), [node.pivot])[:, 0]
+    results.distance_counts[active] += 1
+    hit = distance_VP_q <= radius
+    results.add(active[hit], np.repeat(get_ids([node.pivot]), hit.sum()), distance_VP_q[hit])
+
+    # 与单个查询相同的包含 / 剪枝规则，逐查询给出掩码
+    include_left = distance_VP_q + node.splitRadius <= radius
+    search_left = ~include_left & (distance_VP_q <= node.splitRadius + radius)
+    search_right = distance_VP_q + radius > node.splitRadius
+
+    if node.left:
+        results.add_all(active[include_left], subtree_ids(node.left))
+        _vpt_batch(node.left, queries, active[search_left], distance_function, radius, results)
+    if node.right:
+        _vpt_batch(node.right, queries, active[search_right], distance_function, radius, results)
 
 
 def VPTGetAllData(node):
     """
     获取VPT节点下的所有数据（包括支撑点）
+    已建立扁平化布局（见 SubtreeLayout）的树直接返回布局中的一段切片，否则递归收集
     :param node: 节点（VPTInternalNode 或 PivotTable）
     :return: 数据列表
     """
+    if getattr(node, "layout", None) is not None:
+        return node.layout.objects_of(node)
+
     if isinstance(node, PivotTable):
         # 获取PivotTable中的所有数据，包括支撑点
         result = list(node.get_pivots())  # 添加支撑点
@@ -69,4 +121,27 @@ def VPTGetAllData(node):
         result.extend(VPTGetAllData(node.left))
     if node.right:
         result.extend(VPTGetAllData(node.right))
-    return result
\ No newline at end of file
+    return result
+
+
+def VPTKnnSearch(node, query_point: MetricSpaceData, distance_function: DistanceFunction, k: int):
+    """
+    VPT（优势点树）的 kNN 查询算法，按子树距离下界进行最优优先遍历
+    :param node: 根节点（VPTInternalNode 或 PivotTable）
+    :param query_point: 查询点对象
+    :param distance_function: 距离函数对象
+    :param k: 最近邻个数
+    :return: (按距离升序的最近邻编号数组, 对应距离数组, 距离计算次数)
+    """
+    return best_first_knn(node, query_point, distance_function, k, _vpt_expand)
+
+
+def _vpt_expand(node, query_point, distance_function, candidates):
+    """计算查询点到优势点的距离，球内子树下界为 d - R，球外子树下界为 R - d"""
+    distance_VP_q = distance_function.compute(node.pivot, query_point)
+    candidates.add(node.pivot, distance_VP_q)
+    children = [
+        (node.left, max(distance_VP_q - node.splitRadius, 0.0)),
+        (node.right, max(node.splitRadius - distance_VP_q, 0.0)),
+    ]
+    return 1, children
@@ -1,6 +1,12 @@
 # GHT 树内部节点类
+import numpy as np
+
 from Algorithm.SelectorCore import PivotSelector
+from Core.Data.VectorDataset import subset
 from Index.Structure.PivotTable import PivotTable
+from Index.Structure.ParallelBuild import build_subtree
+from Core.DistanceFunction.ProfilingDistance import distance_site
+from Utils.buildTimer import build_phase
 from Core.MetricSpaceCore import MetricSpaceData
 
 
@@ -12,7 +18,7 @@ class GHTInternalNode:
         self.right = right  # 右子树
 
 # 批量构建 GHT 树
-def GHTBulkload(data, max_leaf_size, distance_function, pivot_selector: PivotSelector, pivot_k: int = 1):
+def GHTBulkload(data, max_leaf_size, distance_function, pivot_selector: PivotSelector, pivot_k: int = 1, scheduler=None):
     """
     批量构建 GHT 树（支持手动或自动选择支撑点策略）
     :param data: 当前子树数据
@@ -20,6 +26,7 @@ def GHTBulkload(data, max_leaf_size, distance_function, pivot_selector: PivotSel
     :param distance_function: 距离函数
     :param pivot_selector: 支撑点选择函数
     :param pivot_k: 叶子节点支撑点数量
+    :param scheduler: 并行构建的子树调度器（见 ParallelBuild.parallel_bulkload），None 表示串行构建
     :return: 树的根节点（GHTInternalNode 或 PivotTable）
     """
     if 0 == len(data):
@@ -29,19 +36,21 @@ def GHTBulkload(data, max_leaf_size, distance_function, pivot_selector: PivotSel
         return PivotTable(data, distance_function, pivot_selector, max_leaf_size, pivot_k)  # 构建 PivotTable
 
     # 选择两个支撑点（这里简单随机选择）
-    pivots, data = pivot_selector.select(data, 2, "GHT内部节点")
+    with build_phase("pivot_selection"), distance_site("selector"):
+        pivots, data = pivot_selector.select(data, 2, "GHT内部节点")
     c1, c2 = pivots
 
     # 根据与支撑点的距离划分数据点
-    leftData, rightData = [], []
-    for s in data:
-        if distance_function.compute(s, c1) <= distance_function.compute(s, c2):
-            leftData.append(s)
-        else:
-            rightData.append(s)
+    with build_phase("partitioning"), distance_site("builder"):
+        d_c1 = distance_function.compute_many(c1, data)
+        d_c2 = distance_function.compute_many(c2, data)
+        closer_to_c1 = d_c1 <= d_c2
+        leftData = subset(data, np.flatnonzero(closer_to_c1))
+        rightData = subset(data, np.flatnonzero(~closer_to_c1))
 
     # 处理空子树
-    left = GHTBulkload(leftData, max_leaf_size, distance_function, pivot_selector, pivot_k)
-    right = GHTBulkload(rightData, max_leaf_size, distance_function, pivot_selector, pivot_k)
+    args = (max_leaf_size, distance_function, pivot_selector, pivot_k)
+    left = build_subtree(scheduler, GHTBulkload, leftData, *args)
+    right = build_subtree(scheduler, GHTBulkload, rightData, *args)
 
     return GHTInternalNode(c1, c2, left, right)
@@ -0,0 +1,255 @@
+import json
+import os
+
+import numpy as np
+
+from Core.Data.VectorDataset import get_ids, subset
+from Index.Structure.PivotTable import PivotTable
+from Index.Structure.VantagePointTree import VPTInternalNode
+from Index.Structure.GeneralHyperPlaneTree import GHTInternalNode
+from Index.Structure.MultipleVantagePoinTree import MVPTInternalNode
+from Index.Structure.LinearPartitionTree import LPTInternalNode
+from Index.Structure.SubtreeLayout import build_subtree_layout
+
+# 磁盘格式版本号，格式发生不兼容变化时递增
+FORMAT_NAME = "MetricSpaceIndex"
+FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+
+# 节点类型编号
+NODE_PIVOT_TABLE = 0
+NODE_VPT = 1
+NODE_GHT = 2
+NODE_MVPT = 3
+NODE_LPT = 4
+
+
+class _IndexWriter:
+    """
+    先序遍历索引树，把每个节点拆成若干定长字段和变长字段（支撑点编号、子节点、叶子数据编号、距离表、上下界），
+    变长字段最终按 CSR 方式（偏移数组 + 扁平数组）保存
+    """
+
+    def __init__(self):
+        self.node_type = []
+        self.split_radius = []
+        self.max_leaf_size = []
+        self.pivot_k = []
+        self.pivot_ids = []
+        self.children = []
+        self.data_ids = []
+        self.table = []
+        self.lower_bound = []
+        self.upper_bound = []
+
+    def add(self, node) -> int:
+        if node is None:
+            return -1
+        nid = len(self.node_type)
+        self.node_type.append(None)
+        self.split_radius.append(np.nan)
+        self.max_leaf_size.append(-1)
+        self.pivot_k.append(-1)
+        self.pivot_ids.append(np.empty(0, dtype=np.int64))
+        self.children.append([])
+        self.data_ids.append(np.empty(0, dtype=np.int64))
+        self.table.append(np.empty(0))
+        self.lower_bound.append(np.empty(0))
+        self.upper_bound.append(np.empty(0))
+
+        if isinstance(node, PivotTable):
+            self.node_type[nid] = NODE_PIVOT_TABLE
+            self.max_leaf_size[nid] = node.max_leaf_size
+            self.pivot_k[nid] = node.pivot_k
+            self.pivot_ids[nid] = _checked_ids(node.get_pivots())
+            self.data_ids[nid] = _checked_ids(node.get_data())
+            self.table[nid] = np.asarray(node.get_all_distance(), dtype=np.float64).ravel()
+            return nid
+
+        if isinstance(node, VPTInternalNode):
+            self.node_type[nid] = NODE_VPT
+            self.split_radius[nid] = node.splitRadius
+            self.pivot_ids[nid] = _checked_ids([node.pivot])
+            children = [node.left, node.right]
+        elif isinstance(node, GHTInternalNode):
+            self.node_type[nid] = NODE_GHT
+            self.pivot_ids[nid] = _checked_ids([node.c1, node.c2])
+            children = [node.left, node.right]
+        elif isinstance(node, (MVPTInternalNode, LPTInternalNode)):
+            self.node_type[nid] = NODE_MVPT if isinstance(node, MVPTInternalNode) else NODE_LPT
+            self.pivot_ids[nid] = _checked_ids(node.pivots)
+            self.lower_bound[nid] = np.asarray(node.lower_bound, dtype=np.float64).ravel()
+            self.upper_bound[nid] = np.asarray(node.upper_bound, dtype=np.float64).ravel()
+            children = node.children
+        else:
+            raise TypeError(f"Unsupported index node type: {type(node).__name__}")
+
+        self.children[nid] = [self.add(child) for child in children]
+        return nid
+
+    def arrays(self) -> dict:
+        arrays = {
+            "node_type": np.asarray(self.node_type, dtype=np.int8),
+            "split_radius": np.asarray(self.split_radius, dtype=np.float64),
+            "max_leaf_size": np.asarray(self.max_leaf_size, dtype=np.int64),
+            "pivot_k": np.asarray(self.pivot_k, dtype=np.int64),
+        }
+        for name, dtype in [("pivot_ids", np.int64), ("children", np.int64), ("data_ids", np.int64),
+                            ("table", np.float64), ("lower_bound", np.float64), ("upper_bound", np.float64)]:
+            parts = getattr(self, name)
+            arrays[f"{name}_ptr"] = np.concatenate([[0], np.cumsum([len(p) for p in parts])]).astype(np.int64)
+            arrays[name] = np.concatenate([np.asarray(p, dtype=dtype) for p in parts]) if parts else np.empty(0, dtype)
+        return arrays
+
+
+def _checked_ids(objects) -> np.ndarray:
+    ids = get_ids(objects)
+    if (ids < 0).any():
+        raise ValueError("Index can only be saved when every object carries a dataset id")
+    return ids
+
+
+def save_index(index, path: str, metadata: dict = None):
+    """
+    将构建好的索引保存到目录 path 中
+    目录包含 manifest.json（格式名、版本号、元数据）和若干 .npy 数组；
+    树结构、距离表和上下界均保存为数组，数据对象只保存其在数据集中的编号。
+    :param index: 索引根节点（PivotTable 或任一树的内部节点，可以为 None）
+    :param path: 保存目录
+    :param metadata: 额外写入 manifest 的元数据（例如配置哈希、LPT 的 matrix_A）
+    """
+    arrays = index_to_arrays(index)
+
+    os.makedirs(path, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(path, f"{name}.npy"), array)
+
+    manifest = {
+        "format": FORMAT_NAME,
+        "version": FORMAT_VERSION,
+        "num_nodes": len(arrays["node_type"]),
+        "arrays": sorted(arrays),
+        "metadata": metadata or {},
+    }
+    # manifest 最后写入，存在 manifest 即表示索引完整
+    tmp_path = os.path.join(path, f"{MANIFEST_FILE}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, os.path.join(path, MANIFEST_FILE))
+
+
+def index_to_arrays(index) -> dict:
+    """
+    把索引转换为 save_index 使用的数组字典（不写入磁盘）
+    :param index: 索引根节点，可以为 None
+    :return: 数组名 -> ndarray
+    """
+    writer = _IndexWriter()
+    writer.add(index)
+    return writer.arrays()
+
+
+def read_manifest(path: str) -> dict:
+    """读取并校验索引目录的 manifest"""
+    with open(os.path.join(path, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get("format") != FORMAT_NAME:
+        raise ValueError(f"{path} is not a {FORMAT_NAME} directory")
+    if manifest.get("version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported index format version {manifest.get('version')}, expected {FORMAT_VERSION}")
+    return manifest
+
+
+def load_index(path: str, dataset, mmap: bool = True):
+    """
+    从目录 path 加载索引，数据对象根据编号从 dataset 中取回
+    :param path: save_index 保存的目录
+    :param dataset: 构建索引时使用的数据集（VectorDataset 或带 id 的对象列表）
+    :param mmap: 是否以内存映射方式打开数组（叶子距离表将直接引用映射内存）
+    :return: (索引根节点, manifest)，根节点已建立扁平化布局
+    """
+    manifest = read_manifest(path)
+    arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r' if mmap else None)
+              for name in manifest["arrays"]}
+
+    index = index_from_arrays(arrays, dataset)
+    build_subtree_layout(index)
+    return index, manifest
+
+
+def index_from_arrays(arrays: dict, dataset):
+    """
+    由 index_to_arrays 给出的数组重建索引，数据对象根据编号从 dataset 中取回
+    :param arrays: 数组名 -> ndarray（可以是内存映射数组）
+    :param dataset: 构建索引时使用的数据集
+    :return: 索引根节点，没有节点时为 None
+    """
+    if len(arrays["node_type"]) == 0:
+        return None
+
+    resolve = _id_resolver(dataset)
+
+    def segment(name, nid):
+        ptr = arrays[f"{name}_ptr"]
+        return arrays[name][ptr[nid]:ptr[nid + 1]]
+
+    def build(nid):
+        if nid < 0:
+            return None
+        node_type = int(arrays["node_type"][nid])
+        pivots = resolve(segment("pivot_ids", nid))
+
+        if node_type == NODE_PIVOT_TABLE:
+            data = resolve(segment("data_ids", nid))
+            table = segment("table", nid).reshape(len(pivots), len(data))
+            return PivotTable.from_arrays(pivots, data, table,
+                                          int(arrays["max_leaf_size"][nid]), int(arrays["pivot_k"][nid]))
+
+        children = [build(int(child)) for child in segment("children", nid)]
+        if node_type == NODE_VPT:
+            return VPTInternalNode(pivots[0], float(arrays["split_radius"][nid]), children[0], children[1])
+        if node_type == NODE_GHT:
+            return GHTInternalNode(pivots[0], pivots[1], children[0], children[1])
+
+        rows = len(segment("lower_bound", nid)) // max(len(children), 1)
+        lower_bound = segment("lower_bound", nid).reshape(rows, len(children))
+        upper_bound = segment("upper_bound", nid).reshape(rows, len(children))
+        if node_type == NODE_MVPT:
+            return MVPTInternalNode(pivots, children, lower_bound, upper_bound)
+        if node_type == NODE_LPT:
+            return LPTInternalNode(pivots, children, lower_bound, upper_bound)
+        raise ValueError(f"Unknown node type {node_type}")
+
+    return build(0)
+
+
+def _id_resolver(dataset):
+    """返回把编号数组映射为数据对象子集的函数"""
+    locate = id_locator(dataset)
+    return lambda ids: subset(dataset, locate(ids))
+
+
+def id_locator(dataset):
+    """
+    返回把编号数组映射为其在 dataset 中位置的函数，编号不存在时抛出 KeyError
+    """
+    all_ids = get_ids(dataset)
+    if np.array_equal(all_ids, np.arange(len(all_ids))):
+        def locate(ids):
+            ids = np.asarray(ids, dtype=np.int64)
+            if len(ids) > 0 and (ids.min() < 0 or ids.max() >= len(all_ids)):
+                raise KeyError("Index references object ids that are not in the dataset")
+            return ids
+        return locate
+
+    sorter = np.argsort(all_ids, kind="stable")
+    sorted_ids = all_ids[sorter]
+
+    def locate(ids):
+        ids = np.asarray(ids, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(sorted_ids, ids), max(len(sorted_ids) - 1, 0))
+        if len(ids) > 0 and (len(sorted_ids) == 0 or not np.array_equal(sorted_ids[pos], ids)):
+            raise KeyError("Index references object ids that are not in the dataset")
+        return sorter[pos]
+
+    return locate
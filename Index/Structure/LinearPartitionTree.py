@@ -1,5 +1,11 @@
+import numpy as np
+
 from Algorithm.SelectorCore import PivotSelector
+from Core.Data.VectorDataset import subset
 from Index.Structure.PivotTable import PivotTable
+from Index.Structure.ParallelBuild import build_subtree
+from Core.DistanceFunction.ProfilingDistance import distance_site
+from Utils.buildTimer import build_phase
 from Core.MetricSpaceCore import MetricSpaceData
 
 
@@ -19,7 +25,8 @@ class LPTInternalNode:
         self.upper_bound = upper_bound
 
 
-def LPTBulkload(data, max_leaf_size, distance_function, pivot_selector: PivotSelector, pivot_k, matrix_A, num_regions=2):
+def LPTBulkload(data, max_leaf_size, distance_function, pivot_selector: PivotSelector, pivot_k, matrix_A, num_regions=2,
+                scheduler=None):
     """
     基于法向量矩阵的批量构建算法
 
@@ -28,6 +35,7 @@ def LPTBulkload(data, max_leaf_size, distance_function, pivot_selector: PivotSel
                      k (rows) = 划分层数/法向量个数
                      n (cols) = 需要的支撑点个数
     :param num_regions: 每次划分的区域数 (基数平衡划分)
+    :param scheduler: 并行构建的子树调度器（见 ParallelBuild.parallel_bulkload），None 表示串行构建
     """
     if len(data) == 0:
         return None
@@ -44,47 +52,45 @@ def LPTBulkload(data, max_leaf_size, distance_function, pivot_selector: PivotSel
     if len(data) < internal_pivot_k:
         return PivotTable(data, distance_function, pivot_selector, max_leaf_size, pivot_k)
 
-    # 选择支撑点
-    pivots, remaining_data = pivot_selector.select(data, internal_pivot_k, "LPT内部节点")
+    # 选择支撑点，并一次性得到支撑点到其余数据的距离块 (internal_pivot_k, n)
+    with build_phase("pivot_selection"), distance_site("selector"):
+        pivots, remaining_data, block = pivot_selector.select_with_distances(data, internal_pivot_k, "LPT内部节点")
 
-    # 初始化划分
-    partitions = [remaining_data]
+    with build_phase("partitioning"), distance_site("builder"):
+        if block is None:
+            block = pivot_distance_block(remaining_data, matrix_A, pivots, distance_function)
 
-    # 遍历矩阵的每一行 (每一个法向量)
-    for j in range(num_vec):
-        current_vector = matrix_A[j]  # 获取当前法向量，例如 [1, 0, -1]
-        new_partitions = []
-        for partition in partitions:
-            if len(partition) > 0:
-                # 对当前 partition，基于 current_vector 计算投影并进行基数平衡划分
-                new_partitions.extend(split_by_vector_rule(
-                    partition,
-                    current_vector,
-                    pivots,
-                    distance_function,
-                    num_regions
-                ))
-        partitions = new_partitions
-
-    # 初始化上下界矩阵和子节点集合
-    upper_bound = [[float("inf") for _ in range(len(partitions))] for _ in range(num_vec)]
-    lower_bound = [[float("-inf") for _ in range(len(partitions))] for _ in range(num_vec)]
-    children = []
-
-    for i, partition in enumerate(partitions):
-        # 计算该子节点中数据在 *所有* k 个法向量方向上的 Min/Max
-        # 这些边界将作为查询时的"截距"范围用于剪枝
+        # 所有数据在每个法向量上的投影 (num_vec, n)，划分与计算上下界都复用
+        projections = np.array([projections_from_block(block, vector) for vector in matrix_A]).reshape(num_vec, -1)
+
+        # 初始化划分（以节点数据中的下标表示）
+        partitions = [np.arange(len(remaining_data))]
+
+        # 遍历矩阵的每一行 (每一个法向量)
         for j in range(num_vec):
+            new_partitions = []
+            for partition in partitions:
+                if len(partition) > 0:
+                    # 对当前 partition，基于当前法向量的投影进行基数平衡划分
+                    new_partitions.extend(split_indices_by_projection(partition, projections[j], num_regions))
+            partitions = new_partitions
+
+        # 初始化上下界矩阵
+        upper_bound = [[float("inf") for _ in range(len(partitions))] for _ in range(num_vec)]
+        lower_bound = [[float("-inf") for _ in range(len(partitions))] for _ in range(num_vec)]
+
+        for i, partition in enumerate(partitions):
+            # 该子节点中数据在 *所有* k 个法向量方向上的 Min/Max
+            # 这些边界将作为查询时的"截距"范围用于剪枝
             if len(partition) > 0:
-                current_vector = matrix_A[j]
-                # 计算当前子节点所有数据在该法向量上的投影值
-                proj_values = []
-                for obj in partition:
-                    val = compute_projection(obj, current_vector, pivots, distance_function)
-                    proj_values.append(val)
-                lower_bound[j][i] = min(proj_values)
-                upper_bound[j][i] = max(proj_values)
-        children.append(LPTBulkload(partition, max_leaf_size, distance_function, pivot_selector, pivot_k, matrix_A, num_regions))
+                for j in range(num_vec):
+                    lower_bound[j][i] = float(projections[j, partition].min())
+                    upper_bound[j][i] = float(projections[j, partition].max())
+
+    # 递归构建子节点
+    children = [build_subtree(scheduler, LPTBulkload, subset(remaining_data, partition), max_leaf_size,
+                              distance_function, pivot_selector, pivot_k, matrix_A, num_regions)
+                for partition in partitions]
 
     return LPTInternalNode(pivots, children, lower_bound, upper_bound)
 
@@ -104,16 +110,70 @@ def compute_projection(obj, vector, pivots, distance_function):
     return val
 
 
+def compute_projections(data, vector, pivots, distance_function):
+    """
+    批量计算一组对象在特定法向量下的投影值，与逐个调用 compute_projection 结果一致
+    :return: 形状为 (len(data),) 的投影数组
+    """
+    val = np.zeros(len(data))
+    for i, coeff in enumerate(vector):
+        if coeff != 0:  # 优化：系数为0时不计算距离
+            val += coeff * distance_function.compute_many(pivots[i], data)
+    return val
+
+
+def pivot_distance_block(data, matrix_A, pivots, distance_function):
+    """
+    计算支撑点到一组对象的距离块 (len(pivots), len(data))
+    所有法向量中系数都为 0 的支撑点不参与投影，对应行不计算（置 0）
+    """
+    block = np.zeros((len(pivots), len(data)))
+    used = np.any(np.asarray(matrix_A) != 0, axis=0)
+    for i in np.flatnonzero(used):
+        block[i] = distance_function.compute_many(pivots[i], data)
+    return block
+
+
+def projections_from_block(block, vector):
+    """
+    由距离块计算投影值，与 compute_projections 的计算顺序一致
+    :param block: 支撑点到对象的距离块 (len(pivots), n)
+    :return: 形状为 (n,) 的投影数组
+    """
+    val = np.zeros(block.shape[1])
+    for i, coeff in enumerate(vector):
+        if coeff != 0:  # 优化：系数为0时不参与计算
+            val += coeff * block[i]
+    return val
+
+
+def split_indices_by_projection(indices, projections, num_regions):
+    """
+    根据已算出的投影值，把一组下标进行基数平衡划分（与 split_by_vector_rule 的划分结果一致）
+    :param indices: 当前子集在节点数据中的下标
+    :param projections: 节点全部数据的投影值
+    :return: 划分后的下标数组列表
+    """
+    order = indices[np.argsort(projections[indices], kind="stable")]
+    partition_size = len(indices) // num_regions
+    partitions = []
+    for i in range(num_regions):
+        start = i * partition_size
+        end = start + partition_size if i < num_regions - 1 else len(indices)
+        partitions.append(order[start:end])
+    return partitions
+
+
 def split_by_vector_rule(data, vector, pivots, distance_function, num_regions):
     """
     基于法向量规则计算距离值，并进行基数平衡划分 (Equi-depth / Quantile Split)
     """
-    distances = [(point, compute_projection(point, vector, pivots, distance_function)) for point in data]
-    distances.sort(key=lambda x: x[1])
+    projections = compute_projections(data, vector, pivots, distance_function)
+    order = np.argsort(projections, kind="stable")
     partition_size = len(data) // num_regions
     partitions = []
     for i in range(num_regions):
         start = i * partition_size
         end = start + partition_size if i < num_regions - 1 else len(data)
-        partitions.append([x[0] for x in distances[start:end]])  # 划分数据
+        partitions.append(subset(data, order[start:end]))  # 划分数据
     return partitions
@@ -1,5 +1,11 @@
+import numpy as np
+
 from Algorithm.SelectorCore import PivotSelector
+from Core.Data.VectorDataset import subset
 from Index.Structure.PivotTable import PivotTable
+from Index.Structure.ParallelBuild import build_subtree
+from Core.DistanceFunction.ProfilingDistance import distance_site
+from Utils.buildTimer import build_phase
 
 
 def mvpt_split_data(data, vantage_point, num_regions, distance_function):
@@ -11,14 +17,32 @@ def mvpt_split_data(data, vantage_point, num_regions, distance_function):
     :param distance_function: 距离函数
     :return: 划分后的数据列表
     """
-    distances = [(point, distance_function.compute(vantage_point, point)) for point in data]
-    distances.sort(key=lambda x: x[1])  # 按距离排序
+    distances = distance_function.compute_many(vantage_point, data)
+    order = np.argsort(distances, kind="stable")  # 按距离排序
     partition_size = len(data) // num_regions
     partitions = []
     for i in range(num_regions):
         start = i * partition_size
         end = start + partition_size if i < num_regions - 1 else len(data)
-        partitions.append([x[0] for x in distances[start:end]])  # 划分数据
+        partitions.append(subset(data, order[start:end]))  # 划分数据
+    return partitions
+
+
+def mvpt_split_indices(indices, distances, num_regions):
+    """
+    根据已算出的到优势点的距离，把一组下标划分为多个区域（与 mvpt_split_data 的划分结果一致）
+    :param indices: 当前子集在节点数据中的下标
+    :param distances: 节点全部数据到优势点的距离
+    :param num_regions: 区域数量
+    :return: 划分后的下标数组列表
+    """
+    order = indices[np.argsort(distances[indices], kind="stable")]  # 按距离排序
+    partition_size = len(indices) // num_regions
+    partitions = []
+    for i in range(num_regions):
+        start = i * partition_size
+        end = start + partition_size if i < num_regions - 1 else len(indices)
+        partitions.append(order[start:end])
     return partitions
 
 
@@ -31,7 +55,7 @@ class MVPTInternalNode:
         self.upper_bound = upper_bound  # 每棵子树到每个支撑点的距离上界矩阵
 
 
-def MVPTBulkload(data, max_leaf_size, distance_function, pivot_selector: PivotSelector, pivot_k: int = 1, num_regions: int = 2, internal_pivot_k: int = 2):
+def MVPTBulkload(data, max_leaf_size, distance_function, pivot_selector: PivotSelector, pivot_k: int = 1, num_regions: int = 2, internal_pivot_k: int = 2, scheduler=None):
     """
     批量构建MVPT（多优势点树）
     :param data: 当前子树数据
@@ -41,6 +65,7 @@ def MVPTBulkload(data, max_leaf_size, distance_function, pivot_selector: PivotSe
     :param pivot_k: 叶子节点支撑点数量
     :param num_regions: 每个支撑点划分的区域数
     :param internal_pivot_k: 内部节点支撑点数量
+    :param scheduler: 并行构建的子树调度器（见 ParallelBuild.parallel_bulkload），None 表示串行构建
     :return: MVPT树的根节点（MVPTInternalNode 或 PivotTable）
     """
     if len(data) == 0:
@@ -54,33 +79,41 @@ def MVPTBulkload(data, max_leaf_size, distance_function, pivot_selector: PivotSe
     if len(data) < internal_pivot_k:
         return PivotTable(data, distance_function, pivot_selector, max_leaf_size, pivot_k)
     
-    # 选择支撑点
-    pivots, remaining_data = pivot_selector.select(data, internal_pivot_k, "MVPT内部节点")
+    # 选择支撑点，并一次性得到支撑点到其余数据的距离块 (internal_pivot_k, n)，划分与计算上下界都复用该距离块
+    with build_phase("pivot_selection"), distance_site("selector"):
+        pivots, remaining_data, block = pivot_selector.select_with_distances(data, internal_pivot_k, "MVPT内部节点")
     
-    # 初始化划分
-    partitions = [remaining_data]
-    
-    # 按支撑点划分数据集
-    for i in range(internal_pivot_k):
-        new_partitions = []
-        for partition in partitions:
+    with build_phase("partitioning"), distance_site("builder"):
+        if block is None:
+            block = distance_function.compute_matrix(pivots, remaining_data)
+        
+        # 初始化划分（以节点数据中的下标表示）
+        partitions = [np.arange(len(remaining_data))]
+        
+        # 按支撑点划分数据集
+        for i in range(internal_pivot_k):
+            new_partitions = []
+            for partition in partitions:
+                if len(partition) > 0:
+                    # 每个现子集基于当前支撑点划分成num_regions个新子集
+                    new_partitions.extend(mvpt_split_indices(partition, block[i], num_regions))
+            partitions = new_partitions
+        
+        # 初始化上下界矩阵
+        upper_bound = [[float("inf") for _ in range(len(partitions))] for _ in range(internal_pivot_k)]
+        lower_bound = [[float("-inf") for _ in range(len(partitions))] for _ in range(internal_pivot_k)]
+        
+        # 计算每个子集的上下界
+        for i, partition in enumerate(partitions):
             if len(partition) > 0:
-                # 每个现子集基于当前支撑点划分成num_regions个新子集
-                new_partitions.extend(mvpt_split_data(partition, pivots[i], num_regions, distance_function))
-        partitions = new_partitions
-    
-    # 初始化上下界矩阵和子节点集合
-    upper_bound = [[float("inf") for _ in range(len(partitions))] for _ in range(internal_pivot_k)]
-    lower_bound = [[float("-inf") for _ in range(len(partitions))] for _ in range(internal_pivot_k)]
-    children = []
+                distances = block[:, partition]
+                for j in range(internal_pivot_k):
+                    lower_bound[j][i] = float(distances[j].min())  # 计算下界
+                    upper_bound[j][i] = float(distances[j].max())  # 计算上界
     
-    # 计算每个子集的上下界并递归构建子节点
-    for i, partition in enumerate(partitions):
-        for j in range(internal_pivot_k):
-            if len(partition) > 0:
-                distances = [distance_function.compute(pivots[j], p) for p in partition]
-                lower_bound[j][i] = min(distances)  # 计算下界
-                upper_bound[j][i] = max(distances)  # 计算上界
-        children.append(MVPTBulkload(partition, max_leaf_size, distance_function, pivot_selector, pivot_k, num_regions, internal_pivot_k))
+    # 递归构建子节点
+    children = [build_subtree(scheduler, MVPTBulkload, subset(remaining_data, partition), max_leaf_size,
+                              distance_function, pivot_selector, pivot_k, num_regions, internal_pivot_k)
+                for partition in partitions]
     
     return MVPTInternalNode(pivots, children, lower_bound, upper_bound)
@@ -0,0 +1,172 @@
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from Core.Data.VectorDataset import VectorDataset
+from Core.DistanceFunction.CountingDistance import CountingDistance
+from Utils.sharedMemory import share_array, release_array, attach_arrays
+from Utils.buildTimer import BuildTimer, active_timer
+
+# 默认的子树任务规模：不超过该规模（且大于叶子容量）的子树整体交给一个进程构建
+DEFAULT_TASK_SIZE = 20000
+
+
+class _PendingSubtree:
+    """交给进程池构建、尚未取回的子树"""
+
+    def __init__(self, future, dataset, args):
+        self.future = future
+        self.dataset = dataset
+        self.args = args
+
+    def result(self):
+        subtree, snapshots, phase_totals = self.future.result()
+        # 工作进程中的距离计算统计与分阶段构建耗时累加回主进程
+        for position, snapshot in snapshots.items():
+            self.args[position].merge(snapshot)
+        timer = active_timer()
+        if timer is not None and phase_totals is not None:
+            timer.add(phase_totals)
+        if isinstance(subtree, dict):
+            # 向量数据集的子树以编号数组形式返回，数据对象从父进程的数据集中取回
+            from Index.Structure.IndexStorage import index_from_arrays
+            return index_from_arrays(subtree, self.dataset)
+        return subtree
+
+
+class BuildScheduler:
+    """
+    并行批量构建的子树调度器
+    规模大于 task_size 的节点在主进程中构建（选择支撑点并划分数据），
+    规模不超过 task_size 且大于叶子容量的子树作为独立任务，在进程池中串行构建。
+    每个任务在主进程中按深度优先顺序抽取一个随机种子，任务开始前用它重置 random 模块，
+    因此树的结构只取决于 task_size，与进程数无关；workers=1 时在主进程中按同样方式构建。
+    向量数据集放入共享内存，任务只携带子树数据在数据集中的位置数组。
+    """
+
+    def __init__(self, dataset, max_leaf_size: int, workers: int = 1, task_size: int = DEFAULT_TASK_SIZE):
+        self.dataset = dataset
+        self.max_leaf_size = max_leaf_size
+        self.workers = max(1, int(workers))
+        self.task_size = max(int(task_size), max_leaf_size + 1)
+        self._pool = None
+        self._shared = None
+        self._locate = None
+
+    def __enter__(self):
+        if self.workers > 1:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            if isinstance(self.dataset, VectorDataset):
+                from Index.Structure.IndexStorage import id_locator
+                self._shared = [share_array(self.dataset.vectors), share_array(self.dataset.ids)]
+                self._locate = id_locator(self.dataset)
+        return self
+
+    def __exit__(self, *exc):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=exc[0] is not None)
+            self._pool = None
+        if self._shared is not None:
+            shms = [shm for shm, _, _ in self._shared]
+            self._shared = None
+            for shm in shms:
+                release_array(shm)
+        return False
+
+    def subtree(self, builder, data, args: tuple):
+        """
+        构建一棵子树
+        :param builder: 批量构建函数（模块级函数，例如 VPTBulkload）
+        :param data: 子树数据
+        :param args: 除数据外传给 builder 的位置参数
+        :return: 子树根节点，或交给进程池后的占位对象
+        """
+        if len(data) > self.task_size:
+            return builder(data, *args, scheduler=self)
+        if len(data) <= self.max_leaf_size:
+            return builder(data, *args)
+
+        seed = random.getrandbits(63)
+        if self._pool is None:
+            # 串行模式：与进程池中的任务相同，用独立的种子构建子树，完成后恢复主进程的随机状态
+            state = random.getstate()
+            random.seed(seed)
+            try:
+                return builder(data, *args)
+            finally:
+                random.setstate(state)
+
+        if self._shared is not None:
+            specs = [spec for _, _, spec in self._shared]
+            payload = self._locate(data.get_ids())
+        else:
+            specs, payload = None, data
+        timed = active_timer() is not None
+        future = self._pool.submit(_build_subtree_worker, builder, args, seed, specs, payload, timed)
+        return _PendingSubtree(future, self.dataset, args)
+
+    def resolve(self, node):
+        """等待所有子树任务完成，并把占位对象替换为子树"""
+        if isinstance(node, _PendingSubtree):
+            return node.result()
+        if hasattr(node, "children"):
+            node.children = [self.resolve(child) for child in node.children]
+        for attr in ("left", "right"):
+            if hasattr(node, attr):
+                setattr(node, attr, self.resolve(getattr(node, attr)))
+        return node
+
+
+def build_subtree(scheduler, builder, data, *args):
+    """
+    递归构建子树：没有调度器时直接构建，否则由调度器决定在主进程中构建还是交给进程池
+    """
+    if scheduler is None:
+        return builder(data, *args)
+    return scheduler.subtree(builder, data, args)
+
+
+def parallel_bulkload(builder, data, *args, workers: int = 1, task_size: int = DEFAULT_TASK_SIZE):
+    """
+    并行批量构建索引树
+    :param builder: VPTBulkload / GHTBulkload / MVPTBulkload / LPTBulkload
+    :param data: 数据集
+    :param args: 除数据外传给 builder 的位置参数（第一个为 max_leaf_size）
+    :param workers: 进程数
+    :param task_size: 子树任务规模，相同 task_size 下任意进程数构建出的树完全相同
+    :return: 树的根节点，已建立扁平化布局（见 SubtreeLayout）
+    """
+    from Index.Structure.SubtreeLayout import build_subtree_layout
+    with BuildScheduler(data, args[0], workers, task_size) as scheduler:
+        root = scheduler.resolve(builder(data, *args, scheduler=scheduler))
+    build_subtree_layout(root)
+    return root
+
+
+def _build_subtree_worker(builder, args, seed, specs, payload, timed=False):
+    """进程池中的子树构建任务，timed 为 True 时同时返回各构建阶段的耗时"""
+    if specs is not None:
+        vectors, ids = attach_arrays(*specs)
+        data = VectorDataset(vectors[payload], ids[payload])
+    else:
+        data = payload
+    # 距离函数副本中带有主进程已有的统计，先清零，只统计本任务的计算
+    counters = {position: arg for position, arg in enumerate(args) if isinstance(arg, CountingDistance)}
+    for counter in counters.values():
+        counter.clear()
+    # 任务已在进程池中运行，支撑点选择器不再嵌套进程池（与基准测试工作进程中的处理相同，选出的支撑点与并行评估相同）
+    for arg in args:
+        if getattr(arg, "workers", 1) > 1:
+            arg.workers = 1
+    random.seed(seed)
+    if timed:
+        with BuildTimer() as timer:
+            subtree = builder(data, *args)
+        phase_totals = timer.totals
+    else:
+        subtree = builder(data, *args)
+        phase_totals = None
+    snapshots = {position: counter.snapshot() for position, counter in counters.items()}
+    if specs is not None:
+        from Index.Structure.IndexStorage import index_to_arrays
+        return index_to_arrays(subtree), snapshots, phase_totals
+    return subtree, snapshots, phase_totals
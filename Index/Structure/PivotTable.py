@@ -1,5 +1,10 @@
+import numpy as np
+
 from Algorithm.SelectorCore import PivotSelector
 from Core.MetricSpaceCore import DistanceFunction
+from Core.Data.VectorDataset import get_ids
+from Core.DistanceFunction.ProfilingDistance import distance_site
+from Utils.buildTimer import build_phase
 
 
 class PivotTable:
@@ -15,26 +20,52 @@ class PivotTable:
         if len(data) > max_leaf_size:
             raise IndexError(f"Number of data ({len(data)}) larger than max_leaf_size ({max_leaf_size})")
         
-        # 使用支撑点选择器选择支撑点
-        self.pivots, self.pivot_data = pivot_selector.select(data, pivot_k, "PivotTable叶子节点")
-        if self.pivot_data is None:
-            self.pivot_data = []
-        
-        # 计算所有数据点到支撑点的距离
-        self.distance = [
-            [distance_function.compute(pivot, point) for point in self.pivot_data] for pivot in self.pivots
-        ]
+        # 叶子的支撑点选择与距离表计算都计入构建计时的叶子构建阶段
+        with build_phase("leaf_construction"):
+            # 使用支撑点选择器选择支撑点，选择器在选择过程中已算出的距离表直接复用
+            with distance_site("selector"):
+                self.pivots, self.pivot_data, distance = pivot_selector.select_with_distances(data, pivot_k, "PivotTable叶子节点")
+            if self.pivot_data is None:
+                self.pivot_data = []
+            
+            # 计算所有数据点到支撑点的距离，形状为 (支撑点数, 数据点数)
+            if distance is None:
+                with distance_site("builder"):
+                    distance = distance_function.compute_matrix(self.pivots, self.pivot_data)
+        self.distance = distance
+        # 支撑点与数据点在原始数据集中的编号
+        self.pivot_ids = get_ids(self.pivots)
+        self.data_ids = get_ids(self.pivot_data)
         self.max_leaf_size = max_leaf_size
         self.pivot_k = pivot_k
 
+    @classmethod
+    def from_arrays(cls, pivots, pivot_data, distance, max_leaf_size: int, pivot_k: int):
+        """
+        由已有的支撑点、数据与距离表直接构造 PivotTable（不重新计算距离），用于加载已保存的索引
+        :param distance: 形状为 (支撑点数, 数据点数) 的距离表，可以是内存映射数组
+        """
+        table = cls.__new__(cls)
+        table.pivots = pivots
+        table.pivot_data = pivot_data
+        table.distance = distance
+        table.pivot_ids = get_ids(pivots)
+        table.data_ids = get_ids(pivot_data)
+        table.max_leaf_size = max_leaf_size
+        table.pivot_k = pivot_k
+        return table
+
     def get_pivots(self):
         return self.pivots
 
     def get_distance(self, pivot: int, point: int):
-        return self.distance[pivot][point]
+        return float(self.distance[pivot, point])
 
-    def get_all_distance(self):
+    def get_all_distance(self) -> np.ndarray:
         return self.distance
 
     def get_data(self):
         return self.pivot_data
+
+    def get_data_ids(self) -> np.ndarray:
+        return self.data_ids
@@ -0,0 +1,109 @@
+import numpy as np
+
+from Core.Data.VectorDataset import VectorDataset, get_ids
+from Index.Structure.PivotTable import PivotTable
+from Index.Structure.VantagePointTree import VPTInternalNode
+from Index.Structure.GeneralHyperPlaneTree import GHTInternalNode
+
+
+class SubtreeLayout:
+    """
+    索引树的扁平化数据布局
+    按先序遍历顺序依次排列每个节点的支撑点和叶子数据，每个节点（包括叶子）记录其子树在排列中的区间 [start, end)，
+    因此任意子树的全部数据对象就是 objects[start:end]，对应编号就是 ids[start:end]
+    """
+
+    def __init__(self, objects, ids: np.ndarray):
+        self.objects = objects  # 重排后的数据对象（VectorDataset 或对象列表）
+        self.ids = ids  # 重排后的对象编号
+
+    def objects_of(self, node):
+        """节点子树中的全部数据对象（包括支撑点）"""
+        return self.objects[node.start:node.end]
+
+    def ids_of(self, node) -> np.ndarray:
+        """节点子树中全部数据对象的编号"""
+        return self.ids[node.start:node.end]
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def build_subtree_layout(root):
+    """
+    为构建好的索引树建立扁平化布局，给每个节点设置 layout、start、end 属性
+    叶子节点的支撑点与数据改为引用布局中的切片，因此向量数据集不会额外占用内存
+    :param root: 索引树的根节点（内部节点或 PivotTable），None 表示空树
+    :return: SubtreeLayout，空树返回 None
+    """
+    if root is None:
+        return None
+
+    pieces = []
+    nodes = []
+    size = 0
+
+    def visit(node):
+        nonlocal size
+        nodes.append(node)
+        node.start = size
+        for piece in _routing_objects(node):
+            if len(piece) > 0:
+                pieces.append(piece)
+                size += len(piece)
+        for child in _children(node):
+            if child is not None:
+                visit(child)
+        node.end = size
+
+    visit(root)
+
+    ids = np.concatenate([get_ids(piece) for piece in pieces]) if pieces else np.empty(0, dtype=np.int64)
+    layout = SubtreeLayout(_concat(pieces), ids)
+    for node in nodes:
+        node.layout = layout
+        if isinstance(node, PivotTable):
+            split = node.start + len(node.get_pivots())
+            node.pivots = layout.objects[node.start:split]
+            node.pivot_data = layout.objects[split:node.end]
+    return layout
+
+
+def _routing_objects(node):
+    """节点自身保存的数据对象：叶子为支撑点与数据，内部节点为支撑点"""
+    if isinstance(node, PivotTable):
+        return [node.get_pivots(), node.get_data()]
+    if isinstance(node, VPTInternalNode):
+        return [[node.pivot]]
+    if isinstance(node, GHTInternalNode):
+        return [[node.c1, node.c2]]
+    return [node.pivots]
+
+
+def _children(node):
+    if isinstance(node, PivotTable):
+        return []
+    if isinstance(node, (VPTInternalNode, GHTInternalNode)):
+        return [node.left, node.right]
+    return node.children
+
+
+def _concat(pieces):
+    """按顺序拼接各段数据对象：含向量数据集时拼成一个 VectorDataset，否则拼成列表"""
+    if any(isinstance(piece, VectorDataset) for piece in pieces):
+        parts = [piece if isinstance(piece, VectorDataset) else VectorDataset.from_list(list(piece)) for piece in pieces]
+        return VectorDataset(np.concatenate([part.vectors for part in parts]),
+                             np.concatenate([part.ids for part in parts]))
+    return [obj for piece in pieces for obj in piece]
+
+
+def subtree_ids(node) -> np.ndarray:
+    """
+    节点子树中全部数据对象（包括支撑点）的编号
+    已建立布局时为布局中的一段切片，否则递归收集
+    """
+    if getattr(node, "layout", None) is not None:
+        return node.layout.ids_of(node)
+    parts = [get_ids(piece) for piece in _routing_objects(node)]
+    parts.extend(subtree_ids(child) for child in _children(node) if child is not None)
+    return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
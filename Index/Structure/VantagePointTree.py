@@ -1,5 +1,11 @@
+import numpy as np
+
 from Algorithm.SelectorCore import PivotSelector
+from Core.Data.VectorDataset import subset
 from Index.Structure.PivotTable import PivotTable
+from Index.Structure.ParallelBuild import build_subtree
+from Core.DistanceFunction.ProfilingDistance import distance_site
+from Utils.buildTimer import build_phase
 
 
 class VPTInternalNode:
@@ -11,7 +17,7 @@ class VPTInternalNode:
         self.right = right  # 右子树
 
 
-def VPTBulkload(data, max_leaf_size, distance_function, pivot_selector: PivotSelector, pivot_k: int = 1):
+def VPTBulkload(data, max_leaf_size, distance_function, pivot_selector: PivotSelector, pivot_k: int = 1, scheduler=None):
     """
     批量构建VPT（优势点树）
     :param data: 当前子树数据
@@ -19,6 +25,7 @@ def VPTBulkload(data, max_leaf_size, distance_function, pivot_selector: PivotSel
     :param distance_function: 距离函数
     :param pivot_selector: 支撑点选择器
     :param pivot_k: 叶子节点支撑点数量
+    :param scheduler: 并行构建的子树调度器（见 ParallelBuild.parallel_bulkload），None 表示串行构建
     :return: VPT树的根节点（VPTInternalNode 或 PivotTable）
     """
     if len(data) == 0:
@@ -29,28 +36,28 @@ def VPTBulkload(data, max_leaf_size, distance_function, pivot_selector: PivotSel
         return PivotTable(data, distance_function, pivot_selector, max_leaf_size, pivot_k)
     
     # 选择一个优势点
-    pivots, remaining_data = pivot_selector.select(data, 1, "VPT内部节点")
+    with build_phase("pivot_selection"), distance_site("selector"):
+        pivots, remaining_data = pivot_selector.select(data, 1, "VPT内部节点")
     vantage_point = pivots[0]
     
-    # 计算所有点到优势点的距离
-    distances = []
-    for point in remaining_data:
-        dist = distance_function.compute(vantage_point, point)
-        distances.append((dist, point))
-    
-    # 按距离排序
-    distances.sort(key=lambda x: x[0])
-    
-    # 找到中位数距离作为划分半径
-    median_idx = len(distances) // 2
-    split_radius = distances[median_idx][0]
-    
-    # 划分数据
-    left_data = [point for dist, point in distances[:median_idx]]
-    right_data = [point for dist, point in distances[median_idx:]]
-    
+    with build_phase("partitioning"), distance_site("builder"):
+        # 计算所有点到优势点的距离
+        distances = distance_function.compute_many(vantage_point, remaining_data)
+
+        # 按距离排序（稳定排序，保证相同距离时顺序确定）
+        order = np.argsort(distances, kind="stable")
+
+        # 找到中位数距离作为划分半径
+        median_idx = len(distances) // 2
+        split_radius = distances[order[median_idx]]
+
+        # 划分数据
+        left_data = subset(remaining_data, order[:median_idx])
+        right_data = subset(remaining_data, order[median_idx:])
+
     # 递归构建子树
-    left_child = VPTBulkload(left_data, max_leaf_size, distance_function, pivot_selector, pivot_k)
-    right_child = VPTBulkload(right_data, max_leaf_size, distance_function, pivot_selector, pivot_k)
+    args = (max_leaf_size, distance_function, pivot_selector, pivot_k)
+    left_child = build_subtree(scheduler, VPTBulkload, left_data, *args)
+    right_child = build_subtree(scheduler, VPTBulkload, right_data, *args)
     
     return VPTInternalNode(vantage_point, split_radius, left_child, right_child)
\ No newline at end of file
@@ -0,0 +1,50 @@
+import numpy as np
+
+from Core.Data.VectorDataset import VectorDataset
+from Core.DistanceFunction.CountingDistance import CountingDistance
+from Core.DistanceFunction.MinkowskiDistance import MinkowskiDistance
+from Tests.knn_search_check import build_indexes
+
+
+def check_batch_range_search(queries, distance_func, indexes, radii, batch_sizes):
+    """
+    各索引的批量范围查询与逐个查询必须给出相同的命中编号、距离（包含规则命中的对象均为 NaN）和距离计算次数，
+    且距离函数累计的计算次数等于各查询次数之和
+    """
+    ok = True
+    for index_type, (index, query_func, batch_query_func, _) in indexes.items():
+        for radius in radii:
+            single = [query_func(index, query, distance_func, radius) for query in queries]
+            for batch_size in batch_sizes:
+                distance_func.reset()
+                for start in range(0, len(queries), batch_size):
+                    batch = queries[start:start + batch_size]
+                    batch_ids, batch_distances, batch_counts = batch_query_func(index, batch, distance_func, radius)
+                    for n, (ids, distances, count) in enumerate(zip(batch_ids, batch_distances, batch_counts)):
+                        expected_ids, expected_distances, expected_count = single[start + n]
+                        order, expected_order = np.argsort(ids), np.argsort(expected_ids)
+                        if not (np.array_equal(ids[order], expected_ids[expected_order]) and
+                                np.allclose(distances[order], expected_distances[expected_order], rtol=0, atol=1e-12,
+                                            equal_nan=True) and count == expected_count):
+                            print(f"❌ {index_type} 批量查询（半径 {radius}，batch_size {batch_size}）的第 {start + n} 个查询"
+                                  f"与逐个查询不同：命中 {len(ids)}/{len(expected_ids)} 个，"
+                                  f"距离计算 {count}/{expected_count} 次")
+                            ok = False
+                total = distance_func.reset()
+                if total != sum(count for _, _, count in single):
+                    print(f"❌ {index_type} 批量查询的距离计算总次数 {total} 与各查询之和不同")
+                    ok = False
+    if ok:
+        print(f"✅ 五种索引的批量范围查询与逐个查询一致（半径: {radii}，batch_size: {batch_sizes}）")
+    return ok
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(1)
+    dataset = VectorDataset(rng.random((2000, 3)))
+    queries = VectorDataset(np.concatenate([dataset.vectors[:60], rng.random((40, 3))]))
+    distance_func = CountingDistance(MinkowskiDistance(t=2))
+    indexes = build_indexes(dataset, distance_func)
+    # 较大的半径使包含规则命中整棵子树
+    result = check_batch_range_search(queries, distance_func, indexes, [0.05, 0.2, 0.6], [1, 7, 100])
+    print("\n全部检查通过" if result else "\n存在未通过的检查")
@@ -0,0 +1,76 @@
+import random
+
+from Core.Data.StringData import StringData
+from Core.DistanceFunction.EditDistance import EditDistance, _bit_parallel_distance, _banded_distance, _two_row_distance
+
+
+def reference_edit_distance(s1, s2):
+    """完整 (m+1)×(n+1) 动态规划表的编辑距离，作为各算法的对照"""
+    m, n = len(s1), len(s2)
+    dp = [[0] * (n + 1) for _ in range(m + 1)]
+    for i in range(m + 1):
+        dp[i][0] = i
+    for j in range(n + 1):
+        dp[0][j] = j
+    for i in range(1, m + 1):
+        for j in range(1, n + 1):
+            cost = 0 if s1[i - 1] == s2[j - 1] else 1
+            dp[i][j] = min(dp[i - 1][j] + 1, dp[i][j - 1] + 1, dp[i - 1][j - 1] + cost)
+    return dp[m][n]
+
+
+def random_string_pairs(num, alphabet, max_length, seed=0):
+    """随机字符串对，包含空串、相同字符串与超过 64 个字符（多个机器字）的字符串"""
+    rng = random.Random(seed)
+    pairs = [("", ""), ("", "abc"), ("kitten", "sitting"), ("abc", "abc")]
+    for _ in range(num):
+        s1 = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, max_length)))
+        if rng.random() < 0.3:
+            # 少量编辑得到的相似字符串
+            s2 = list(s1)
+            for _ in range(rng.randint(0, 5)):
+                if s2 and rng.random() < 0.5:
+                    del s2[rng.randrange(len(s2))]
+                else:
+                    s2.insert(rng.randint(0, len(s2)), rng.choice(alphabet))
+            s2 = "".join(s2)
+        else:
+            s2 = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, max_length)))
+        pairs.append((s1, s2))
+    return pairs
+
+
+def check_edit_distance_kernels(pairs, limits):
+    """位并行、两行动态规划、对角带动态规划以及 EditDistance 的两个接口都必须与完整动态规划表一致"""
+    dist_func = EditDistance()
+    failures = 0
+    for s1, s2 in pairs:
+        expected = reference_edit_distance(s1, s2)
+        short, long = (s1, s2) if len(s1) <= len(s2) else (s2, s1)
+        results = {"compute": dist_func.compute(StringData(s1), StringData(s2)),
+                   "_two_row_distance": _two_row_distance(short, long),
+                   # 带宽取较长字符串的长度时对角带覆盖整个矩阵
+                   "_banded_distance": _banded_distance(short, long, len(long))}
+        if short:
+            results["_bit_parallel_distance"] = _bit_parallel_distance(short, long)
+        for name, value in results.items():
+            if value != expected:
+                print(f"❌ {name}({s1!r}, {s2!r}) = {value}，应为 {expected}")
+                failures += 1
+        for limit in limits:
+            bounded = dist_func.compute_bounded(StringData(s1), StringData(s2), limit)
+            if (expected <= limit and bounded != expected) or (expected > limit and not bounded > limit):
+                print(f"❌ compute_bounded({s1!r}, {s2!r}, {limit}) = {bounded}，编辑距离为 {expected}")
+                failures += 1
+    if failures == 0:
+        print(f"✅ {len(pairs)} 对字符串上各编辑距离算法与完整动态规划表一致")
+    return failures == 0
+
+
+if __name__ == "__main__":
+    results = [
+        # 小字母表（DNA）与蛋白质字母表，长度跨过 64 位边界
+        check_edit_distance_kernels(random_string_pairs(300, "ACGT", 150, seed=0), [0, 2, 10, 50, float("inf")]),
+        check_edit_distance_kernels(random_string_pairs(300, "ACDEFGHIKLMNPQRSTVWY", 90, seed=1), [1, 8, 30, float("inf")]),
+    ]
+    print("\n全部检查通过" if all(results) else "\n存在未通过的检查")
@@ -0,0 +1,99 @@
+import random
+from functools import partial
+
+import numpy as np
+
+from Core.Data.VectorDataset import VectorDataset
+from Core.DistanceFunction.CountingDistance import CountingDistance
+from Core.DistanceFunction.MinkowskiDistance import MinkowskiDistance
+from Index.Search.KnnSearch import PTKnnSearch
+from Index.Search.VantagePointTreeSearch import VPTKnnSearch
+from Index.Search.GeneralHyperPlaneTreeSearch import GHTKnnSearch
+from Index.Search.MultipleVantagePointTreeSearch import MVPTKnnSearch
+from Index.Search.LinearPartitionSearch import LPTKnnSearch
+from Utils.config_runner import make_pivot_selector, index_algorithms, build_index
+
+LPT_MATRIX_A = [[1, -1, 0], [1, 1, 0], [0, 0, 1]]
+INDEX_CONFIGS = {
+    "pivot_table": {"max_leaf_size": 2000, "pivot_k": 3},
+    "VPT": {"max_leaf_size": 30, "pivot_k": 2},
+    "GHT": {"max_leaf_size": 30, "pivot_k": 2},
+    "MVPT": {"max_leaf_size": 30, "pivot_k": 2, "mvpt_regions": 3, "mvpt_internal_pivots": 2},
+    "LPT": {"max_leaf_size": 30, "pivot_k": 2, "lpt_matrix_A": LPT_MATRIX_A, "lpt_num_regions": 2},
+}
+KNN_SEARCHES = {
+    "pivot_table": PTKnnSearch,
+    "VPT": VPTKnnSearch,
+    "GHT": GHTKnnSearch,
+    "MVPT": MVPTKnnSearch,
+    "LPT": partial(LPTKnnSearch, matrix_A=LPT_MATRIX_A),
+}
+
+
+def build_indexes(dataset, distance_func, seed=0, index_types=tuple(INDEX_CONFIGS), **config_overrides):
+    """
+    按配置运行器的方式构建索引
+    :param index_types: 要构建的索引类型
+    :param config_overrides: 覆盖 INDEX_CONFIGS 中的索引配置项，例如 build_workers
+    :return: {索引类型: (索引, 范围查询算法, 批量范围查询算法, 构建统计)}
+    """
+    indexes = {}
+    for index_type in index_types:
+        index_config = dict(INDEX_CONFIGS[index_type], **config_overrides)
+        random.seed(seed)
+        pivot_selector = make_pivot_selector("Random", {"seed": seed}, distance_func)
+        index_builder, query_func, batch_query_func, _ = index_algorithms(index_type, index_config, dataset,
+                                                                          distance_func, pivot_selector)
+        index, build_stats = build_index(index_builder, distance_func)
+        indexes[index_type] = (index, query_func, batch_query_func, build_stats)
+    return indexes
+
+
+def check_knn_search(dataset, queries, distance_func, indexes, k_values):
+    """各索引的 kNN 查询距离必须与线性扫描给出的前 k 个距离相同，且返回的编号与距离一一对应"""
+    ok = True
+    for query in queries:
+        brute_force = distance_func.compute_many(query, dataset)
+        expected = np.sort(brute_force)
+        for index_type, (index, *_) in indexes.items():
+            for k in k_values:
+                ids, distances, _ = KNN_SEARCHES[index_type](index, query, distance_func, k)
+                if len(ids) != min(k, len(dataset)) or not np.allclose(distances, expected[:k], rtol=0, atol=1e-12):
+                    print(f"❌ {index_type} kNN（k = {k}）: {distances} != {expected[:k]}")
+                    ok = False
+                elif not np.allclose(brute_force[ids], distances, rtol=0, atol=1e-12):
+                    print(f"❌ {index_type} kNN（k = {k}）返回的距离与编号不对应")
+                    ok = False
+    if ok:
+        print(f"✅ {len(queries)} 个查询上五种索引的 kNN 查询与线性扫描一致（k: {k_values}）")
+    return ok
+
+
+def check_range_search(dataset, queries, distance_func, indexes, radius):
+    """各索引的范围查询结果必须与线性扫描相同（数据集中对象的编号即其下标）"""
+    ok = True
+    for query in queries:
+        expected = set(np.flatnonzero(distance_func.compute_many(query, dataset) <= radius).tolist())
+        for index_type, (index, query_func, *_) in indexes.items():
+            ids, _, _ = query_func(index, query, distance_func, radius)
+            if set(ids.tolist()) != expected or len(ids) != len(expected):
+                print(f"❌ {index_type} 范围查询（半径 {radius}）: 命中 {len(ids)} 个，应为 {len(expected)} 个")
+                ok = False
+    if ok:
+        print(f"✅ {len(queries)} 个查询上五种索引的范围查询与线性扫描一致（半径 {radius}）")
+    return ok
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    dataset = VectorDataset(rng.random((2000, 3)))
+    distance_func = CountingDistance(MinkowskiDistance(t=2))
+    indexes = build_indexes(dataset, distance_func)
+    # 查询点包括数据集中的对象与数据集外的随机点
+    queries = [dataset[int(i)] for i in rng.choice(len(dataset), 20, replace=False)] + \
+        list(VectorDataset(rng.random((20, 3))))
+    results = [
+        check_knn_search(dataset, queries, distance_func, indexes, [1, 5, 20, 100]),
+        check_range_search(dataset, queries, distance_func, indexes, 0.1),
+    ]
+    print("\n全部检查通过" if all(results) else "\n存在未通过的检查")
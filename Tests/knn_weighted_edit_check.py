@@ -0,0 +1,81 @@
+import json
+import os
+import random
+
+import numpy as np
+
+from Core.Data.StringData import StringData
+from Core.DistanceFunction.EditDistance import EditDistance
+from Core.DistanceFunction.WeightedEditDistance import WeightedEditDistance
+from Algorithm.PivotSelection.RandSelection import RandomPivotSelector
+from Index.Structure.PivotTable import PivotTable
+from Index.Structure.VantagePointTree import VPTBulkload
+from Index.Structure.MultipleVantagePoinTree import MVPTBulkload
+from Index.Search.KnnSearch import PTKnnSearch
+from Index.Search.VantagePointTreeSearch import VPTKnnSearch
+from Index.Search.MultipleVantagePointTreeSearch import MVPTKnnSearch
+
+PROTEIN_ALPHABET = "ACDEFGHIKLMNPQRSTVWY"
+mPAM_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Datasets", "Protein", "mPAM.json")
+
+
+def random_protein_strings(num, min_length, max_length, seed=0):
+    """生成随机蛋白质序列，序列编号为其下标"""
+    rng = random.Random(seed)
+    return [StringData("".join(rng.choice(PROTEIN_ALPHABET) for _ in range(rng.randint(min_length, max_length))), i)
+            for i in range(num)]
+
+
+def check_bounded_distance(dataset, dist_func, limits):
+    """compute_bounded 在 limit 以内（含 limit 为无穷大）必须与 compute 相同，超过 limit 时返回值也应超过 limit"""
+    ok = True
+    for x in dataset[:10]:
+        for y in dataset:
+            exact = dist_func.compute(x, y)
+            for limit in limits:
+                bounded = dist_func.compute_bounded(x, y, limit)
+                if (exact <= limit and bounded != exact) or (exact > limit and not bounded > limit):
+                    print(f"❌ {type(dist_func).__name__}: d({x}, {y}) = {exact}，limit = {limit} 时返回 {bounded}")
+                    ok = False
+    if ok:
+        print(f"✅ {type(dist_func).__name__}.compute_bounded 与 compute 一致（limit: {limits}）")
+    return ok
+
+
+def check_knn(dataset, dist_func, k_values):
+    """Pivot Table、VPT、MVPT 的 kNN 查询结果距离必须与线性扫描相同"""
+    pivot_table = PivotTable(dataset, dist_func, RandomPivotSelector(seed=0), len(dataset), 2)
+    vpt = VPTBulkload(dataset, 8, dist_func, RandomPivotSelector(seed=0), 1)
+    mvpt = MVPTBulkload(dataset, 8, dist_func, RandomPivotSelector(seed=0), 1, 2, 2)
+    searches = {
+        "Pivot Table": lambda q, k: PTKnnSearch(pivot_table, q, dist_func, k),
+        "VPT": lambda q, k: VPTKnnSearch(vpt, q, dist_func, k),
+        "MVPT": lambda q, k: MVPTKnnSearch(mvpt, q, dist_func, k),
+    }
+
+    ok = True
+    for query in dataset[:15]:
+        brute_force = np.sort([dist_func.compute(query, obj) for obj in dataset])
+        for k in k_values:
+            for name, search in searches.items():
+                _, distances, _ = search(query, k)
+                if not np.array_equal(distances, brute_force[:k]):
+                    print(f"❌ {name} kNN（k = {k}）查询 {query}: {distances} != {brute_force[:k]}")
+                    ok = False
+    if ok:
+        print(f"✅ {type(dist_func).__name__} 上的 kNN 查询与线性扫描一致（k: {k_values}）")
+    return ok
+
+
+if __name__ == "__main__":
+    with open(mPAM_path, 'r') as f:
+        score_matrix = json.load(f)
+
+    dataset = random_protein_strings(80, 5, 14)
+    results = []
+    for dist_func in (EditDistance(), WeightedEditDistance(score_matrix)):
+        results.append(check_bounded_distance(dataset, dist_func, [0, 3, 10, 40.5, float("inf")]))
+        # k 大于支撑点个数时，前几次验证的上限为无穷大
+        results.append(check_knn(dataset, dist_func, [1, 5, 20]))
+
+    print("\n全部检查通过" if all(results) else "\n存在未通过的检查")
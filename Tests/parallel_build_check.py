@@ -0,0 +1,58 @@
+import numpy as np
+
+from Core.Data.VectorDataset import VectorDataset
+from Core.DistanceFunction.CountingDistance import CountingDistance
+from Core.DistanceFunction.MinkowskiDistance import MinkowskiDistance
+from Index.Structure.IndexStorage import index_to_arrays
+from Tests.knn_search_check import build_indexes
+
+TREE_TYPES = ("VPT", "GHT", "MVPT", "LPT")
+
+
+def check_parallel_build(dataset, queries, radius, workers_list, build_task_size):
+    """
+    启用 build_subtree_seeds 时，不同 build_workers（包括 1）构建出的树、构建距离计算次数
+    以及查询结果与距离计算次数必须完全相同
+    """
+    ok = True
+    reference = {}
+    for workers in workers_list:
+        distance_func = CountingDistance(MinkowskiDistance(t=2))
+        indexes = build_indexes(dataset, distance_func, index_types=TREE_TYPES, build_workers=workers,
+                                build_task_size=build_task_size, build_subtree_seeds=True)
+        for index_type, (index, query_func, _, build_stats) in indexes.items():
+            arrays = index_to_arrays(index)
+            build_count = build_stats["build_distance_count"]
+            answers = []
+            for query in queries:
+                ids, _, count = query_func(index, query, distance_func, radius)
+                answers.append((sorted(ids.tolist()), count))
+            if index_type not in reference:
+                reference[index_type] = (workers, arrays, build_count, answers)
+                continue
+            ref_workers, ref_arrays, ref_count, ref_answers = reference[index_type]
+            # 叶子节点的划分半径等字段为 NaN，比较时视为相等
+            same_tree = arrays.keys() == ref_arrays.keys() and all(
+                np.array_equal(arrays[name], ref_arrays[name], equal_nan=arrays[name].dtype.kind == "f")
+                for name in arrays)
+            if not same_tree:
+                print(f"❌ {index_type}: build_workers={workers} 与 build_workers={ref_workers} 构建出的树不同")
+                ok = False
+            if build_count != ref_count:
+                print(f"❌ {index_type}: 构建距离计算次数 {build_count}（build_workers={workers}）!= {ref_count}")
+                ok = False
+            if answers != ref_answers:
+                print(f"❌ {index_type}: build_workers={workers} 时的查询结果或距离计算次数不同")
+                ok = False
+    if ok:
+        print(f"✅ build_workers 为 {workers_list} 时各树结构、构建与查询的距离计算次数完全相同")
+    return ok
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    dataset = VectorDataset(rng.random((3000, 3)))
+    queries = [dataset[int(i)] for i in rng.choice(len(dataset), 30, replace=False)]
+    # build_task_size 较小，使多个子树任务真正交给进程池
+    result = check_parallel_build(dataset, queries, 0.1, [1, 2, 3], build_task_size=400)
+    print("\n全部检查通过" if result else "\n存在未通过的检查")
@@ -51,14 +51,14 @@ def analyze_pivot_performance_single_t(
             hit_counts = []
 
             for query_index, query_point in enumerate(dataset[:max_queries]):
-                hits, calc_count = PTRangeSearch(
+                hit_ids, _, calc_count = PTRangeSearch(
                     pivot_table=pivot_table,
                     query_point=query_point,
                     distance_function=dist_func,
                     radius=range_radius,
                 )
                 calc_counts.append(calc_count)
-                hit_counts.append(len(hits))
+                hit_counts.append(len(hit_ids))
 
             avg_calc = sum(calc_counts) / len(calc_counts)
             avg_hits = sum(hit_counts) / len(hit_counts)
@@ -10,8 +10,6 @@ def search_minkowski_range(dataset, t_values, range_radius):
     if range_radius is None:
         raise ValueError("range_radius 必须提供，用于范围查询阈值。")
 
-    index_lookup = {obj: idx for idx, obj in enumerate(dataset)}
-
     for t in t_values:
         print(f"===== 使用 Minkowski 距离 t = {t} =====")
         dist_func = MinkowskiDistance(t=t)
@@ -26,14 +24,14 @@ def search_minkowski_range(dataset, t_values, range_radius):
         )
 
         for query_index, query_point in enumerate(dataset):
-            hits, calc_count = PTRangeSearch(
+            hit_ids, _, calc_count = PTRangeSearch(
                 pivot_table=pivot_table,
                 query_point=query_point,
                 distance_function=dist_func,
                 radius=range_radius,
             )
 
-            hit_indices = [index_lookup[hit] for hit in hits]
+            hit_indices = hit_ids.tolist()
 
             print(f"\n查询对象索引 {query_index:2d}，范围半径 {range_radius}")
             print(f"命中索引: {hit_indices if hit_indices else '无'}")
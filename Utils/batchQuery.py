@@ -0,0 +1,188 @@
+import multiprocessing
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from Core.DistanceFunction.CountingDistance import CountingDistance
+from Core.DistanceFunction.ProfilingDistance import distance_site
+
+# 延迟分位数字段（毫秒）：逐个查询时为每个查询的延迟，批量查询时为每批查询的总耗时
+QUERY_LATENCY_FIELDS = ("latency_p50_ms", "latency_p95_ms", "latency_p99_ms", "latency_max_ms")
+BATCH_LATENCY_FIELDS = ("batch_latency_p50_ms", "batch_latency_p95_ms", "batch_latency_p99_ms", "batch_latency_max_ms")
+LATENCY_FIELDS = QUERY_LATENCY_FIELDS + BATCH_LATENCY_FIELDS
+
+# 进程池中各工作进程使用的查询状态（fork 时由父进程直接继承，否则由 _init_worker 从内存映射的索引文件加载）
+_WORKER_STATE = {}
+
+
+def run_queries(index, query_func, distance_func, dataset, radius, start: int, end: int,
+                batch_query_func=None, batch_size: int = 1024):
+    """
+    以数据集中第 start 至 end - 1 个对象为查询点执行范围查询
+    :param batch_query_func: 批量查询算法，提供且 batch_size > 1 时每 batch_size 个查询一起遍历索引，否则逐个调用 query_func
+    :return: (结果个数列表, 距离计算次数列表, 耗时列表（秒）, 失败信息列表)，按查询顺序排列，失败的查询不计入；
+             逐个查询时耗时列表为每个查询的延迟，批量查询时为每批查询的总耗时（各查询没有单独的延迟）
+    """
+    result_counts = []
+    calc_counts = []
+    latencies = []
+    errors = []
+    # 查询中的距离计算归入 search 调用位置（叶子中的候选验证由查询算法标记为 verification）
+    with distance_site("search"):
+        if batch_query_func is not None and batch_size > 1:
+            for batch_start in range(start, end, batch_size):
+                batch_end = min(batch_start + batch_size, end)
+                try:
+                    begin = time.perf_counter()
+                    batch_ids, _, batch_counts = batch_query_func(index, dataset[batch_start:batch_end], distance_func,
+                                                                  radius)
+                    latencies.append(time.perf_counter() - begin)
+                    result_counts.extend(len(ids) for ids in batch_ids)
+                    calc_counts.extend(int(count) for count in batch_counts)
+                except Exception as e:
+                    errors.append(f"第 {batch_start} 至 {batch_end - 1} 个查询失败: {e}")
+        else:
+            for i in range(start, end):
+                try:
+                    begin = time.perf_counter()
+                    result_ids, _, calc_count = query_func(index, dataset[i], distance_func, radius)
+                    latencies.append(time.perf_counter() - begin)
+                    result_counts.append(len(result_ids))
+                    calc_counts.append(int(calc_count))
+                except Exception as e:
+                    errors.append(f"第 {i} 个查询失败: {e}")
+    return result_counts, calc_counts, latencies, errors
+
+
+def parallel_run_queries(index, query_func, distance_func, dataset, radius, n: int, workers: int,
+                         batch_query_func=None, batch_size: int = 1024, index_path: str = None):
+    """
+    在进程池中执行前 n 个查询，结果个数与距离计算次数与 run_queries(..., 0, n, ...) 相同
+    索引只读，支持 fork 的平台上工作进程直接继承父进程中的索引；否则工作进程以内存映射方式加载 index_path
+    （未提供时先把索引保存到临时目录），此时 query_func、batch_query_func 与 distance_func 需要可以序列化
+    :param workers: 进程数
+    :param index_path: save_index 保存的索引目录（例如索引缓存），仅在不支持 fork 时使用
+    :return: (结果个数列表, 距离计算次数列表, 耗时列表（秒，含义同 run_queries）, 失败信息列表)
+    """
+    # 查询按块分配给工作进程，块大小与 batch_size 无关；批量查询时每块内按 min(batch_size, 块大小) 个查询一批，
+    # 各查询的结果个数与距离计算次数与批的划分无关，只有每批总耗时 batch_latency_* 随批的划分变化
+    chunk = max(1, -(-n // (workers * 4)))
+    tasks = [(start, min(start + chunk, n)) for start in range(0, n, chunk)]
+
+    temp_dir = None
+    if "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+        _WORKER_STATE.update(index=index, query_func=query_func, distance_func=distance_func, dataset=dataset,
+                             batch_query_func=batch_query_func)
+        initializer, initargs = None, ()
+    else:
+        context = multiprocessing.get_context("spawn")
+        if index_path is None:
+            from Index.Structure.IndexStorage import save_index
+            temp_dir = tempfile.mkdtemp(prefix="metricspace-index-")
+            save_index(index, temp_dir)
+            index_path = temp_dir
+        initializer = _init_worker
+        initargs = (index_path, query_func, distance_func, dataset, batch_query_func)
+
+    result_counts, calc_counts, latencies, errors = [], [], [], []
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                 initializer=initializer, initargs=initargs) as pool:
+            futures = [pool.submit(_run_chunk, start, end, radius, batch_size) for start, end in tasks]
+            for future in futures:
+                chunk_results, chunk_counts, chunk_latencies, chunk_errors, snapshot = future.result()
+                # 工作进程中距离函数的统计（例如按调用位置的统计）合并回主进程
+                if snapshot is not None:
+                    distance_func.merge(snapshot)
+                result_counts.extend(chunk_results)
+                calc_counts.extend(chunk_counts)
+                latencies.extend(chunk_latencies)
+                errors.extend(chunk_errors)
+    finally:
+        _WORKER_STATE.clear()
+        if temp_dir is not None:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    return result_counts, calc_counts, latencies, errors
+
+
+def query_statistics(index, query_func, distance_func, dataset, radius, query_num=None,
+                     batch_query_func=None, batch_size: int = 1024, workers: int = 1, index_path: str = None):
+    """
+    以数据集中前 query_num 个对象为查询点执行范围查询，统计结果个数、距离计算次数、查询延迟与吞吐量
+    :param query_num: 查询数，None 表示整个数据集
+    :param workers: 进程数，大于 1 时使用 parallel_run_queries，统计结果（耗时除外）与单进程相同
+    :return: (统计结果字典, 失败信息列表)；字典包含 num_queries、avg_result、std_result、avg_calc、std_calc、var_calc、
+             workers、elapsed（秒）、throughput（查询/秒）、amortized_latency_ms（查询耗时之和 / 查询数，毫秒）以及
+             LATENCY_FIELDS 中的延迟分位数（毫秒）：逐个查询时为每个查询延迟的 latency_*，批量查询时为每批总耗时的
+             batch_latency_*，另一组为 None；结果个数与距离计算次数的标准差、方差均为总体统计量（除以 N）
+    """
+    radius = float(radius)
+    n = int(query_num) if query_num is not None else len(dataset)
+    n = min(n, len(dataset))
+
+    batched = batch_query_func is not None and batch_size > 1
+
+    start_time = time.perf_counter()
+    if workers > 1 and n > 1:
+        result_counts, calc_counts, latencies, errors = parallel_run_queries(
+            index, query_func, distance_func, dataset, radius, n, workers, batch_query_func, batch_size, index_path)
+    else:
+        result_counts, calc_counts, latencies, errors = run_queries(index, query_func, distance_func, dataset, radius,
+                                                                    0, n, batch_query_func, batch_size)
+    elapsed = time.perf_counter() - start_time
+
+    if len(calc_counts) > 0:
+        counts_arr = np.asarray(calc_counts, dtype=float)
+        result_counts_arr = np.asarray(result_counts, dtype=float)
+        avg_calc = float(np.mean(counts_arr))
+        var_calc = float(np.var(counts_arr))
+        std_calc = float(np.sqrt(var_calc))
+        avg_result = float(np.mean(result_counts_arr))
+        std_result = float(np.std(result_counts_arr))
+        latency_ms = np.asarray(latencies) * 1000.0
+        amortized_latency = float(latency_ms.sum() / len(calc_counts))
+        latency_values = [float(v) for v in np.percentile(latency_ms, [50, 95, 99])] + [float(latency_ms.max())]
+    else:
+        avg_calc = var_calc = std_calc = avg_result = std_result = 0.0
+        amortized_latency = 0.0
+        latency_values = [0.0] * 4
+    stats = {
+        "num_queries": len(calc_counts),
+        "avg_result": avg_result,
+        "std_result": std_result,
+        "avg_calc": avg_calc,
+        "std_calc": std_calc,
+        "var_calc": var_calc,
+        "workers": workers,
+        "elapsed": elapsed,
+        "throughput": len(calc_counts) / elapsed if elapsed > 0 else 0.0,
+        "amortized_latency_ms": amortized_latency,
+    }
+    # 批量查询没有单个查询的延迟，分位数按批给出，不与逐个查询的延迟混用同一组字段
+    stats.update(dict.fromkeys(LATENCY_FIELDS))
+    stats.update(zip(BATCH_LATENCY_FIELDS if batched else QUERY_LATENCY_FIELDS, latency_values))
+    return stats, errors
+
+
+def _init_worker(index_path, query_func, distance_func, dataset, batch_query_func):
+    """不支持 fork 时的工作进程初始化：以内存映射方式加载索引"""
+    from Index.Structure.IndexStorage import load_index
+    index, _ = load_index(index_path, dataset)
+    _WORKER_STATE.update(index=index, query_func=query_func, distance_func=distance_func, dataset=dataset,
+                         batch_query_func=batch_query_func)
+
+
+def _run_chunk(start, end, radius, batch_size):
+    """工作进程中执行一块查询，距离函数为 CountingDistance 时同时返回本块的距离统计"""
+    state = _WORKER_STATE
+    distance_func = state["distance_func"]
+    counting = isinstance(distance_func, CountingDistance)
+    if counting:
+        distance_func.clear()
+    results = run_queries(state["index"], state["query_func"], distance_func, state["dataset"], radius,
+                          start, end, state["batch_query_func"], batch_size)
+    return (*results, distance_func.snapshot() if counting else None)
@@ -0,0 +1,235 @@
+import copy
+import json
+import multiprocessing
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from Core.DistanceFunction.CountingDistance import CountingDistance
+from Core.DistanceFunction.ProfilingDistance import ProfilingDistance, DISTANCE_SITES
+from Utils.batchQuery import LATENCY_FIELDS, query_statistics
+from Utils.config_runner import make_pivot_selector, index_algorithms, build_index
+from Utils.statsOutput import write_stats
+
+# 运行进程池中各工作进程使用的基准测试状态（fork 时由父进程直接继承）
+_BENCH_STATE = {}
+
+# 汇总时对多次重复取平均的统计字段
+SUMMARY_FIELDS = (("avg_result", "std_result", "avg_calc", "std_calc", "var_calc", "elapsed", "throughput",
+                   "amortized_latency_ms") + LATENCY_FIELDS +
+                  ("build_time", "build_distance_count", "build_pivot_selection", "build_partitioning",
+                   "build_leaf_construction") +
+                  tuple(f"distance_{site}_{kind}" for site in DISTANCE_SITES for kind in ("count", "time")))
+
+
+def sweep(base_config: dict, structures: dict, selectors: dict, radii: dict):
+    """
+    生成 结构 × 选择器 × 半径 的实验列表
+    :param base_config: 公共配置（数据集、距离函数、batch_query_num 等）
+    :param structures: {结构标签: index_structure 配置}，标签例如 "MVPT"、"LPT(orthogonal)"
+    :param selectors: {选择器标签: pivot_selector 配置}，例如 {"FFT": {"name": "Farthest First Traversal", "params": {}}}
+    :param radii: {选择率标签: 查询半径}，例如 {"0.02": 0.0410, "0.04": 0.0804}
+    :return: 实验列表 [(实验名, 配置, 标签)]，实验名为 "数据集_选择率标签_结构标签_选择器标签"，
+             标签字典包含 structure、selector、batch_selectivity，会写入结果记录
+    """
+    experiments = []
+    dataset_name = base_config.get("dataset", {}).get("name", "")
+    for structure_label, index_config in structures.items():
+        for selector_label, selector_config in selectors.items():
+            for selectivity_label, radius in radii.items():
+                config = copy.deepcopy(base_config)
+                config["index_structure"] = copy.deepcopy(index_config)
+                config["pivot_selector"] = copy.deepcopy(selector_config)
+                config["batch_radius"] = radius
+                test_name = f"{dataset_name}_{selectivity_label}_{structure_label}_{selector_label}"
+                labels = {"structure": structure_label, "selector": selector_label,
+                          "batch_selectivity": selectivity_label}
+                experiments.append((test_name, config, labels))
+    return experiments
+
+
+def run_benchmark(experiments, DATASETS, DISTANCES_Vector, DISTANCES_String, INDEX_STRUCTURES,
+                  repeats: int = 1, workers: int = 1, seed=None, output: str = None, raw_output: str = None):
+    """
+    在同一进程内运行一组批量查询实验，每个数据集只加载一次
+    只有查询半径等查询参数不同的实验共用索引：每次重复构建一次索引，再依次执行这些实验的批量查询
+    :param experiments: 实验列表，元素为 (实验名, 配置) 或 sweep 给出的 (实验名, 配置, 标签)；配置格式与 config_main.py 相同
+    :param DATASETS / DISTANCES_Vector / DISTANCES_String / INDEX_STRUCTURES: 与 config_main.py 中的映射相同
+    :param repeats: 每个实验的重复次数
+    :param workers: 进程数，大于 1 时把 (索引配置, 重复) 任务交给进程池（需要支持 fork 的平台，否则串行执行）；
+                    此时不再嵌套进程池，配置中的 build_workers、workers 与支撑点选择器的 workers 按 1 处理
+                    （build_workers 大于 1 的配置按子树种子串行构建，树与并行构建相同）。
+                    多个任务同时运行时耗时类统计（elapsed、throughput、延迟、build_* 耗时）受并发影响，只在相同并发度下可比，
+                    比较耗时应使用 workers=1；距离计算次数与结果个数不受影响。实际并发度记录在每条记录的 concurrent_tasks 字段中
+    :param seed: 随机种子，None 时每次重复都从系统熵重新播种（与每次运行启动新进程相同）；
+                 指定时每次重复的种子由 seed、索引配置与重复序号确定，结果与进程数无关
+    :param output: 汇总结果文件（每个实验一行，统计量为各次重复的平均值，列名带 _mean 后缀），可直接用于 results/plot_five_structures.py
+    :param raw_output: 逐次结果文件（每个实验的每次重复一行）
+    :return: (汇总记录列表, 逐次记录列表)
+    """
+    experiments = [experiment if len(experiment) == 3 else (*experiment, {}) for experiment in experiments]
+
+    # 按索引配置分组：同组实验只有查询参数不同
+    groups = {}
+    for experiment in experiments:
+        groups.setdefault(_index_key(experiment[1]), []).append(experiment)
+    groups = list(groups.values())
+
+    # 每个数据集只加载一次
+    datasets = {}
+    for _, config, _ in experiments:
+        key = _dataset_key(config)
+        if key not in datasets:
+            name, load_count = key
+            path, loader, data_class = DATASETS[name]
+            datasets[key] = (loader(path, load_count), data_class)
+            print(f"已加载数据集: {name}, 共 {len(datasets[key][0])} 条记录")
+
+    _BENCH_STATE.update(groups=groups, datasets=datasets, distances_vector=DISTANCES_Vector,
+                        distances_string=DISTANCES_String, index_structures=INDEX_STRUCTURES, seed=seed,
+                        nested_workers=workers <= 1)
+    tasks = [(group_index, repeat) for group_index in range(len(groups)) for repeat in range(repeats)]
+    records = []
+    try:
+        if workers > 1 and len(tasks) > 1 and "fork" in multiprocessing.get_all_start_methods():
+            _BENCH_STATE["concurrent_tasks"] = min(workers, len(tasks))
+            print(f"基准测试最多同时运行 {_BENCH_STATE['concurrent_tasks']} 个任务，耗时类统计受并发影响，比较耗时请使用 workers=1")
+            context = multiprocessing.get_context("fork")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                for task_records in pool.map(_run_task, *zip(*tasks)):
+                    records.extend(task_records)
+        else:
+            if workers > 1 and len(tasks) > 1:
+                print("当前平台不支持 fork，基准测试串行执行")
+            _BENCH_STATE["concurrent_tasks"] = 1
+            for group_index, repeat in tasks:
+                records.extend(_run_task(group_index, repeat))
+    finally:
+        _BENCH_STATE.clear()
+
+    summaries = summarize(records, [test_name for test_name, _, _ in experiments])
+    for summary in summaries:
+        print(f"{summary['test_name']}: 平均距离计算次数 {summary['avg_calc_mean']:.2f}，"
+              f"吞吐量 {summary['throughput_mean']:.2f} 查询/秒（{summary['num_repeats']} 次重复的平均）")
+    if output and summaries:
+        write_stats(summaries, output, append=False)
+        print(f"汇总结果已保存到: {output}")
+    if raw_output and records:
+        write_stats(records, raw_output, append=False)
+        print(f"逐次结果已保存到: {raw_output}")
+    return summaries, records
+
+
+def summarize(records, test_names=None):
+    """
+    按实验汇总逐次记录：描述字段取第一次的值，SUMMARY_FIELDS 中的统计量取各次重复的平均值（列名加 _mean 后缀）
+    :param test_names: 实验名顺序，None 时按记录中首次出现的顺序
+    :return: 汇总记录列表
+    """
+    by_test = {}
+    for record in records:
+        by_test.setdefault(record["test_name"], []).append(record)
+    if test_names is None:
+        test_names = list(by_test)
+    summaries = []
+    for test_name in dict.fromkeys(test_names):
+        runs = by_test.get(test_name)
+        if not runs:
+            continue
+        summary = {key: value for key, value in runs[0].items() if key not in SUMMARY_FIELDS and key != "repeat"}
+        summary["num_repeats"] = len(runs)
+        # 按调用位置的距离统计只在配置了 profile_distance 时出现
+        for field in (field for field in SUMMARY_FIELDS if any(field in run for run in runs)):
+            values = [run[field] for run in runs if run.get(field) is not None]
+            summary[f"{field}_mean"] = float(np.mean(values)) if values else None
+        summaries.append(summary)
+    return summaries
+
+
+def _dataset_key(config):
+    return config["dataset"]["name"], config["dataset"]["load_count"]
+
+
+def _index_key(config):
+    """决定索引的配置部分：数据集、距离函数、支撑点选择器与索引结构"""
+    key = [config["dataset"], config.get("distance_function"), config.get("pivot_selector"), config["index_structure"]]
+    return json.dumps(key, sort_keys=True, ensure_ascii=False)
+
+
+def _run_task(group_index, repeat):
+    """构建一组实验共用的索引并依次执行各实验的批量查询，返回逐次记录列表"""
+    state = _BENCH_STATE
+    experiments = state["groups"][group_index]
+    _, config, _ = experiments[0]
+    dataset, data_class = state["datasets"][_dataset_key(config)]
+
+    # 每次重复单独播种，与每次运行启动新进程时一样相互独立
+    if state["seed"] is None:
+        random.seed()
+    else:
+        random.seed(f"{state['seed']}-{_index_key(config)}-{repeat}")
+
+    index_config = dict(config["index_structure"])
+    if not state["nested_workers"] and index_config.get("build_workers", 1) > 1:
+        # 按子树种子串行构建，与单独运行该配置时的并行构建得到相同的树
+        index_config["build_workers"] = 1
+        index_config["build_subtree_seeds"] = True
+    index_name = index_config["name"]
+    # profile_distance 为 true 时按调用位置统计距离计算，记录中包含构建与该实验查询的统计
+    profiling = config.get("profile_distance", False)
+    wrapper = ProfilingDistance if profiling else CountingDistance
+    try:
+        if data_class.__name__ == "VectorData":
+            distance_name = config["distance_function"]["vector"]
+            distance_func = wrapper(state["distances_vector"][distance_name]())
+        else:
+            distance_name = config["distance_function"]["string"]
+            distance_func = wrapper(state["distances_string"][distance_name]())
+        pivot_config = config.get("pivot_selector", {})
+        pivot_selector_name = pivot_config.get("name", "Random")
+        pivot_params = pivot_config.get("params", {})
+        if not state["nested_workers"]:
+            pivot_params = dict(pivot_params, workers=1)
+        pivot_selector = make_pivot_selector(pivot_selector_name, pivot_params, distance_func)
+        if pivot_selector is None:
+            raise ValueError(f"不支持的支撑点选择器 '{pivot_selector_name}'")
+        index_builder, query_func, batch_query_func, _ = index_algorithms(
+            state["index_structures"][index_name], index_config, dataset, distance_func, pivot_selector)
+        index, build_stats = build_index(index_builder, distance_func)
+    except Exception as e:
+        print(f"❌ {index_name} 第 {repeat + 1} 次构建失败: {e}")
+        return []
+    build_snapshot = distance_func.snapshot()
+
+    records = []
+    for test_name, config, labels in experiments:
+        query_workers = config.get("workers", 1) if state["nested_workers"] else 1
+        if profiling:
+            distance_func.clear()
+            distance_func.merge(build_snapshot)
+        stats, errors = query_statistics(index, query_func, distance_func, dataset, config["batch_radius"],
+                                         config.get("batch_query_num"), batch_query_func,
+                                         config.get("batch_size", 1024), query_workers)
+        for error in errors:
+            print(f"{test_name}: {error}")
+        print(f"✅ {test_name} 第 {repeat + 1} 次: 平均结果个数={stats['avg_result']:.2f}, "
+              f"平均距离计算次数={stats['avg_calc']:.2f}, 标准差={stats['std_calc']:.2f}")
+        records.append({
+            "test_name": test_name,
+            **labels,
+            "dataset": config["dataset"]["name"],
+            "load_count": config["dataset"]["load_count"],
+            "distance_function": distance_name,
+            "pivot_selector": pivot_selector_name,
+            "index_structure": index_name,
+            "batch_radius": config["batch_radius"],
+            "batch_query_num": config.get("batch_query_num"),
+            "repeat": repeat,
+            # 测量时同时运行的基准测试任务数，耗时类统计只在相同并发度下可比
+            "concurrent_tasks": state["concurrent_tasks"],
+            **build_stats,
+            **stats,
+            **(distance_func.profile_fields() if profiling else {}),
+        })
+    return records
@@ -0,0 +1,56 @@
+import time
+from contextlib import contextmanager
+
+# 索引构建的计时阶段：内部节点的支撑点选择、内部节点的数据划分（距离计算、排序与上下界）、叶子节点（PivotTable）构建
+BUILD_PHASES = ("pivot_selection", "partitioning", "leaf_construction")
+
+# 当前生效的计时器，None 表示不计时
+_active_timer = None
+
+
+class BuildTimer:
+    """
+    索引构建分阶段计时器
+    在 with 块中生效，期间构建函数中 build_phase 标记的代码段耗时按阶段累计到 totals（秒）；
+    并行构建时工作进程中的耗时也会累加回来，因此各阶段为所有进程的累计时间
+    """
+
+    def __init__(self):
+        self.totals = dict.fromkeys(BUILD_PHASES, 0.0)
+        self._previous = None
+
+    def __enter__(self):
+        global _active_timer
+        self._previous = _active_timer
+        _active_timer = self
+        return self
+
+    def __exit__(self, *exc):
+        global _active_timer
+        _active_timer = self._previous
+        self._previous = None
+        return False
+
+    def add(self, totals: dict):
+        """累加另一组阶段耗时（例如工作进程返回的计时结果）"""
+        for phase, seconds in totals.items():
+            self.totals[phase] += seconds
+
+
+def active_timer():
+    """当前生效的计时器，没有时为 None"""
+    return _active_timer
+
+
+@contextmanager
+def build_phase(phase: str):
+    """把 with 块的耗时累计到当前计时器的 phase 阶段，没有生效的计时器时不计时"""
+    timer = _active_timer
+    if timer is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.totals[phase] += time.perf_counter() - start
@@ -28,7 +28,8 @@ DEFAULT_CONFIG = {
             "objective_function": "Radius-sensitive",  # 可选: "Radius-sensitive", "Maximum mean"
             "radius_threshold": 0.01,  # Radius-sensitive目标函数的参数
             "candidate_selector": "Farthest First Traversal",  # 可选: "Random", "Max Variance", "Farthest First Traversal"
-            "evaluation_selector": "Random"  # 可选: "Random", "Max Variance", "Farthest First Traversal"
+            "evaluation_selector": "Random",  # 可选: "Random", "Max Variance", "Farthest First Traversal"
+            "workers": 1  # 并行评估候选点的进程数，1 表示顺序评估
         }
     },
     
@@ -40,7 +41,10 @@ DEFAULT_CONFIG = {
         "mvpt_regions": 3,  # MVPT特有参数
         "mvpt_internal_pivots": 3,  # MVPT特有参数
         "lpt_matrix_A": [[1, -1, 0], [0, 1, -1], [1, 1, 1]],  # LPT特有参数
-        "lpt_num_regions": 2  # LPT特有参数
+        "lpt_num_regions": 2,  # LPT特有参数
+        "build_workers": 1,  # 树结构并行构建的进程数，1 表示串行构建
+        "build_task_size": 20000,  # 并行构建时单个子树任务的最大数据量
+        "build_subtree_seeds": False  # 串行构建也按并行构建的子树种子构建，使任意进程数构建出的树相同
     },
     
     # 查询测试配置
@@ -61,8 +65,13 @@ DEFAULT_CONFIG = {
     "run_mode": "interactive",  # "interactive" 或 "batch_query_statistics"
     "batch_radius": 0.02,
     "batch_query_num": 20,
+    "batch_size": 1024,  # 批量查询统计时一起遍历索引的查询数，1 表示逐个查询
+    "workers": 1,  # 批量查询统计的进程数，大于 1 时查询分块交给进程池并行执行
     "auto_generate_queries": True,  # 是否自动生成查询点
     "show_results": True,  # 是否显示查询结果
+    "index_cache_dir": None,  # 索引缓存目录，例如 "index_cache"；为 None 时每次重新构建索引
+    "profile_distance": False,  # 是否按调用位置（支撑点选择、构建、查询、验证）统计距离计算次数与耗时
+    "stats_output": None,  # 批量查询统计的结构化输出文件，.csv 追加一行，.jsonl 追加一条，其他后缀写入 JSON
 }
 
 
@@ -1,18 +1,32 @@
+import hashlib
+import json
+import os
+import time
+from functools import partial
+
 import numpy as np
 
 from Utils.config import load_config
 
 # 添加必要的导入
 from Index.Structure.PivotTable import PivotTable
-from Index.Search.PivotTableRangeSearch import PTRangeSearch
+from Index.Search.PivotTableRangeSearch import PTRangeSearch, PTBatchRangeSearch
 from Index.Structure.VantagePointTree import VPTBulkload
-from Index.Search.VantagePointTreeSearch import VPTRangeSearch
+from Index.Search.VantagePointTreeSearch import VPTRangeSearch, VPTBatchRangeSearch
 from Index.Structure.GeneralHyperPlaneTree import GHTBulkload
-from Index.Search.GeneralHyperPlaneTreeSearch import GHTRangeSearch
+from Index.Search.GeneralHyperPlaneTreeSearch import GHTRangeSearch, GHTBatchRangeSearch
 from Index.Structure.MultipleVantagePoinTree import MVPTBulkload
-from Index.Search.MultipleVantagePointTreeSearch import MVPTRangeSearch
+from Index.Search.MultipleVantagePointTreeSearch import MVPTRangeSearch, MVPTBatchRangeSearch
 from Index.Structure.LinearPartitionTree import LPTBulkload
-from Index.Search.LinearPartitionSearch import LPTRangeSearch
+from Index.Search.LinearPartitionSearch import LPTRangeSearch, LPTBatchRangeSearch
+from Index.Structure.IndexStorage import FORMAT_VERSION, MANIFEST_FILE, save_index, load_index, id_locator
+from Index.Structure.ParallelBuild import DEFAULT_TASK_SIZE, parallel_bulkload
+from Index.Structure.SubtreeLayout import build_subtree_layout
+from Core.DistanceFunction.CountingDistance import CountingDistance
+from Core.DistanceFunction.ProfilingDistance import ProfilingDistance, distance_site
+from Utils.batchQuery import query_statistics
+from Utils.buildTimer import BuildTimer
+from Utils.statsOutput import write_stats
 
 # 导入支撑点选择器
 from Algorithm.PivotSelection.ManualSelection import ManualPivotSelector
@@ -22,6 +36,25 @@ from Algorithm.PivotSelection.FarthestFirstTraversalSelection import FarthestFir
 from Algorithm.PivotSelection.IncrementalSamplingSelection import IncrementalSamplingPivotSelector
 
 
+def _index_cache_key(config, path, distance_name):
+    """
+    计算索引缓存的键：数据集（名称、加载数量、文件大小与修改时间）、距离函数、支撑点选择器和索引配置一致时键相同
+    """
+    try:
+        stat = os.stat(path)
+        file_state = [stat.st_size, stat.st_mtime_ns]
+    except OSError:
+        file_state = None
+    key = {
+        "format_version": FORMAT_VERSION,
+        "dataset": [config["dataset"]["name"], config["dataset"]["load_count"], path, file_state],
+        "distance_function": distance_name,
+        "pivot_selector": config.get("pivot_selector", {}),
+        "index_structure": config["index_structure"],
+    }
+    return hashlib.sha1(json.dumps(key, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+
 def run_with_config(config_path="full_test.json", 
                    DATASETS=None, DISTANCES_Vector=None, DISTANCES_String=None, 
                    PIVOT_SELECTORS=None, INDEX_STRUCTURES=None):
@@ -61,6 +94,12 @@ def run_with_config(config_path="full_test.json",
         return None, None, None, None, None
     
     print(f"使用距离函数: {distance_name}")
+    # 包装为计数距离函数，用于统计构建索引时的距离计算次数；
+    # profile_distance 为 true 时同时按调用位置（支撑点选择、构建、查询、验证）统计次数与累计耗时
+    if config.get("profile_distance", False):
+        distance_func = ProfilingDistance(distance_func)
+    else:
+        distance_func = CountingDistance(distance_func)
     
     # 第三步：从配置文件直接构造支撑点选择器
     pivot_config = config.get("pivot_selector", {})
@@ -70,19 +109,8 @@ def run_with_config(config_path="full_test.json",
     print(f"使用支撑点选择器: {pivot_selector_name}")
     
     # 根据配置直接构造支撑点选择器
-    if pivot_selector_name == "Manual":
-        pivot_selector = ManualPivotSelector()
-    elif pivot_selector_name == "Random":
-        seed = pivot_params.get("seed", 42)
-        pivot_selector = RandomPivotSelector(seed=seed)
-    elif pivot_selector_name == "Max Variance":
-        pivot_selector = MaxVariancePivotSelector(distance_func)
-    elif pivot_selector_name == "Farthest First Traversal":
-        pivot_selector = FarthestFirstTraversalSelector(distance_func)
-    elif pivot_selector_name == "Incremental Sampling":
-        # 直接传入配置字典，让IncrementalSamplingPivotSelector自己处理
-        pivot_selector = IncrementalSamplingPivotSelector(distance_func, pivot_params)
-    else:
+    pivot_selector = make_pivot_selector(pivot_selector_name, pivot_params, distance_func)
+    if pivot_selector is None:
         print(f"错误：不支持的支撑点选择器 '{pivot_selector_name}'")
         return None, None, None, None, None
     
@@ -97,43 +125,45 @@ def run_with_config(config_path="full_test.json",
         return None, None, None, None, None
     
     index_type = INDEX_STRUCTURES[index_name]
+    try:
+        index_builder, query_func, batch_query_func, query_name = index_algorithms(
+            index_type, index_config, dataset, distance_func, pivot_selector)
+    except ValueError as e:
+        print(f"错误：{e}")
+        return None, None, None, None, None
     
-    # 为 LPT 创建查询函数包装器（需要 matrix_A 参数）
-    # 初始化变量以避免 NameError
-    lpt_matrix_A = None
-    lpt_num_regions = 2
-    lpt_query_wrapper = None
-    
-    if index_type == "LPT":
-        if "lpt_matrix_A" not in index_config:
-            print("错误：LPT 索引结构需要配置 'lpt_matrix_A' 参数")
-            return None, None, None, None, None
-        lpt_matrix_A = index_config["lpt_matrix_A"]
-        lpt_num_regions = index_config.get("lpt_num_regions", 2)
-        
-        def lpt_query_wrapper(node, query_point, distance_function, radius):
-            return LPTRangeSearch(node, query_point, distance_function, radius, lpt_matrix_A)
-    
-    # 索引结构构建器和对应的查询算法映射
-    INDEX_BUILDERS = {
-        "pivot_table": (lambda: PivotTable(dataset, distance_func, pivot_selector, max_leaf_size, pivot_k), 
-                       PTRangeSearch, "Pivot Table Range Search"),
-        "GHT": (lambda: GHTBulkload(dataset, max_leaf_size, distance_func, pivot_selector, pivot_k),
-                GHTRangeSearch, "General Hyper-plane Tree Range Search"),
-        "VPT": (lambda: VPTBulkload(dataset, max_leaf_size, distance_func, pivot_selector, pivot_k),
-                VPTRangeSearch, "Vantage Point Tree Range Search"),
-        "MVPT": (lambda: MVPTBulkload(dataset, max_leaf_size, distance_func, pivot_selector, pivot_k, 
-                                     index_config["mvpt_regions"], index_config["mvpt_internal_pivots"]),
-                 MVPTRangeSearch, "Multiple Vantage Point Tree Range Search"),
-        "LPT": (lambda: LPTBulkload(dataset, max_leaf_size, distance_func, pivot_selector, pivot_k,
-                                   lpt_matrix_A, lpt_num_regions),
-                lpt_query_wrapper, "Linear Partition Tree Range Search")
-    }
-    
+    # 索引缓存：配置 index_cache_dir 后，相同数据集、距离函数与索引配置的索引只构建一次
+    # 手动选择支撑点依赖交互输入，不使用缓存
+    cache_path = None
+    cache_dir = config.get("index_cache_dir")
+    if cache_dir and pivot_selector_name != "Manual":
+        cache_path = os.path.join(cache_dir, f"{index_type}-{_index_cache_key(config, path, distance_name)}")
+
+    # 构建统计：总耗时与各阶段耗时（秒），从缓存加载时为 None
+    build_stats = dict.fromkeys(BUILD_STATS_FIELDS)
     try:
-        index_builder, query_func, query_name = INDEX_BUILDERS[index_type]
-        index = index_builder()
-        print(f"{index_name} 索引构建完成")
+        index = None
+        if cache_path and os.path.exists(os.path.join(cache_path, MANIFEST_FILE)):
+            try:
+                index, _ = load_index(cache_path, dataset)
+                print(f"{index_name} 索引已从缓存加载: {cache_path}")
+            except (OSError, ValueError, KeyError) as e:
+                print(f"索引缓存不可用（{e}），重新构建")
+                index = None
+        if index is None:
+            index, build_stats = build_index(index_builder, distance_func)
+            print(f"{index_name} 索引构建完成，构建距离计算次数: {build_stats['build_distance_count']}")
+            print(f"构建耗时: {build_stats['build_time']:.3f} 秒（支撑点选择 {build_stats['build_pivot_selection']:.3f} 秒，"
+                  f"数据划分 {build_stats['build_partitioning']:.3f} 秒，叶子构建 {build_stats['build_leaf_construction']:.3f} 秒）")
+            if isinstance(distance_func, ProfilingDistance):
+                print("构建中各调用位置的距离计算:")
+                _print_distance_profile(distance_func)
+            if cache_path:
+                try:
+                    save_index(index, cache_path, {"index_type": index_type, "index_structure": index_config})
+                    print(f"索引已保存到缓存: {cache_path}")
+                except (OSError, ValueError) as e:
+                    print(f"索引缓存保存失败: {e}")
         print(f"查询算法: {query_name}")
     except Exception as e:
         print(f"索引构建失败: {e}")
@@ -141,6 +171,7 @@ def run_with_config(config_path="full_test.json",
     
     # 第五步：执行预设查询
     queries = config["queries"]
+    locate = id_locator(dataset)
     if len(queries) > 0:
         print(f"\n=== 执行 {len(queries)} 个预设查询 ===")
     
@@ -169,26 +200,14 @@ def run_with_config(config_path="full_test.json",
         print(f"查询点: {query_obj}")
         
         try:
-            # 执行查询
-            result, calc_count = query_func(index, query_obj, distance_func, radius)
-            
-            # 获取结果在原始数据集中的索引
-            result_indices = []
-            unique_results = []
-            for r in result:
-                if r not in unique_results:
-                    unique_results.append(r)
+            # 执行查询，结果为对象编号，直接换算为在数据集中的位置
+            with distance_site("search"):
+                result_ids, result_distances, calc_count = query_func(index, query_obj, distance_func, radius)
             
-            for r in unique_results:
-                for i, x in enumerate(dataset):
-                    if x == r:
-                        result_indices.append(i)
-            
-            if result:
-                print(f"查询结果: 找到 {len(result)} 个结果, 距离计算次数: {calc_count}")
+            if len(result_ids) > 0:
+                print(f"查询结果: 找到 {len(result_ids)} 个结果, 距离计算次数: {calc_count}")
                 if config.get("show_results", True):
-                    for idx in result_indices:
-                        print(f"  [{idx}] {dataset[idx]}")
+                    _print_results(dataset, locate, result_ids, result_distances)
             else:
                 print(f"查询结果: 无命中, 距离计算次数: {calc_count}")
                 
@@ -203,15 +222,148 @@ def run_with_config(config_path="full_test.json",
         print("\n=== 进入批量查询统计模式 ===")
         batch_radius = config.get("batch_radius")
         batch_query_num = config.get("batch_query_num")
-        batch_query_statistics_loop(index, query_func, distance_func, dataset, batch_radius, batch_query_num)
+        # 已保存的索引目录：不支持 fork 的平台上多进程查询时工作进程从这里加载索引
+        saved_index_path = cache_path if cache_path and os.path.exists(os.path.join(cache_path, MANIFEST_FILE)) else None
+        stats = batch_query_statistics_loop(index, query_func, distance_func, dataset, batch_radius, batch_query_num,
+                                            batch_query_func, config.get("batch_size", 1024),
+                                            config.get("workers", 1), saved_index_path)
+        if isinstance(distance_func, ProfilingDistance):
+            print("各调用位置的距离计算（构建与查询累计）:")
+            _print_distance_profile(distance_func)
+        # 结构化统计输出：配置描述、构建统计与查询统计合并为一条记录
+        stats_output = config.get("stats_output")
+        if stats_output:
+            record = {
+                "dataset": dataset_name,
+                "load_count": len(dataset),
+                "distance_function": distance_name,
+                "pivot_selector": pivot_selector_name,
+                "index_structure": index_type,
+                "max_leaf_size": max_leaf_size,
+                "pivot_k": pivot_k,
+                "radius": float(batch_radius),
+                "batch_size": config.get("batch_size", 1024),
+                **build_stats,
+                **stats,
+            }
+            if isinstance(distance_func, ProfilingDistance):
+                record.update(distance_func.profile_fields())
+            try:
+                write_stats(record, stats_output)
+                print(f"统计结果已写入: {stats_output}")
+            except OSError as e:
+                print(f"统计结果写入失败: {e}")
     else:
         print("\n=== 运行完成 ===")
     
     return index, query_func, distance_func, dataset, data_class
 
 
+def make_pivot_selector(name: str, params: dict, distance_func):
+    """
+    根据配置构造支撑点选择器
+    :param name: 选择器名称，例如 "Random"、"Farthest First Traversal"
+    :param params: pivot_selector.params 配置
+    :return: 支撑点选择器，不支持的名称返回 None
+    """
+    if name == "Manual":
+        return ManualPivotSelector()
+    if name == "Random":
+        return RandomPivotSelector(seed=params.get("seed", 42))
+    if name == "Max Variance":
+        return MaxVariancePivotSelector(distance_func)
+    if name == "Farthest First Traversal":
+        return FarthestFirstTraversalSelector(distance_func)
+    if name == "Incremental Sampling":
+        # 直接传入配置字典，让IncrementalSamplingPivotSelector自己处理
+        return IncrementalSamplingPivotSelector(distance_func, params)
+    return None
+
+
+def index_algorithms(index_type: str, index_config: dict, dataset, distance_func, pivot_selector):
+    """
+    根据索引配置给出构建函数与查询算法
+    :param index_type: "pivot_table" / "GHT" / "VPT" / "MVPT" / "LPT"
+    :param index_config: index_structure 配置
+    :return: (无参数的构建函数, 查询算法, 批量查询算法, 查询算法名称)
+    """
+    max_leaf_size = index_config["max_leaf_size"]
+    pivot_k = index_config["pivot_k"]
+
+    # 为 LPT 创建查询函数包装器（需要 matrix_A 参数）
+    lpt_matrix_A = None
+    lpt_num_regions = 2
+    lpt_query_wrapper = None
+    lpt_batch_query_wrapper = None
+    if index_type == "LPT":
+        if "lpt_matrix_A" not in index_config:
+            raise ValueError("LPT 索引结构需要配置 'lpt_matrix_A' 参数")
+        lpt_matrix_A = index_config["lpt_matrix_A"]
+        lpt_num_regions = index_config.get("lpt_num_regions", 2)
+
+        # 使用 partial 而不是闭包，便于多进程批量查询时序列化
+        lpt_query_wrapper = partial(LPTRangeSearch, matrix_A=lpt_matrix_A)
+        lpt_batch_query_wrapper = partial(LPTBatchRangeSearch, matrix_A=lpt_matrix_A)
+
+    # 树结构的并行构建：build_workers > 1 时把规模不超过 build_task_size 的子树交给进程池，每个子树任务使用独立的随机种子
+    # build_subtree_seeds 为 true 时串行构建也按同样的子树种子构建，相同 build_task_size 下任意 build_workers 构建出的树完全相同；
+    # 默认的串行构建仍为直接递归构建，与 pivot_selector.seed 对应的树不变
+    build_workers = index_config.get("build_workers", 1)
+    build_task_size = index_config.get("build_task_size", DEFAULT_TASK_SIZE)
+    build_subtree_seeds = index_config.get("build_subtree_seeds", False)
+
+    # 构建完成后建立扁平化布局，包含规则命中时整棵子树直接取布局中的一段切片
+    def bulkload(builder, *args):
+        if build_workers > 1 or build_subtree_seeds:
+            return parallel_bulkload(builder, dataset, *args, workers=build_workers, task_size=build_task_size)
+        root = builder(dataset, *args)
+        build_subtree_layout(root)
+        return root
+
+    # 索引结构构建器、查询算法和批量查询算法映射
+    # 批量查询算法：所有查询一起遍历索引，每个节点对活动查询一次性计算到支撑点的距离块
+    INDEX_BUILDERS = {
+        "pivot_table": (lambda: PivotTable(dataset, distance_func, pivot_selector, max_leaf_size, pivot_k),
+                        PTRangeSearch, PTBatchRangeSearch, "Pivot Table Range Search"),
+        "GHT": (lambda: bulkload(GHTBulkload, max_leaf_size, distance_func, pivot_selector, pivot_k),
+                GHTRangeSearch, GHTBatchRangeSearch, "General Hyper-plane Tree Range Search"),
+        "VPT": (lambda: bulkload(VPTBulkload, max_leaf_size, distance_func, pivot_selector, pivot_k),
+                VPTRangeSearch, VPTBatchRangeSearch, "Vantage Point Tree Range Search"),
+        "MVPT": (lambda: bulkload(MVPTBulkload, max_leaf_size, distance_func, pivot_selector, pivot_k,
+                                  index_config["mvpt_regions"], index_config["mvpt_internal_pivots"]),
+                 MVPTRangeSearch, MVPTBatchRangeSearch, "Multiple Vantage Point Tree Range Search"),
+        "LPT": (lambda: bulkload(LPTBulkload, max_leaf_size, distance_func, pivot_selector, pivot_k,
+                                 lpt_matrix_A, lpt_num_regions),
+                lpt_query_wrapper, lpt_batch_query_wrapper, "Linear Partition Tree Range Search")
+    }
+    return INDEX_BUILDERS[index_type]
+
+
+# 构建统计字段：总耗时、构建距离计算次数与各阶段耗时（秒）
+BUILD_STATS_FIELDS = ("build_time", "build_distance_count",
+                      "build_pivot_selection", "build_partitioning", "build_leaf_construction")
+
+
+def build_index(index_builder, distance_func: CountingDistance):
+    """
+    构建索引并统计构建开销
+    :param index_builder: index_algorithms 给出的构建函数
+    :param distance_func: 构建所用的计数距离函数，构建前后各清零一次
+    :return: (索引, 构建统计字典，字段见 BUILD_STATS_FIELDS)
+    """
+    distance_func.reset()
+    build_start = time.perf_counter()
+    with BuildTimer() as build_timer:
+        index = index_builder()
+    build_stats = {"build_time": time.perf_counter() - build_start, "build_distance_count": distance_func.reset()}
+    for phase, seconds in build_timer.totals.items():
+        build_stats[f"build_{phase}"] = seconds
+    return index, build_stats
+
+
 def interactive_query_loop(index, query_func, distance_func, dataset, data_class):
     """交互式查询循环"""
+    locate = id_locator(dataset)
     while True:
         radius_input = input("\n请输入查询半径（或输入 'exit' 退出）：").strip()
         if radius_input.lower() == "exit":
@@ -237,28 +389,14 @@ def interactive_query_loop(index, query_func, distance_func, dataset, data_class
             continue
 
         try:
-            # 直接调用对应的查询函数
-            result, calc_count = query_func(index, query_obj, distance_func, radius)
-            # 获取结果在原始数据集中的索引
-            result_indices = []
-            # 对结果进行去重，确保每个唯一的数据点只处理一次
-            unique_results = []
-            for r in result:
-                if r not in unique_results:
-                    unique_results.append(r)
+            # 直接调用对应的查询函数，结果为对象编号，直接换算为在数据集中的位置
+            with distance_site("search"):
+                result_ids, result_distances, calc_count = query_func(index, query_obj, distance_func, radius)
             
-            # 为每个唯一结果查找所有匹配的索引
-            for r in unique_results:
-                for i, x in enumerate(dataset):
-                    if x == r:  # 使用相等比较
-                        result_indices.append(i)
-                        # 不break，继续查找所有匹配的索引
-            
-            if result:
-                result_input = input(f"查询点: {query_obj}, 半径 {radius} → 搜索到 {len(result)} 个结果, 使用了 {calc_count} 次距离计算, 是否输出具体结果(y/n)?")
+            if len(result_ids) > 0:
+                result_input = input(f"查询点: {query_obj}, 半径 {radius} → 搜索到 {len(result_ids)} 个结果, 使用了 {calc_count} 次距离计算, 是否输出具体结果(y/n)?")
                 if result_input.lower() == "y":
-                    for i in result_indices:
-                        print(f"[{i}] {dataset[i]}")
+                    _print_results(dataset, locate, result_ids, result_distances)
             else:
                 print(f"查询点: {query_obj}, 半径 {radius} → 无命中, 使用了 {calc_count} 距离计算次数")
         except Exception as e:
@@ -267,38 +405,43 @@ def interactive_query_loop(index, query_func, distance_func, dataset, data_class
     print("\n查询结束，感谢使用！")
 
 
-def batch_query_statistics_loop(index, query_func, distance_func, dataset, batch_radius, batch_query_num):
-    """批量查询距离计算次数统计，不输出具体结果"""
-    radius = float(batch_radius)
-    n = int(batch_query_num) if batch_query_num is not None else len(dataset)
-    n = min(n, len(dataset))
+def _print_results(dataset, locate, result_ids, result_distances):
+    """
+    按编号输出查询结果：[在数据集中的位置] 对象（距离），包含规则命中、未计算距离的对象不输出距离
+    :param locate: id_locator(dataset) 给出的编号到位置的映射函数
+    """
+    positions = locate(result_ids)
+    for pos, dist in zip(positions, result_distances):
+        suffix = "" if np.isnan(dist) else f"  (距离 {dist:.6g})"
+        print(f"  [{pos}] {dataset[int(pos)]}{suffix}")
 
-    calc_counts = []
-    result_counts = []  # 存储每次查询的结果个数
-    for i in range(n):
-        query_obj = dataset[i]
-        try:
-            result, calc_count = query_func(index, query_obj, distance_func, radius)
-            calc_counts.append(calc_count)
-            result_counts.append(len(result))  # 记录结果个数
-        except Exception as e:
-            print(f"第 {i} 个查询失败: {e}")
-    if len(calc_counts) > 0:
-        counts_arr = np.asarray(calc_counts, dtype=float)
-        avg_calc = float(np.mean(counts_arr))
-        var_calc = float(np.var(counts_arr))  # 总体方差（除以 N）
-        std_calc = float(np.sqrt(var_calc))
-        
-        result_counts_arr = np.asarray(result_counts, dtype=float)
-        avg_result = float(np.mean(result_counts_arr))
-        var_result = float(np.var(result_counts_arr))
-        std_result = float(np.sqrt(var_result))
+
+def _print_distance_profile(distance_func: ProfilingDistance):
+    """按调用位置输出距离计算次数与累计耗时"""
+    for site, entry in distance_func.profile().items():
+        print(f"  {site}: {entry['count']} 次，{entry['time']:.3f} 秒")
+
+
+def batch_query_statistics_loop(index, query_func, distance_func, dataset, batch_radius, batch_query_num,
+                                batch_query_func=None, batch_size: int = 1024, workers: int = 1, index_path=None):
+    """
+    批量查询距离计算次数统计，不输出具体结果
+    :param batch_query_func: 批量查询算法（例如 VPTBatchRangeSearch），提供时每 batch_size 个查询一起遍历索引，
+                             否则逐个调用 query_func；两种方式的结果个数与距离计算次数相同
+    :param batch_size: 每批查询数
+    :param workers: 进程数，大于 1 时查询分块交给进程池执行（见 Utils/batchQuery.py），统计结果与单进程相同
+    :param index_path: 索引缓存目录，不支持 fork 的平台上工作进程从这里以内存映射方式加载索引
+    :return: 统计结果字典（字段见 Utils/batchQuery.py 中的 query_statistics）
+    """
+    stats, errors = query_statistics(index, query_func, distance_func, dataset, batch_radius, batch_query_num,
+                                     batch_query_func, batch_size, workers, index_path)
+    for error in errors:
+        print(error)
+    print(f"\n批量查询完成，总查询数: {stats['num_queries']}，平均结果个数: {stats['avg_result']:.2f}，结果个数标准差: {stats['std_result']:.2f}，平均距离计算次数: {stats['avg_calc']:.2f}，标准差: {stats['std_calc']:.2f}，方差: {stats['var_calc']:.2f}，吞吐量: {stats['throughput']:.2f} 查询/秒")
+    if stats["latency_p50_ms"] is not None:
+        print(f"查询延迟（毫秒）: p50 {stats['latency_p50_ms']:.3f}，p95 {stats['latency_p95_ms']:.3f}，p99 {stats['latency_p99_ms']:.3f}，最大 {stats['latency_max_ms']:.3f}")
     else:
-        avg_calc = 0.0
-        var_calc = 0.0
-        std_calc = 0.0
-        avg_result = 0.0
-        var_result = 0.0
-        std_result = 0.0
-    print(f"\n批量查询完成，总查询数: {len(calc_counts)}，平均结果个数: {avg_result:.2f}，结果个数标准差: {std_result:.2f}，平均距离计算次数: {avg_calc:.2f}，标准差: {std_calc:.2f}，方差: {var_calc:.2f}")
+        print(f"每批查询耗时（毫秒）: p50 {stats['batch_latency_p50_ms']:.3f}，p95 {stats['batch_latency_p95_ms']:.3f}，p99 {stats['batch_latency_p99_ms']:.3f}，最大 {stats['batch_latency_max_ms']:.3f}")
+    print(f"平均每个查询耗时（毫秒）: {stats['amortized_latency_ms']:.3f}")
     print("\n=== 批量查询模式完成 ===")
+    return stats
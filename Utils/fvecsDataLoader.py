@@ -1,39 +1,110 @@
-import sys
+import os
+
 import numpy as np
-from Core.Data.VectorData import VectorData
+from Core.Data.VectorDataset import VectorDataset
+
+
+def open_vecs(path: str, component_dtype) -> np.ndarray:
+    """
+    以内存映射方式打开 .fvecs / .bvecs / .ivecs 文件，不读取任何向量数据。
+    每条记录由 int32 维度 d 和 d 个分量组成，映射为形状 (total, d) 的只读数组视图。
+    :param path: 文件路径
+    :param component_dtype: 分量类型，fvecs 为 float32，bvecs 为 uint8，ivecs 为 int32
+    :return: 形状为 (total, d) 的 memmap 视图（行之间不连续，按需读取）
+    """
+    component_dtype = np.dtype(component_dtype)
+    if os.path.getsize(path) == 0:
+        return np.empty((0, 0), dtype=component_dtype)
+
+    # 每条向量的第一项是维度 d，只读取文件开头 4 个字节
+    d = int(np.fromfile(path, dtype='<i4', count=1)[0])
+    record = np.dtype([('d', '<i4'), ('v', component_dtype.newbyteorder('<'), (d,))])
+
+    total = os.path.getsize(path) // record.itemsize
+    return np.memmap(path, dtype=record, mode='r', shape=(total,))['v']
+
+
+def select_rows(total: int, num: int = None, offset: int = 0, stride: int = 1,
+                sample: bool = False, seed: int = None) -> np.ndarray:
+    """
+    计算需要读取的行号
+    :param total: 文件中的向量总数
+    :param num: 读取的向量个数，默认读取全部可选行
+    :param offset: 起始行号
+    :param stride: 行号步长（sample=False 时有效）
+    :param sample: 是否从 offset 之后的行中无放回随机抽样
+    :param seed: 随机抽样种子
+    :return: 升序排列的行号数组
+    """
+    if offset < 0 or stride <= 0:
+        raise ValueError("offset must be non-negative and stride must be positive")
+    if sample:
+        available = max(total - offset, 0)
+        if num is None or num > available:
+            num = available
+        rng = np.random.default_rng(seed)
+        # 排序后按文件顺序读取，对内存映射更友好
+        return np.sort(rng.choice(available, size=num, replace=False)) + offset
+
+    rows = np.arange(offset, total, stride, dtype=np.int64)
+    if num is not None:
+        rows = rows[:num]
+    return rows
+
+
+def _read_rows(vecs: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """只读取指定行，返回连续数组"""
+    if len(rows) == 0:
+        return np.empty((0, vecs.shape[1]), dtype=vecs.dtype)
+    start, stop = int(rows[0]), int(rows[-1]) + 1
+    if stop - start == len(rows):
+        # 连续行：切片后一次性复制
+        return np.ascontiguousarray(vecs[start:stop])
+    return np.ascontiguousarray(vecs[rows])
+
 
-def load_fvecs_data(path: str, num: int = None) -> list:
+def load_fvecs_data(path: str, num: int = None, offset: int = 0, stride: int = 1,
+                    sample: bool = False, seed: int = None) -> VectorDataset:
     """
-    从 .fvecs 二进制文件中加载向量数据，并封装为 VectorData 列表。
+    从 .fvecs 二进制文件中加载向量数据，并封装为 VectorDataset。
+    文件以内存映射方式打开，只读取被选中的行，加载时间与文件大小无关。
     :param path: .fvecs 文件路径，例如 "Datasets/deep1M/deep1M_base.fvecs"
     :param num: 读取的向量个数，默认读取全部
-    :return: VectorData 对象组成的列表
+    :param offset: 起始行号
+    :param stride: 行号步长
+    :param sample: 是否随机抽样 num 行
+    :param seed: 随机抽样种子
+    :return: 由 float32 连续数组支撑的 VectorDataset，ids 为向量在文件中的行号
     """
-    # 按 int32 读取整个文件
-    raw = np.fromfile(path, dtype='int32')
-    if raw.size == 0:
-        return []
+    vecs = open_vecs(path, np.float32)
+    rows = select_rows(len(vecs), num, offset, stride, sample, seed)
+    return VectorDataset(_read_rows(vecs, rows), rows)
 
-    # 每条向量的第一项是维度 d
-    d = int(raw[0])
 
-    # 形状为 [num_vectors, d + 1]，去掉首列 d
-    data_int32 = raw.reshape(-1, d + 1)[:, 1:].copy()
-
-    # 以 float32 视图解释为最终向量值
-    data = data_int32.view('float32')
+def load_bvecs_data(path: str, num: int = None, offset: int = 0, stride: int = 1,
+                    sample: bool = False, seed: int = None) -> VectorDataset:
+    """
+    从 .bvecs 二进制文件（uint8 分量，例如 SIFT1B）中加载向量数据，参数同 load_fvecs_data
+    :return: 由 float32 连续数组支撑的 VectorDataset，ids 为向量在文件中的行号
+    """
+    vecs = open_vecs(path, np.uint8)
+    rows = select_rows(len(vecs), num, offset, stride, sample, seed)
+    return VectorDataset(_read_rows(vecs, rows).astype(np.float32), rows)
 
-    # 控制读取数量
-    total, dim = data.shape
-    if num is None or num > total:
-        num = total
 
-    # 封装为 VectorData 列表
-    vectors = []
-    for i in range(num):
-        vectors.append(VectorData(data[i]))
+def load_ivecs_data(path: str, num: int = None, offset: int = 0, stride: int = 1) -> np.ndarray:
+    """
+    从 .ivecs 二进制文件中加载整数向量（通常是 groundtruth 近邻编号）
+    :param path: .ivecs 文件路径，例如 "Datasets/deep1M/deep1M_groundtruth.ivecs"
+    :param num: 读取的行数，默认读取全部
+    :param offset: 起始行号
+    :param stride: 行号步长
+    :return: 形状为 (num, k) 的 int32 数组
+    """
+    vecs = open_vecs(path, np.int32)
+    rows = select_rows(len(vecs), num, offset, stride)
+    return _read_rows(vecs, rows)
 
-    return vectors
 
 if __name__ == "__main__":
     dataset_path = "../Datasets/deep1M/deep1M_query.fvecs"
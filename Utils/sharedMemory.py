@@ -0,0 +1,45 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# 工作进程中已连接的共享内存：名称 -> (SharedMemory, ndarray)
+_attached = {}
+
+
+def share_array(array: np.ndarray) -> tuple:
+    """
+    把数组复制到新建的共享内存中
+    :param array: 待共享的数组
+    :return: (SharedMemory 对象, 共享内存上的数组视图, 供其他进程连接的描述 (名称, 形状, dtype))
+    """
+    array = np.ascontiguousarray(array)
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    view = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)
+    view[...] = array
+    return shm, view, (shm.name, array.shape, array.dtype.str)
+
+
+def release_array(shm: shared_memory.SharedMemory):
+    """关闭并删除由 share_array 创建的共享内存"""
+    shm.close()
+    shm.unlink()
+
+
+def attach_arrays(*specs) -> list:
+    """
+    在工作进程中按描述连接共享内存数组，连接结果缓存在进程内；不在本次描述中的旧连接会被关闭
+    :param specs: share_array 返回的描述
+    :return: 与 specs 对应的数组列表（只读使用）
+    """
+    names = {spec[0] for spec in specs}
+    for name in [name for name in _attached if name not in names]:
+        shm, _ = _attached.pop(name)
+        shm.close()
+
+    arrays = []
+    for name, shape, dtype in specs:
+        if name not in _attached:
+            shm = shared_memory.SharedMemory(name=name)
+            _attached[name] = (shm, np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf))
+        arrays.append(_attached[name][1])
+    return arrays
@@ -0,0 +1,43 @@
+import csv
+import json
+import os
+
+
+def write_stats(records, path: str, append: bool = True):
+    """
+    把统计记录写入文件，便于脚本直接读取而不必解析控制台输出
+    .csv 文件追加行（新文件先写表头，已有文件沿用其表头）；.jsonl 文件每条记录追加一行；其他后缀覆盖写入 JSON
+    :param records: 一条记录（字典）或记录列表，值为数字、字符串或 None
+    :param path: 输出文件路径
+    :param append: 为 False 时 .csv 与 .jsonl 文件也覆盖写入
+    """
+    if isinstance(records, dict):
+        records = [records]
+    records = list(records)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    suffix = os.path.splitext(path)[1].lower()
+    if suffix == ".csv":
+        fieldnames = None
+        if append and os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, "r", encoding="utf-8", newline="") as f:
+                fieldnames = next(csv.reader(f), None)
+        new_file = fieldnames is None
+        if new_file:
+            fieldnames = []
+            for record in records:
+                fieldnames.extend(key for key in record if key not in fieldnames)
+        with open(path, "a" if append else "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore")
+            if new_file:
+                writer.writeheader()
+            writer.writerows(records)
+    elif suffix == ".jsonl":
+        with open(path, "a" if append else "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(records[0] if len(records) == 1 else records, f, ensure_ascii=False, indent=2)
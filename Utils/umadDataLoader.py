@@ -1,15 +1,25 @@
+import os
+from itertools import islice
+
 import numpy as np
-from Core.Data.VectorData import VectorData
+from Core.Data.VectorDataset import VectorDataset
 from Core.Data.StringData import StringData
 
 
-def load_umad_vector_data(path: str, num: int = None, dim: int = None) -> list:
+# 文本解析时每次处理的行数
+PARSE_CHUNK_LINES = 65536
+
+
+def load_umad_vector_data(path: str, num: int = None, dim: int = None, cache: bool = True) -> VectorDataset:
     """
     从 UMAD 数据集中加载向量类型数据
+    文本按块批量解析，解析结果缓存到数据文件旁的 .npy 文件中（以文件修改时间和 dim 为键），
+    之后的加载以内存映射方式读取缓存，只把需要的前 num 行复制到内存，两种方式得到的数组都可写。
     :param path: 文件路径，例如 "Datasets/Vector/hawii.txt"
     :param num: 读取的向量个数，默认读取全部
     :param dim: 读取的向量维度。None 表示使用文件中的维度；否则截取每行前 dim 个数
-    :return: VectorData 对象组成的列表
+    :param cache: 是否读写 .npy 缓存
+    :return: 由 float64 连续数组支撑的 VectorDataset
     """
     with open(path, 'r') as f:
         file_dim, count = map(int, f.readline().split())
@@ -20,12 +30,58 @@ def load_umad_vector_data(path: str, num: int = None, dim: int = None) -> list:
         if dim is None or dim > file_dim:
             dim = file_dim
 
-        vectors = []
-        for _ in range(num):
-            line = f.readline()
-            vector = np.array(list(map(float, line.strip().split()[:dim])))
-            vectors.append(VectorData(vector))
+        cache_path = _vector_cache_path(path, dim) if cache else None
+        if cache_path is not None and os.path.exists(cache_path):
+            cached = np.load(cache_path, mmap_mode='r')
+            if len(cached) >= num:
+                return VectorDataset(np.array(cached[:num]))
+
+        vectors = _parse_umad_vectors(f, num, dim)
+
+    if cache_path is not None:
+        _write_vector_cache(path, cache_path, vectors)
+    return VectorDataset(vectors)
+
 
+def _vector_cache_path(path: str, dim: int) -> str:
+    """缓存文件名包含数据文件的修改时间和读取维度，数据文件变化后旧缓存自动失效"""
+    return f"{path}.cache-{os.stat(path).st_mtime_ns}-d{dim}.npy"
+
+
+def _write_vector_cache(path: str, cache_path: str, vectors: np.ndarray):
+    """写入 .npy 缓存并删除同一数据文件修改时间不同的过期缓存；目录不可写时忽略"""
+    directory, base = os.path.split(path)
+    current_prefix = f"{base}.cache-{os.stat(path).st_mtime_ns}-"
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            np.save(f, vectors)
+        os.replace(tmp_path, cache_path)
+        for name in os.listdir(directory or '.'):
+            if name.startswith(f"{base}.cache-") and name.endswith(".npy") and not name.startswith(current_prefix):
+                os.remove(os.path.join(directory, name))
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _parse_umad_vectors(f, num: int, dim: int) -> np.ndarray:
+    """
+    按块批量解析 num 行向量文本，每块交给 numpy 的 C 解析器一次性转换为 float 数组
+    若某块无法整体解析（例如存在分量不足的行），则该块退回逐行解析
+    """
+    vectors = np.empty((num, dim), dtype=np.float64)
+    filled = 0
+    while filled < num:
+        lines = list(islice(f, min(PARSE_CHUNK_LINES, num - filled)))
+        if not lines:
+            raise ValueError(f"Expected {num} vectors but file ended after {filled}")
+        try:
+            block = np.loadtxt(lines, dtype=np.float64, usecols=range(dim), ndmin=2)
+        except ValueError:
+            block = [list(map(float, line.strip().split()[:dim])) for line in lines]
+        vectors[filled:filled + len(lines)] = block
+        filled += len(lines)
     return vectors
 
 
@@ -49,7 +105,7 @@ def load_umad_string_data(path: str, num: int = None, length: int = None) -> lis
             s = all_lines[i]
             if length is not None:
                 s = s[:length]  # 截取前 length 个字符
-            strings.append(StringData(s))
+            strings.append(StringData(s, i))
 
     return strings
 
@@ -76,7 +132,7 @@ def load_fasta_protein_data(path: str, num: int = None, length: int = None) -> l
                     seq_str = ''.join(current_seq)
                     if length is not None:
                         seq_str = seq_str[:length]  # 支持任意长度
-                    sequences.append(StringData(seq_str))
+                    sequences.append(StringData(seq_str, len(sequences)))
 
                     if num is not None and len(sequences) >= num:
                         break
@@ -90,6 +146,6 @@ def load_fasta_protein_data(path: str, num: int = None, length: int = None) -> l
             seq_str = ''.join(current_seq)
             if length is not None:
                 seq_str = seq_str[:length]
-            sequences.append(StringData(seq_str))
+            sequences.append(StringData(seq_str, len(sequences)))
     return sequences
 
@@ -1,7 +1,5 @@
 import json
 
-import numpy as np
-
 from Algorithm.PivotSelection.ManualSelection import ManualPivotSelector
 from Algorithm.PivotSelection.RandSelection import RandomPivotSelector
 from Core.Data.VectorData import VectorData
@@ -22,6 +20,7 @@ from Index.Search.MultipleVantagePointTreeSearch import MVPTRangeSearch
 from Algorithm.PivotSelection.MaxVarianceSelection import MaxVariancePivotSelector
 from Algorithm.PivotSelection.FarthestFirstTraversalSelection import FarthestFirstTraversalSelector
 from Algorithm.PivotSelection.IncrementalSamplingSelection import IncrementalSamplingPivotSelector
+from Utils.config_runner import interactive_query_loop
 
 # 可选配置
 DATASETS = {
@@ -137,59 +136,8 @@ def interactive_loop():
         print(f"索引构建失败: {e}")
         return
 
-    while True:
-        radius_input = input("\n请输入查询半径（或输入 'exit' 退出）：").strip()
-        if radius_input.lower() == "exit":
-            break
-        try:
-            radius = float(radius_input)
-        except ValueError:
-            print("请输入合法的浮点数。")
-            continue
-
-        query_input = input(f"请输入查询{'向量' if data_class.__name__ == 'VectorData' else '字符串'}：").strip()
-
-        try:
-            if data_class.__name__ == "VectorData":
-                query_array = np.array(list(map(float, query_input.strip().split())))
-                query_obj = data_class(query_array)
-            elif data_class.__name__ == "StringData":
-                query_obj = data_class(query_input.strip())
-            else:
-                raise TypeError(f"暂不支持的查询数据类型：{data_class}")
-        except Exception as e:
-            print(f"查询点构建失败: {e}")
-            continue
-
-        try:
-            # 直接调用对应的查询函数
-            result, calc_count = query_func(index, query_obj, distance_func, radius)
-            # 获取结果在原始数据集中的索引
-            result_indices = []
-            # 对结果进行去重，确保每个唯一的数据点只处理一次
-            unique_results = []
-            for r in result:
-                if r not in unique_results:
-                    unique_results.append(r)
-            
-            # 为每个唯一结果查找所有匹配的索引
-            for r in unique_results:
-                for i, x in enumerate(dataset):
-                    if x == r:  # 使用相等比较
-                        result_indices.append(i)
-                        # 不break，继续查找所有匹配的索引
-            
-            if result:
-                result_input = input(f"查询点: {query_obj}, 半径 {radius} → 搜索到 {len(result)} 个结果, 使用了 {calc_count} 次距离计算, 是否输出具体结果(y/n)?")
-                if result_input.lower() == "y":
-                    for i in result_indices:
-                        print(f"[{i}] {dataset[i]}")
-            else:
-                print(f"查询点: {query_obj}, 半径 {radius} → 无命中, 使用了 {calc_count} 距离计算次数")
-        except Exception as e:
-            print(f"查询失败: {e}")
-
-    print("\n查询结束，感谢使用！")
+    # 查询循环与配置驱动模式共用，结果按对象编号输出
+    interactive_query_loop(index, query_func, distance_func, dataset, data_class)
 
 
 if __name__ == "__main__":
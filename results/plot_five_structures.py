@@ -49,7 +49,9 @@ def _extract_structure_name(test_name: str) -> str:
 
 def load_results(excel_path: str) -> Dict[str, List[Tuple[str, float]]]:
     """
-    从 Excel 文件中读取五种索引结构的数据。
+    从 Excel 或 CSV 文件中读取五种索引结构的数据。
+    有 structure 列（例如 Utils/benchmark.py 的汇总结果）时直接使用该列作为结构名称，否则从 test_name 中提取；
+    五种结构之外的结构名称也会保留。
     
     返回:
         structure_data: Dict[str, List[Tuple[str, float]]]
@@ -64,11 +66,14 @@ def load_results(excel_path: str) -> Dict[str, List[Tuple[str, float]]]:
         "LPT(orthogonal)": [],
     }
     
-    # 读取 Excel 文件
+    # 读取 Excel 或 CSV 文件
     try:
-        df = pd.read_excel(excel_path)
+        if excel_path.lower().endswith(".csv"):
+            df = pd.read_csv(excel_path)
+        else:
+            df = pd.read_excel(excel_path)
     except Exception as e:
-        raise RuntimeError(f"无法读取 Excel 文件 {excel_path}: {e}")
+        raise RuntimeError(f"无法读取结果文件 {excel_path}: {e}")
     
     for _, row in df.iterrows():
         test_name = str(row.get("test_name", "")).strip()
@@ -97,20 +102,13 @@ def load_results(excel_path: str) -> Dict[str, List[Tuple[str, float]]]:
         except (ValueError, TypeError):
             continue
         
-        # 从 test_name 提取结构名称
-        structure_name = _extract_structure_name(test_name)
+        # 优先使用 structure 列，否则从 test_name 提取结构名称
+        structure_name = row.get("structure", "")
+        if pd.isna(structure_name) or str(structure_name).strip() == "":
+            structure_name = _extract_structure_name(test_name)
+        structure_name = str(structure_name).strip()
         
-        # 将结构名称映射到标准名称
-        if structure_name == "CGHT":
-            structure_data["CGHT"].append((selectivity_label, y))
-        elif structure_name == "MVPT(LPTv)":
-            structure_data["MVPT(LPTv)"].append((selectivity_label, y))
-        elif structure_name == "MVPT(no_inclusion)":
-            structure_data["MVPT(no_inclusion)"].append((selectivity_label, y))
-        elif structure_name == "LPT(orthogonal)":
-            structure_data["LPT(orthogonal)"].append((selectivity_label, y))
-        elif structure_name == "MVPT":
-            structure_data["MVPT"].append((selectivity_label, y))
+        structure_data.setdefault(structure_name, []).append((selectivity_label, y))
     
     # 对每种结构的数据按标签中的数值从小到大排序
     for key in structure_data:
@@ -4,269 +4,60 @@ MetricSpace 批处理运行脚本
 自动创建配置并运行测试，无需手动输入
 """
 
-import csv
-import os
-import re
-import subprocess
-import sys
-from typing import Dict, Optional, Tuple
-
-from Utils.config import save_config, DEFAULT_CONFIG
+from Utils.config import DEFAULT_CONFIG
+from Utils.benchmark import sweep, run_benchmark
+from config_main import DATASETS, DISTANCES_Vector, DISTANCES_String, INDEX_STRUCTURES
 
 # 每个实验重复次数
 NUM_REPEATS = 5
 
 
-def _parse_batch_stats_from_stdout(stdout: str) -> Optional[Tuple[float, float, float]]:
-    """
-    从 config_main.py 的输出中解析批量查询统计结果：
-    平均距离计算次数、标准差、方差
-    """
-    # 目标行示例：
-    # 批量查询完成，总查询数: 1000，平均距离计算次数: 123.45，标准差: 12.34，方差: 152.34
-    for line in stdout.splitlines():
-        if "平均距离计算次数" in line and "标准差" in line and "方差" in line:
-            # 提取该行中的所有数字，取最后三个分别作为 avg, std, var
-            nums = re.findall(r"[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?", line)
-            if len(nums) >= 3:
-                try:
-                    avg_calc = float(nums[-3])
-                    std_calc = float(nums[-2])
-                    var_calc = float(nums[-1])
-                    return avg_calc, std_calc, var_calc
-                except ValueError:
-                    return None
-    return None
-
-
-def create_and_run_test(test_name: str, config: Dict) -> Optional[Dict]:
-    """
-    创建配置并运行测试。
-    每个实验重复 NUM_REPEATS 次，取统计量的平均值，并返回汇总结果字典。
-    """
-    config_file = f"./config/{test_name}.json"
-    save_config(config, config_file)
-
-    print(f"\n=== 运行 {test_name} 测试（重复 {NUM_REPEATS} 次） ===")
-    print(f"配置文件: {config_file}")
-
-    stats_list = []  # 每次运行解析到的 (avg_calc, std_calc, var_calc)
-
-    try:
-        for run_idx in range(1, NUM_REPEATS + 1):
-            print(f"\n--- 第 {run_idx}/{NUM_REPEATS} 次运行 ---")
-            # 运行测试
-            result = subprocess.run(
-                [sys.executable, "config_main.py", config_file],
-                capture_output=True,
-                text=True,
-                encoding="utf-8",
-            )
-
-            if result.returncode == 0:
-                print(f"✅ {test_name} 第 {run_idx} 次测试成功完成")
-                # 只打印关键信息，完整 stdout 如有需要可单独查看
-                parsed = _parse_batch_stats_from_stdout(result.stdout)
-                if parsed is not None:
-                    avg_calc, std_calc, var_calc = parsed
-                    stats_list.append(parsed)
-                    print(
-                        f"本次统计: 平均距离计算次数={avg_calc:.2f}, "
-                        f"标准差={std_calc:.2f}, 方差={var_calc:.2f}"
-                    )
-                else:
-                    print("⚠ 未能从输出中解析统计结果，原始输出如下：")
-                    print(result.stdout)
-            else:
-                print(f"❌ {test_name} 第 {run_idx} 次测试失败")
-                print("错误输出:")
-                print(result.stderr)
-
-    except subprocess.TimeoutExpired:
-        print(f"⏰ {test_name} 测试超时")
-    except Exception as e:
-        print(f"❌ {test_name} 测试异常: {e}")
-    finally:
-        # 清理配置文件
-        try:
-            os.remove(config_file)
-        except OSError:
-            pass
-
-    if not stats_list:
-        print(f"⚠ {test_name} 未获得有效的统计结果")
-        return None
-
-    # 对 NUM_REPEATS 次运行得到的统计量再取平均，作为该实验的最终结果
-    avg_calc_mean = sum(s[0] for s in stats_list) / len(stats_list)
-    std_calc_mean = sum(s[1] for s in stats_list) / len(stats_list)
-    var_calc_mean = sum(s[2] for s in stats_list) / len(stats_list)
-
-    print(
-        f"\n=== {test_name} 实验最终结果（{len(stats_list)} 次有效运行的平均）===\n"
-        f"平均距离计算次数(平均后): {avg_calc_mean:.2f}\n"
-        f"标准差(平均后): {std_calc_mean:.2f}\n"
-        f"方差(平均后): {var_calc_mean:.2f}"
-    )
-
-    # 方便后续画图的结构化结果
-    summary = {
-        "test_name": test_name,
-        "dataset": config.get("dataset", {}).get("name", ""),
-        "load_count": config.get("dataset", {}).get("load_count", ""),
-        "distance_vector": config.get("distance_function", {}).get("vector", ""),
-        "distance_string": config.get("distance_function", {}).get("string", ""),
-        "pivot_selector": config.get("pivot_selector", {}).get("name", ""),
-        "index_structure": config.get("index_structure", {}).get("name", ""),
-        "batch_radius": config.get("batch_radius", ""),
-        "batch_query_num": config.get("batch_query_num", ""),
-        "num_repeats": len(stats_list),
-        "avg_calc_mean": avg_calc_mean,
-        "std_calc_mean": std_calc_mean,
-        "var_calc_mean": var_calc_mean,
-    }
-    return summary
-
-
 def run_all_tests():
     """运行所有预设测试"""
 
-    pivot_selection_comparison_tests = []
-
-    yeast_002_GHT_wed_random = DEFAULT_CONFIG.copy()
-    yeast_002_GHT_wed_random.update({
+    base_config = DEFAULT_CONFIG.copy()
+    base_config.update({
         "dataset": {"name": "yeast", "load_count": 100},
         "distance_function": {"vector": "Euclidean Distance", "string": "Weighted Edit Distance"},
-        "pivot_selector": {
-            "name": "Random",
-            # 可选: "Manual", "Random", "Max Variance", "Farthest First Traversal", "Incremental Sampling"
-            "params": {
-                # 随机选择支撑点参数
-                "seed": 0,
-            }
-        },
-        "index_structure": {
-            "name": "General Hyper-plane Tree",
-            "max_leaf_size": 10,
-            "pivot_k": 1
-        },
-        "queries": [
-            # {"radius": 0.02, "query_point": "auto", "description": "小半径查询"}
-        ],
+        "queries": [],
         # 运行模式
-        "run_mode": "batch_query_statistics",  # "interactive" 或 "batch"
-        "batch_radius": 439,
+        "run_mode": "batch_query_statistics",
         "batch_query_num": 10,
-        "auto_generate_queries": True,  # 是否自动生成查询点
         "show_results": False,  # 是否显示查询结果
-        "exit_after_queries": False  # 是否在完成预设查询后退出
-    })
-    pivot_selection_comparison_tests.append(("yeast_002_GHT_wed_random", yeast_002_GHT_wed_random))
-
-    yeast_004_GHT_wed_random = yeast_002_GHT_wed_random.copy()
-    yeast_004_GHT_wed_random.update({
-        "batch_radius": 610,
     })
-    pivot_selection_comparison_tests.append(("yeast_004_GHT_wed_random", yeast_004_GHT_wed_random))
 
-    yeast_006_GHT_wed_random = yeast_002_GHT_wed_random.copy()
-    yeast_006_GHT_wed_random.update({
-        "batch_radius": 710,
-    })
-    pivot_selection_comparison_tests.append(("yeast_006_GHT_wed_random", yeast_006_GHT_wed_random))
-
-    yeast_008_GHT_wed_random =yeast_002_GHT_wed_random.copy()
-    yeast_008_GHT_wed_random.update({
-        "batch_radius": 777,
-    })
-    pivot_selection_comparison_tests.append(("yeast_008_GHT_wed_random", yeast_008_GHT_wed_random))
-
-    yeast_010_GHT_wed_random = yeast_002_GHT_wed_random.copy()
-    yeast_010_GHT_wed_random.update({
-        "batch_radius": 870,
-    })
-    pivot_selection_comparison_tests.append(("yeast_010_GHT_wed_random", yeast_010_GHT_wed_random))
-
-    yeast_002_VPT_wed_random = yeast_002_GHT_wed_random.copy()
-    yeast_002_VPT_wed_random.update({
-        "index_structure": {
+    # 索引结构
+    structures = {
+        "GHT": {
+            "name": "General Hyper-plane Tree",
+            "max_leaf_size": 10,
+            "pivot_k": 1
+        },
+        "VPT": {
             "name": "Vantage Point Tree",
             "max_leaf_size": 20,
             "pivot_k": 1
-        }
-    })
-    pivot_selection_comparison_tests.append(
-        ("yeast_002_VPT_wed_random", yeast_002_VPT_wed_random))
-
-    yeast_004_VPT_wed_random = yeast_002_VPT_wed_random.copy()
-    yeast_004_VPT_wed_random.update({
-        "batch_radius": 610,
-    })
-    pivot_selection_comparison_tests.append(
-        ("yeast_004_VPT_wed_random", yeast_004_VPT_wed_random))
-
-    yeast_006_VPT_wed_random = yeast_002_VPT_wed_random.copy()
-    yeast_006_VPT_wed_random.update({
-        "batch_radius": 710,
-    })
-    pivot_selection_comparison_tests.append(
-        ("yeast_006_VPT_wed_random", yeast_006_VPT_wed_random))
+        },
+    }
 
-    yeast_008_VPT_wed_random = yeast_002_VPT_wed_random.copy()
-    yeast_008_VPT_wed_random.update({
-        "batch_radius": 777,
-    })
-    pivot_selection_comparison_tests.append(
-        ("yeast_008_VPT_wed_random", yeast_008_VPT_wed_random))
+    # 支撑点选择算法
+    selectors = {
+        "random": {"name": "Random", "params": {"seed": 0}},
+    }
 
-    yeast_010_VPT_wed_random = yeast_002_VPT_wed_random.copy()
-    yeast_010_VPT_wed_random.update({
-        "batch_radius": 870,
-    })
-    pivot_selection_comparison_tests.append(
-        ("yeast_010_VPT_wed_random", yeast_010_VPT_wed_random))
+    # 选择率 -> 查询半径
+    radii = {"0.02": 439, "0.04": 610, "0.06": 710, "0.08": 777, "0.10": 870}
 
     # 运行测试
     print("🚀 开始运行 MetricSpace 批处理测试")
     print("=" * 50)
 
-    # 结果保存相关设置
-    os.makedirs("./results", exist_ok=True)
+    # 汇总结果可直接用于 results/plot_five_structures.py 画图
     results_file = "results/GHT_VPT_yeast_comparison_batch_stats.csv"
-    summaries = []
-
-    # 支撑点选择算法对比测试
-    print("\n📊 支撑点选择算法对比测试")
-    print("-" * 30)
-    for test_name, test_config in pivot_selection_comparison_tests:
-        summary = create_and_run_test(f"objective function {test_name}", test_config)
-        if summary is not None:
-            summaries.append(summary)
-
-    # 将所有实验的最终结果写入 CSV，方便后续画图
-    if summaries:
-        fieldnames = [
-            "test_name",
-            "dataset",
-            "load_count",
-            "distance_vector",
-            "distance_string",
-            "pivot_selector",
-            "index_structure",
-            "batch_radius",
-            "batch_query_num",
-            "num_repeats",
-            "avg_calc_mean",
-            "std_calc_mean",
-            "var_calc_mean",
-        ]
-        with open(results_file, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            for s in summaries:
-                writer.writerow(s)
-        print(f"\n📁 所有实验的最终结果已保存到: {results_file}")
-    else:
+    summaries, _ = run_benchmark(sweep(base_config, structures, selectors, radii),
+                                 DATASETS, DISTANCES_Vector, DISTANCES_String, INDEX_STRUCTURES,
+                                 repeats=NUM_REPEATS, output=results_file)
+    if not summaries:
         print("\n⚠ 没有可保存的实验结果")
 
     print("\n✅ 所有测试完成！")